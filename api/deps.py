@@ -1,5 +1,5 @@
-from fastapi import Depends, HTTPException, status, Request
-from crud.mongo_user import user_mongo_crud
+from fastapi import Depends, HTTPException, status, Request, WebSocket
+from services.user_cache import user_cache
 from models.mongo_models import User, UserRole
 from core.security import verify_token
 from typing import Optional
@@ -26,12 +26,27 @@ async def get_current_user(request: Request) -> User:
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     
-    user = await user_mongo_crud.get(user_id)
+    user = await user_cache.get_user(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
     return user
 
+async def get_websocket_user(websocket: WebSocket) -> Optional[User]:
+    """Resolve the user for a WebSocket from the access_token cookie or a ?token= query parameter"""
+    token = websocket.cookies.get('access_token') or websocket.query_params.get('token')
+    if not token:
+        return None
+
+    payload = verify_token(token)
+    if not payload or not payload.get("user_id"):
+        return None
+
+    user = await user_cache.get_user(payload["user_id"])
+    if not user or not user.is_active:
+        return None
+    return user
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
@@ -1,12 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from api.deps import get_manager_user
 from models.mongo_models import User, OrderStatus
-from crud.mongo_user import user_mongo_crud
-from services.order_service import get_all_orders
-from datetime import datetime, timedelta
+from services.analytics_service import analytics_service
+from services.revenue_service import revenue_service
 import logging
-from models.mongo_models import Payment
-from schemas.payment import PaymentStatus
 
 logger = logging.getLogger(__name__)
 
@@ -16,40 +13,7 @@ router = APIRouter(redirect_slashes=False)
 async def get_dashboard_stats(current_user: User = Depends(get_manager_user)):
     """Get dashboard statistics (Manager/Admin only)"""
     try:
-        # Get order statistics
-        all_orders = await get_all_orders()
-        
-        # Calculate order stats
-        pending_orders = [order for order in all_orders if order.status == OrderStatus.PENDING]
-        completed_orders = [order for order in all_orders if order.status == OrderStatus.COMPLETED]
-        in_progress_orders = [order for order in all_orders if order.status in [
-            OrderStatus.ACCEPTED, OrderStatus.IN_PROGRESS, OrderStatus.OUT_FOR_DELIVERY
-        ]]
-        
-        return {
-            "users": {
-                "total": 0,  # TODO: Implement user stats
-                "regular": 0,
-                "admin": 0,
-                "active": 0
-            },
-            "drivers": {
-                "total": 0,  # TODO: Implement driver stats
-                "available": 0,
-                "busy": 0
-            },
-            "orders": {
-                "total": len(all_orders),
-                "pending": len(pending_orders),
-                "completed": len(completed_orders),
-                "in_progress": len(in_progress_orders)
-            },
-            "revenue": {
-                "total": 0,  # TODO: Implement revenue stats
-                "today": 0,
-                "this_month": 0
-            }
-        }
+        return await analytics_service.get_dashboard_stats()
         
     except Exception as e:
         logger.error(f"Error getting dashboard stats: {str(e)}")
@@ -65,15 +29,7 @@ async def get_dashboard_stats(current_user: User = Depends(get_manager_user)):
 async def get_user_stats_summary(current_user: User = Depends(get_manager_user)):
     """Get user statistics summary (Manager/Admin only)"""
     try:
-        # TODO: Implement user statistics with MongoDB
-        return {
-            "total_users": 0,
-            "regular_users": 0,
-            "admin_users": 0,
-            "active_users": 0,
-            "inactive_users": 0,
-            "note": "User statistics not yet implemented for MongoDB"
-        }
+        return await analytics_service.get_user_stats()
     except Exception as e:
         logger.error(f"Error getting user stats: {str(e)}")
         return {
@@ -89,14 +45,14 @@ async def get_user_stats_summary(current_user: User = Depends(get_manager_user))
 async def get_order_stats_summary(current_user: User = Depends(get_manager_user)):
     """Get order statistics summary (Manager/Admin only)"""
     try:
-        all_orders = await get_all_orders()
+        counts = await analytics_service.get_order_status_counts()
         
         return {
-            "total_orders": len(all_orders),
-            "pending_orders": len([order for order in all_orders if order.status == OrderStatus.PENDING]),
-            "in_progress_orders": len([order for order in all_orders if order.status == OrderStatus.IN_PROGRESS]),
-            "completed_orders": len([order for order in all_orders if order.status == OrderStatus.COMPLETED]),
-            "cancelled_orders": len([order for order in all_orders if order.status == OrderStatus.CANCELLED]),
+            "total_orders": sum(counts.values()),
+            "pending_orders": counts.get(OrderStatus.PENDING, 0),
+            "in_progress_orders": counts.get(OrderStatus.IN_PROGRESS, 0),
+            "completed_orders": counts.get(OrderStatus.COMPLETED, 0),
+            "cancelled_orders": counts.get(OrderStatus.CANCELLED, 0),
         }
     except Exception as e:
         logger.error(f"Error getting order stats: {str(e)}")
@@ -116,19 +72,14 @@ async def get_dashboard_analytics(current_user: User = Depends(get_manager_user)
 
 @router.get("/revenue")
 async def get_revenue_analytics(
-    period: str = Query("week", description="Period: day, week, month, year"),
+    period: str = Query("week", pattern="^(day|week|month|year)$", description="Period: day, week, month, year"),
     current_user: User = Depends(get_manager_user)
 ):
     """Get revenue analytics for specified period"""
     try:
-        # TODO: Implement actual revenue calculation from payments
-        return {
-            "period": period,
-            "total_revenue": 0,
-            "revenue_data": [],
-            "note": "Revenue analytics not yet implemented for MongoDB"
-        }
+        return await revenue_service.get_revenue(period)
     except Exception as e:
+        logger.error(f"Error getting revenue analytics: {str(e)}")
         return {
             "period": period,
             "total_revenue": 0,
@@ -138,18 +89,19 @@ async def get_revenue_analytics(
 
 @router.get("/orders")
 async def get_orders_analytics(
-    period: str = Query("week", description="Period: day, week, month, year"),
+    period: str = Query("week", pattern="^(day|week|month|year)$", description="Period: day, week, month, year"),
     current_user: User = Depends(get_manager_user)
 ):
     """Get orders analytics for specified period"""
     try:
-        from services.order_service import get_all_orders
-        orders = await get_all_orders()
+        counts = await analytics_service.get_order_status_counts(
+            since=analytics_service.period_start(period)
+        )
         
         # Basic order statistics
-        total_orders = len(orders)
-        completed_orders = len([o for o in orders if o.status == OrderStatus.COMPLETED])
-        pending_orders = len([o for o in orders if o.status == OrderStatus.PENDING])
+        total_orders = sum(counts.values())
+        completed_orders = counts.get(OrderStatus.COMPLETED, 0)
+        pending_orders = counts.get(OrderStatus.PENDING, 0)
         
         return {
             "period": period,
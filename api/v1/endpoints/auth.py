@@ -7,13 +7,13 @@ from services.auth_service import authenticate_user, authenticate_admin_user
 from schemas.auth import AdminLogin
 from schemas.user import UserResponse
 from models.mongo_models import User
-from utils.otp_service import generate_otp, send_otp_sms, save_otp, verify_otp as verify_otp_local, otp_store
+from utils.otp_service import queue_otp_sms
+from utils.otp_store import get_otp_store
 from services.auth_service import verify_otp as verify_otp_afromessage
-from core.security import get_password_hash
+from core.security import get_password_hash, create_access_token
 import logging
 import uuid
 
-import jwt
 from datetime import datetime, timedelta
 from core.config import settings
 
@@ -48,10 +48,9 @@ async def login(
         payload = {
             "user_id": str(user.id),
             "role": user.role,
-            "is_active": user.is_active,
-            "exp": datetime.utcnow() + timedelta(days=180)  # 6 months
+            "is_active": user.is_active
         }
-        token = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        token = create_access_token(payload, expires_delta=timedelta(days=180))  # 6 months
         response.set_cookie(
             key="access_token",
             value=token,
@@ -95,10 +94,9 @@ async def admin_login(admin_user: AdminLogin, response: Response = None) -> Any:
         payload = {
             "user_id": str(user.id),
             "role": user.role,
-            "is_active": user.is_active,
-            "exp": datetime.utcnow() + timedelta(days=180)  # 6 months
+            "is_active": user.is_active
         }
-        token = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        token = create_access_token(payload, expires_delta=timedelta(days=180))  # 6 months
         response.set_cookie(
             key="access_token",
             value=token,
@@ -144,20 +142,19 @@ async def request_otp(request_data: OTPRequest) -> Any:
     try:
         logger.info(f"📱 Requesting OTP for phone: {request_data.phone_number}")
         
-        # Send OTP via SMS (AfroMessage generates its own OTP)
-        sms_success = send_otp_sms(request_data.phone_number, "")  # Empty OTP since AfroMessage generates it
-        logger.info(f"SMS send result: {sms_success}")
-        
-        if sms_success:
-            logger.info(f"✅ OTP sent successfully to {request_data.phone_number} via AfroMessage")
+        # Queue the challenge (AfroMessage generates the OTP); the SMS outbox delivers it
+        if queue_otp_sms(request_data.phone_number):
+            logger.info(f"✅ OTP queued for {request_data.phone_number}")
             return {"message": "OTP sent successfully to your phone"}
         else:
-            logger.error(f"❌ Failed to send OTP to {request_data.phone_number}")
+            logger.error(f"❌ Could not queue OTP for {request_data.phone_number}")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to send OTP. Please try again."
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="SMS service is temporarily unavailable. Please try again."
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error requesting OTP for {request_data.phone_number}: {str(e)}")
         raise HTTPException(
@@ -212,10 +209,9 @@ async def verify_otp_login(request_data: OTPVerifyRequest, response: Response =
         payload = {
             "user_id": str(user.id),
             "role": user.role,
-            "is_active": user.is_active,
-            "exp": datetime.utcnow() + timedelta(days=180)  # 6 months
+            "is_active": user.is_active
         }
-        token = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        token = create_access_token(payload, expires_delta=timedelta(days=180))  # 6 months
         
         # Set cookie - 6 months duration
         response.set_cookie(
@@ -265,24 +261,17 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)) -
     )
 
 @router.get("/debug/otp-store")
-def debug_otp_store():
-    """Debug endpoint to check OTP store contents (remove in production)"""
+async def debug_otp_store():
+    """Debug endpoint to check OTP store contents (disabled in production)"""
+    if settings.IS_PRODUCTION:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
     import time
-    current_time = time.time()
-    store_info = {}
-    
-    for phone, data in otp_store.items():
-        time_since = current_time - data["timestamp"]
-        store_info[phone] = {
-            "otp": data["otp"],
-            "age_seconds": round(time_since, 2),
-            "expired": time_since > 300,
-            "timestamp": data["timestamp"]
-        }
+    store_info = await get_otp_store().snapshot()
     
     return {
-        "current_time": current_time,
-        "otp_expiry_seconds": 300,
+        "current_time": time.time(),
+        "otp_expiry_seconds": settings.OTP_TTL_SECONDS,
         "store_contents": store_info,
-        "total_entries": len(otp_store)
-    }
\ No newline at end of file
+        "total_entries": len(store_info)
+    }
@@ -1,10 +1,19 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from api.deps import get_manager_user, get_admin_user
-from schemas.driver import DriverCreate, DriverUpdate, DriverResponse, DriverStatus, DriverApproval
-from models.mongo_models import User, Driver
+import json
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status as http_status
+from pydantic import ValidationError
+from api.deps import get_manager_user, get_admin_user, get_websocket_user
+from schemas.driver import (
+    DriverCreate, DriverUpdate, DriverResponse, DriverStatus, DriverApproval,
+    DriverLocationPing, DriverLocationBatch
+)
+from models.mongo_models import User, Driver, UserRole
 from datetime import datetime
 from services.notification_service import notification_service
+from services.notification_broadcast import notification_broadcasts
+from schemas.notification import BroadcastTarget, NotificationCategory
+from services.driver_index import driver_index
+from services.location_ingest import location_ingest
 from bson import ObjectId
 
 router = APIRouter(redirect_slashes=False)
@@ -103,13 +112,12 @@ async def create_driver(
         await new_driver.insert()
         
         # Create notification for admins about new driver
-        await notification_service.create_notification(
-            user_id=str(current_user.id),
+        await notification_service.create_notifications_bulk(
+            notification_broadcasts.recipients(BroadcastTarget(roles=[UserRole.ADMIN, UserRole.MANAGER])),
             title="New Driver Registration",
             message=f"New driver {new_driver.full_name} has registered and needs approval",
-            type="INFO",
-            category="DRIVER",
-            reference_id=str(new_driver.id)
+            notification_type=NotificationCategory.DRIVER.value,
+            data={"driver_id": str(new_driver.id)}
         )
         
         return DriverResponse(
@@ -153,6 +161,7 @@ async def update_driver(
                 setattr(existing_driver, field, value)
         
         await existing_driver.save()
+        driver_index.upsert(existing_driver)
         
         # Create notification for status changes
         if 'status' in update_data and update_data['status'] != old_status:
@@ -160,9 +169,8 @@ async def update_driver(
                 user_id=str(current_user.id),
                 title="Driver Status Updated",
                 message=f"Driver {existing_driver.full_name}'s status changed to {update_data['status']}",
-                type="INFO",
-                category="DRIVER",
-                reference_id=str(driver_id)
+                notification_type=NotificationCategory.DRIVER.value,
+                data={"driver_id": str(driver_id)}
             )
         
         return DriverResponse(
@@ -256,4 +264,56 @@ async def get_available_drivers(
         return driver_responses
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching available drivers: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching available drivers: {str(e)}") 
+
+@router.post("/locations/batch")
+async def ingest_driver_locations(
+    batch: DriverLocationBatch,
+    current_user: User = Depends(get_manager_user)
+):
+    """Accept a batch of driver GPS pings; positions are coalesced and written periodically (Manager/Admin only)"""
+    accepted = 0
+    for ping in batch.pings:
+        if location_ingest.submit(ping.driver_id, ping.latitude, ping.longitude, ping.timestamp):
+            accepted += 1
+    return {"accepted": accepted, "rejected": len(batch.pings) - accepted}
+
+@router.websocket("/locations/ws")
+async def driver_location_stream(websocket: WebSocket):
+    """
+    Stream driver GPS pings. Each message is a ping object
+    {"driver_id", "latitude", "longitude", "timestamp"?} or a list of them.
+    Authenticate with the access_token cookie or a ?token= query parameter
+    of a manager or admin, as for the other driver endpoints.
+    """
+    user = await get_websocket_user(websocket)
+    if not user or not user.has_admin_access:
+        await websocket.close(code=http_status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                await websocket.send_json({"error": "Invalid JSON"})
+                continue
+
+            pings = message if isinstance(message, list) else [message]
+            rejected = 0
+            for item in pings:
+                try:
+                    ping = DriverLocationPing.model_validate(item)
+                except ValidationError:
+                    rejected += 1
+                    continue
+                if not location_ingest.submit(ping.driver_id, ping.latitude, ping.longitude, ping.timestamp):
+                    rejected += 1
+
+            # Stay quiet on success to keep the per-ping cost low
+            if rejected:
+                await websocket.send_json({"error": "Invalid pings rejected", "rejected": rejected})
+    except WebSocketDisconnect:
+        pass
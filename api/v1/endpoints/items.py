@@ -1,118 +1,68 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Form, Request, Response
+from bson import ObjectId
 from api.deps import get_admin_user, get_manager_user
 from models.mongo_models import User
-from datetime import datetime
-import json
 from models.mongo_models import Item
+from services.item_catalog import item_catalog
+from core.config import settings
+from core.responses import ORJSONResponse
 
 router = APIRouter(redirect_slashes=False)
 
-# In-memory storage for items (in a real app, this would be a database table)
-ITEMS_STORAGE = [
-    {
-        "id": 1,
-        "name": "Wash & Fold",
-        "description": "Basic washing and folding service",
-        "price": 150.0,
-        "currency": "ETB",
-        "category": "Basic",
-        "is_active": True,
-        "estimated_time": "24 hours",
-        "created_at": "2024-01-01T00:00:00",
-        "updated_at": "2024-01-01T00:00:00"
-    },
-    {
-        "id": 2,
-        "name": "Dry Clean",
-        "description": "Professional dry cleaning service",
-        "price": 300.0,
-        "currency": "ETB",
-        "category": "Premium",
-        "is_active": True,
-        "estimated_time": "48 hours",
-        "created_at": "2024-01-01T00:00:00",
-        "updated_at": "2024-01-01T00:00:00"
-    },
-    {
-        "id": 3,
-        "name": "Iron & Press",
-        "description": "Professional ironing and pressing service",
-        "price": 200.0,
-        "currency": "ETB",
-        "category": "Premium",
-        "is_active": True,
-        "estimated_time": "24 hours",
-        "created_at": "2024-01-01T00:00:00",
-        "updated_at": "2024-01-01T00:00:00"
-    },
-    {
-        "id": 4,
-        "name": "Express Service",
-        "description": "Same day service for urgent orders",
-        "price": 500.0,
-        "currency": "ETB",
-        "category": "Express",
-        "is_active": True,
-        "estimated_time": "6 hours",
-        "created_at": "2024-01-01T00:00:00",
-        "updated_at": "2024-01-01T00:00:00"
-    }
-]
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+async def _get_item_document(item_id: str) -> Item:
+    item = await Item.get(item_id) if ObjectId.is_valid(item_id) else None
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return item
 
 @router.get("/public", response_model=List[dict])
-def get_public_items(
+async def get_public_items(
+    request: Request,
     category: Optional[str] = Query(None, description="Filter by category"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000)
 ):
     """Get active items/services for customers (public access)"""
-    items = [item for item in ITEMS_STORAGE if item["is_active"]]
-    
-    # Apply filters
-    if category:
-        items = [item for item in items if item["category"] == category]
-    
-    # Apply pagination
-    items = items[skip:skip + limit]
-    
-    return items
+    etag, body = await item_catalog.public_page(category, skip, limit)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.ITEM_CATALOG_MAX_AGE_SECONDS}"
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.get("/", response_model=List[dict])
-def get_all_items(current_user: User = Depends(get_manager_user),
+async def get_all_items(current_user: User = Depends(get_manager_user),
     category: Optional[str] = Query(None, description="Filter by category"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000)
 ):
     """Get all items/services (Manager/Admin only)"""
-    items = ITEMS_STORAGE.copy()
-    
-    # Apply filters
-    if category:
-        items = [item for item in items if item["category"] == category]
-    
-    if is_active is not None:
-        items = [item for item in items if item["is_active"] == is_active]
-    
-    # Apply pagination
-    items = items[skip:skip + limit]
-    
-    return items
+    items = await item_catalog.list_items(category=category, is_active=is_active)
+    return ORJSONResponse(items[skip:skip + limit])
 
 @router.get("/{item_id}", response_model=dict)
-def get_item_by_id(
-    item_id: int,current_user: User = Depends(get_manager_user)
+async def get_item_by_id(
+    item_id: str,current_user: User = Depends(get_manager_user)
 ):
     """Get item/service by ID"""
-    item = next((item for item in ITEMS_STORAGE if item["id"] == item_id), None)
+    item = await item_catalog.get_item(item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    
-    return item
+
+    return ORJSONResponse(item)
 
 @router.post("/", response_model=dict)
-def create_item(
+async def create_item(
     name: str = Form(...),
     description: str = Form(...),
     price: float = Form(...),
@@ -122,39 +72,32 @@ def create_item(
     is_active: bool = Form(True),current_user: User = Depends(get_admin_user)
 ):
     """Create a new item/service (Admin only)"""
-    
+
     # Check if item name already exists
-    existing_item = next((item for item in ITEMS_STORAGE if item["name"].lower() == name.lower()), None)
-    if existing_item:
+    if await item_catalog.name_exists(name):
         raise HTTPException(status_code=400, detail="Item name already exists")
-    
-    # Generate new ID
-    new_id = max([item["id"] for item in ITEMS_STORAGE], default=0) + 1
-    
-    # Create new item
-    new_item = {
-        "id": new_id,
-        "name": name,
-        "description": description,
-        "price": price,
-        "currency": currency,
-        "category": category,
-        "is_active": is_active,
-        "estimated_time": estimated_time,
-        "created_at": datetime.utcnow().isoformat(),
-        "updated_at": datetime.utcnow().isoformat()
-    }
-    
-    ITEMS_STORAGE.append(new_item)
-    
-    return {
-        **new_item,
+
+    new_item = Item(
+        name=name,
+        description=description,
+        price=price,
+        currency=currency,
+        category=category,
+        is_active=is_active,
+        estimated_time=estimated_time
+    )
+    await new_item.insert()
+    await item_catalog.invalidate()
+
+    return ORJSONResponse({
+        **new_item.model_dump(exclude={"id"}),
+        "id": str(new_item.id),
         "message": "Item created successfully"
-    }
+    })
 
 @router.put("/{item_id}", response_model=dict)
-def update_item(
-    item_id: int,
+async def update_item(
+    item_id: str,
     name: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
     price: Optional[float] = Form(None),
@@ -164,63 +107,57 @@ def update_item(
     is_active: Optional[bool] = Form(None),current_user: User = Depends(get_admin_user)
 ):
     """Update item/service (Admin only)"""
-    
-    item_index = next((i for i, item in enumerate(ITEMS_STORAGE) if item["id"] == item_id), None)
-    if item_index is None:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
+
+    item = await _get_item_document(item_id)
+
     # Check if new name already exists (if being updated)
-    if name and name.lower() != ITEMS_STORAGE[item_index]["name"].lower():
-        existing_item = next((item for item in ITEMS_STORAGE if item["name"].lower() == name.lower()), None)
-        if existing_item:
+    if name and name.lower() != item.name.lower():
+        if await item_catalog.name_exists(name, exclude_id=item_id):
             raise HTTPException(status_code=400, detail="Item name already exists")
-    
+
     # Update fields
-    if name is not None:
-        ITEMS_STORAGE[item_index]["name"] = name
-    if description is not None:
-        ITEMS_STORAGE[item_index]["description"] = description
-    if price is not None:
-        ITEMS_STORAGE[item_index]["price"] = price
-    if currency is not None:
-        ITEMS_STORAGE[item_index]["currency"] = currency
-    if category is not None:
-        ITEMS_STORAGE[item_index]["category"] = category
-    if estimated_time is not None:
-        ITEMS_STORAGE[item_index]["estimated_time"] = estimated_time
-    if is_active is not None:
-        ITEMS_STORAGE[item_index]["is_active"] = is_active
-    
-    ITEMS_STORAGE[item_index]["updated_at"] = datetime.utcnow().isoformat()
-    
-    return {
-        **ITEMS_STORAGE[item_index],
-        "message": "Item updated successfully"
+    updates = {
+        "name": name,
+        "description": description,
+        "price": price,
+        "currency": currency,
+        "category": category,
+        "estimated_time": estimated_time,
+        "is_active": is_active
     }
+    for field, value in updates.items():
+        if value is not None:
+            setattr(item, field, value)
+
+    await item.save()
+    await item_catalog.invalidate()
+
+    return ORJSONResponse({
+        **item.model_dump(exclude={"id"}),
+        "id": str(item.id),
+        "message": "Item updated successfully"
+    })
 
 @router.delete("/{item_id}")
-def delete_item(
-    item_id: int,current_user: User = Depends(get_admin_user)
+async def delete_item(
+    item_id: str,current_user: User = Depends(get_admin_user)
 ):
     """Delete item/service (Admin only)"""
-    item_index = next((i for i, item in enumerate(ITEMS_STORAGE) if item["id"] == item_id), None)
-    if item_index is None:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    deleted_item = ITEMS_STORAGE.pop(item_index)
-    
-    return {
+    item = await _get_item_document(item_id)
+
+    await item.delete()
+    await item_catalog.invalidate()
+
+    return ORJSONResponse({
         "message": "Item deleted successfully",
-        "deleted_item": deleted_item
-    }
+        "deleted_item": {**item.model_dump(exclude={"id"}), "id": item_id}
+    })
 
 @router.get("/categories/list")
 async def get_categories(current_user: User = Depends(get_manager_user)):
     """Get all item categories"""
     try:
-        # Get unique categories from items
-        categories = await Item.distinct("category")
-        return {"categories": categories}
+        return {"categories": await item_catalog.categories()}
     except Exception as e:
         return {"categories": ["Electronics", "Clothing", "Home", "Books", "Sports"], "note": "Default categories"}
 
@@ -228,24 +165,7 @@ async def get_categories(current_user: User = Depends(get_manager_user)):
 async def get_items_stats(current_user: User = Depends(get_manager_user)):
     """Get items statistics summary"""
     try:
-        all_items = await Item.find({}).to_list()
-        
-        total_items = len(all_items)
-        active_items = len([item for item in all_items if item.is_active])
-        inactive_items = total_items - active_items
-        
-        # Get category breakdown
-        categories = {}
-        for item in all_items:
-            category = item.category
-            categories[category] = categories.get(category, 0) + 1
-        
-        return {
-            "total_items": total_items,
-            "active_items": active_items,
-            "inactive_items": inactive_items,
-            "categories": categories
-        }
+        return await item_catalog.stats()
     except Exception as e:
         return {
             "total_items": 0,
@@ -253,4 +173,4 @@ async def get_items_stats(current_user: User = Depends(get_manager_user)):
             "inactive_items": 0,
             "categories": {},
             "error": str(e)
-        } 
\ No newline at end of file
+        }
@@ -1,17 +1,26 @@
+import asyncio
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from api.deps import get_current_active_user
-from schemas.notification import NotificationResponse, NotificationUpdate
-from services.notification_service import notification_service
-from models.mongo_models import User
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status as http_status
+from fastapi.responses import StreamingResponse
+from api.deps import get_current_active_user, get_manager_user, get_websocket_user
+from schemas.notification import NotificationResponse, NotificationUpdate, NotificationBroadcast
+from services.notification_service import notification_service, notification_payload
+from services.notification_broker import notification_broker
+from services.notification_broadcast import notification_broadcasts
+from core.config import settings
+from models.mongo_models import User, NotificationBroadcastJob
+from core.responses import ORJSONResponse
+from utils.pagination import next_cursor
 
 router = APIRouter(redirect_slashes=False)
 
 @router.get("/")
 async def get_notifications(
     unread_only: Optional[bool] = Query(False, description="Get only unread notifications"),
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Legacy offset; ignored when cursor is given"),
     limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user notifications"""
@@ -20,26 +29,68 @@ async def get_notifications(
             user_id=str(current_user.id),
             skip=skip,
             limit=limit,
-            unread_only=unread_only
+            unread_only=unread_only,
+            cursor=cursor
         )
         
-        notification_list = []
-        for notification in notifications:
-            notification_list.append({
-                "id": str(notification.id),
-                "user_id": str(notification.user_id),
-                "title": notification.title,
-                "message": notification.message,
-                "type": notification.type,
-                "is_read": notification.is_read,
-                "data": notification.data,
-                "created_at": notification.created_at
-            })
+        notification_list = [notification_payload(notification) for notification in notifications]
         
-        return {"notifications": notification_list}
+        return ORJSONResponse({"notifications": notification_list, "next_cursor": next_cursor(notifications, limit)})
         
+    except HTTPException:
+        raise
     except Exception as e:
-        return {"notifications": [], "error": str(e)}
+        return {"notifications": [], "next_cursor": None, "error": str(e)}
+
+@router.websocket("/ws")
+async def notification_socket(websocket: WebSocket):
+    """
+    Push channel: each new notification arrives as
+    {"event": "notification", "data": {...}} as soon as it is created.
+    Authenticate with the access_token cookie or a ?token= query parameter.
+    """
+    user = await get_websocket_user(websocket)
+    if not user:
+        await websocket.close(code=http_status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    async with notification_broker.connect(str(user.id)) as queue:
+        async def forward():
+            while True:
+                await websocket.send_text(await queue.get())
+
+        sender = asyncio.create_task(forward())
+        try:
+            # Incoming messages are ignored; receiving detects the disconnect
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+
+@router.get("/stream")
+async def notification_stream(request: Request, current_user: User = Depends(get_current_active_user)):
+    """Server-Sent Events push channel; same events as /ws, plus periodic heartbeat comments"""
+    user_id = str(current_user.id)
+
+    async def events():
+        async with notification_broker.connect(user_id) as queue:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: notification\ndata: {message}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/unread-count")
 async def get_unread_count(current_user: User = Depends(get_current_active_user)):
@@ -53,6 +104,58 @@ async def get_unread_count(current_user: User = Depends(get_current_active_user)
     except Exception as e:
         return {"unread_count": 0, "error": str(e)}
 
+def _broadcast_job_response(job: NotificationBroadcastJob) -> dict:
+    elapsed = ((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds() if job.started_at else 0.0
+    return {
+        "id": str(job.id),
+        "title": job.title,
+        "type": job.type,
+        "target": job.target,
+        "status": job.status,
+        "recipients": job.recipients,
+        "sent": job.sent,
+        "failed": job.failed,
+        "per_second": round(job.sent / elapsed, 1) if elapsed > 0 else 0.0,
+        "error": job.error,
+        "created_by": str(job.created_by),
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+@router.post("/broadcast", status_code=http_status.HTTP_202_ACCEPTED)
+async def broadcast_notification(
+    broadcast: NotificationBroadcast,
+    current_user: User = Depends(get_manager_user)
+):
+    """Send a notification to every user matching the target filters in the background (Manager/Admin only)"""
+    target = broadcast.target
+    if not notification_broadcasts.has_filters(target):
+        raise HTTPException(status_code=400, detail="At least one target filter is required")
+    if target.radius_km and (target.latitude is None or target.longitude is None):
+        raise HTTPException(status_code=400, detail="latitude and longitude are required with radius_km")
+
+    job = await notification_broadcasts.start_broadcast(broadcast, current_user)
+    return _broadcast_job_response(job)
+
+@router.get("/broadcast")
+async def get_broadcast_jobs(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_manager_user)
+):
+    """Get recent broadcasts and their progress (Manager/Admin only)"""
+    jobs = await notification_broadcasts.list_jobs(skip=skip, limit=limit)
+    return {"jobs": [_broadcast_job_response(job) for job in jobs]}
+
+@router.get("/broadcast/{job_id}")
+async def get_broadcast_job(job_id: str, current_user: User = Depends(get_manager_user)):
+    """Get a broadcast's progress: recipients, sent, failed and throughput (Manager/Admin only)"""
+    job = await notification_broadcasts.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return _broadcast_job_response(job)
+
 @router.put("/{notification_id}/read")
 async def mark_notification_as_read(
     notification_id: str,
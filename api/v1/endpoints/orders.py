@@ -6,72 +6,43 @@ from models.mongo_models import User, UserRole, Order, OrderStatus
 from crud.mongo_order import order_mongo_crud
 from services.order_service import create_order_with_items
 from services.assignment_service import assignment_service
+from services.batch_assignment_service import batch_assignment_service
+from core.responses import ORJSONResponse
+from utils.pagination import next_cursor, set_next_cursor_header, NEXT_CURSOR_HEADER
 
 router = APIRouter(redirect_slashes=False)
 
-@router.post("/", response_model=OrderResponse)
-async def create_order(
-    order: OrderCreate,
-    current_user: User = Depends(get_current_active_user)
-):
-    """Create a new order with automatic provider assignment"""
-    if current_user.role == UserRole.USER:
-        order.user_id = str(current_user.id)
-    elif not order.user_id:
-        order.user_id = str(current_user.id)
-    
-    # Create the order
-    created_order = await create_order_with_items(order)
-    
-    # Convert to OrderResponse format
-    return OrderResponse(
-        id=str(created_order.id),
-        user_id=str(created_order.user_id),
-        driver_id=str(created_order.driver_id) if created_order.driver_id else None,
-        provider_id=str(created_order.service_provider_id) if created_order.service_provider_id else None,
-        status=created_order.status,
-        total_amount=created_order.subtotal,  # Map subtotal to total_amount
-        pickup_address=created_order.pickup_address or "",
-        delivery_address=created_order.delivery_address or "",
-        pickup_lat=created_order.pickup_latitude,
-        pickup_lng=created_order.pickup_longitude,
-        delivery_lat=created_order.delivery_latitude,
-        delivery_lng=created_order.delivery_longitude,
-        notes=created_order.note,
-        payment_method=created_order.payment_option,
-        cash_on_delivery=created_order.cash_on_delivery,
-        created_at=created_order.created_at,
-        updated_at=created_order.updated_at,
-        accepted_at=created_order.accepted_at,
-        picked_up_at=None,  # Order model doesn't have this field
-        completed_at=created_order.completed_at,
-        cancelled_at=None,  # Order model doesn't have this field
-        cancellation_reason=None,  # Order model doesn't have this field
-        items=[
-            OrderItemResponse(
-                id=i,  # Use index as ID since OrderItem doesn't have an ID field
-                product_id=item.product_id,
-                category_id=item.category_id,
-                quantity=item.quantity,
-                price=item.price,
-                service_type=item.service_type or ""
-            ) for i, item in enumerate(created_order.items)
-        ]
-    )
+def _to_order_summary(doc: dict) -> dict:
+    """Listing row built straight from a projected document"""
+    return {
+        "id": str(doc["_id"]),
+        "user_id": str(doc["user_id"]),
+        "driver_id": str(doc["driver_id"]) if doc.get("driver_id") else None,
+        "provider_id": str(doc["service_provider_id"]) if doc.get("service_provider_id") else None,
+        "status": doc.get("status"),
+        "service_type": doc.get("service_type"),
+        "total_amount": doc.get("subtotal", 0.0),
+        "pickup_address": doc.get("pickup_address") or "",
+        "delivery_address": doc.get("delivery_address") or "",
+        "item_count": doc.get("item_count", 0),
+        "created_at": doc["created_at"],
+        "updated_at": doc.get("updated_at")
+    }
 
-@router.get("/", response_model=List[OrderResponse])
-async def get_orders(
-    current_user: User = Depends(get_current_active_user),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
-):
-    """Get orders with role-based filtering"""
-    if current_user.role == UserRole.USER:
-        orders = await order_mongo_crud.get_by_user(str(current_user.id), skip=skip, limit=limit)
-    else:
-        orders = await order_mongo_crud.get_multi(skip=skip, limit=limit)
-    
-    return [OrderResponse(
+def _page_response(content: list, cursor: Optional[str]) -> ORJSONResponse:
+    # Rows are built from trusted documents; returning the response directly
+    # skips FastAPI's second validation against response_model
+    response = ORJSONResponse(content)
+    set_next_cursor_header(response, cursor)
+    return response
+
+async def _order_summary_page(user_id: Optional[str], skip: int, limit: int, cursor: Optional[str]) -> ORJSONResponse:
+    docs = await order_mongo_crud.get_summaries(user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+    return _page_response([_to_order_summary(doc) for doc in docs], next_cursor(docs, limit))
+
+def _to_order_response(order: Order) -> OrderResponse:
+    """Full listing/detail representation of an order, including its items"""
+    return OrderResponse(
         id=str(order.id),
         user_id=str(order.user_id),
         driver_id=str(order.driver_id) if order.driver_id else None,
@@ -104,50 +75,84 @@ async def get_orders(
                 service_type=item.service_type or ""
             ) for i, item in enumerate(order.items)
         ]
-    ) for order in orders]
+    )
+
+@router.post("/", response_model=OrderResponse)
+async def create_order(
+    order: OrderCreate,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create a new order with automatic provider assignment"""
+    if current_user.role == UserRole.USER:
+        order.user_id = str(current_user.id)
+    elif not order.user_id:
+        order.user_id = str(current_user.id)
+    
+    # Create the order
+    created_order = await create_order_with_items(order)
+    
+    # Convert to OrderResponse format
+    return _to_order_response(created_order)
+
+@router.get("/", response_model=List[OrderResponse])
+async def get_orders(
+    current_user: User = Depends(get_current_active_user),
+    skip: int = Query(0, ge=0, description="Legacy offset; ignored when cursor is given"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header"),
+    view: str = Query("full", pattern="^(full|summary)$", description="summary: listing fields only, no items")
+):
+    """Get orders with role-based filtering"""
+    if view == "summary":
+        user_id = str(current_user.id) if current_user.role == UserRole.USER else None
+        return await _order_summary_page(user_id, skip, limit, cursor)
+
+    if current_user.role == UserRole.USER:
+        orders = await order_mongo_crud.get_by_user(str(current_user.id), skip=skip, limit=limit, cursor=cursor)
+    else:
+        orders = await order_mongo_crud.get_multi(skip=skip, limit=limit, cursor=cursor)
+    
+    return _page_response(
+        [_to_order_response(order).model_dump() for order in orders],
+        next_cursor(orders, limit)
+    )
 
 @router.get("/my-orders", response_model=List[OrderResponse])
 async def get_my_orders(
     current_user: User = Depends(get_current_active_user),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    skip: int = Query(0, ge=0, description="Legacy offset; ignored when cursor is given"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header"),
+    view: str = Query("full", pattern="^(full|summary)$", description="summary: listing fields only, no items")
 ):
     """Get current user's orders"""
-    orders = await order_mongo_crud.get_by_user(str(current_user.id), skip=skip, limit=limit)
-    return [OrderResponse(
-        id=str(order.id),
-        user_id=str(order.user_id),
-        driver_id=str(order.driver_id) if order.driver_id else None,
-        provider_id=str(order.service_provider_id) if order.service_provider_id else None,
-        status=order.status,
-        total_amount=order.subtotal,  # Map subtotal to total_amount
-        pickup_address=order.pickup_address or "",
-        delivery_address=order.delivery_address or "",
-        pickup_lat=order.pickup_latitude,
-        pickup_lng=order.pickup_longitude,
-        delivery_lat=order.delivery_latitude,
-        delivery_lng=order.delivery_longitude,
-        notes=order.note,
-        payment_method=order.payment_option,
-        cash_on_delivery=order.cash_on_delivery,
-        created_at=order.created_at,
-        updated_at=order.updated_at,
-        accepted_at=order.accepted_at,
-        picked_up_at=None,  # Order model doesn't have this field
-        completed_at=order.completed_at,
-        cancelled_at=None,  # Order model doesn't have this field
-        cancellation_reason=None,  # Order model doesn't have this field
-        items=[
-            OrderItemResponse(
-                id=i,  # Use index as ID since OrderItem doesn't have an ID field
-                product_id=item.product_id,
-                category_id=item.category_id,
-                quantity=item.quantity,
-                price=item.price,
-                service_type=item.service_type or ""
-            ) for i, item in enumerate(order.items)
-        ]
-    ) for order in orders]
+    if view == "summary":
+        return await _order_summary_page(str(current_user.id), skip, limit, cursor)
+
+    orders = await order_mongo_crud.get_by_user(str(current_user.id), skip=skip, limit=limit, cursor=cursor)
+    return _page_response(
+        [_to_order_response(order).model_dump() for order in orders],
+        next_cursor(orders, limit)
+    )
+
+@router.post("/assignments/batch")
+async def run_batch_assignment(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10.0, gt=0, le=100),
+    max_orders: int = Query(500, ge=1, le=5000),
+    current_user: User = Depends(get_manager_user)
+):
+    """Match pending orders in an area to providers in one batch (Manager/Admin only)"""
+    try:
+        return await batch_assignment_service.assign_pending_orders(
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=radius_km,
+            max_orders=max_orders
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running batch assignment: {str(e)}")
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
@@ -1,13 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query
 from api.deps import get_current_active_user, get_manager_user
-from schemas.payment import PaymentInitiate, PaymentCallback, PaymentResponse, PaymentInitiateResponse, PaymentMethod
+from schemas.payment import PaymentInitiate, PaymentResponse, PaymentInitiateResponse, PaymentMethod
 from services.payment_service import payment_service
+from services.payment_callback_inbox import payment_callback_inbox
 from models.mongo_models import User
-from typing import List, Optional
-from models.mongo_models import Payment
+from typing import Any, Dict, List, Optional
+from models.mongo_models import Payment, CallbackEventStatus
 
 router = APIRouter(redirect_slashes=False)
 
+def _to_payment_response(payment: Payment) -> PaymentResponse:
+    return PaymentResponse(
+        id=str(payment.id),
+        order_id=str(payment.order_id),
+        user_id=str(payment.user_id),
+        amount=payment.amount,
+        currency=payment.currency,
+        payment_method=payment.payment_method,
+        status=payment.status,
+        external_transaction_id=payment.external_transaction_id,
+        gateway_reference=payment.gateway_reference,
+        created_at=payment.created_at,
+        updated_at=payment.updated_at,
+        completed_at=payment.completed_at
+    )
+
 @router.post("/initiate", response_model=PaymentInitiateResponse)
 async def initiate_payment(
     payment_data: PaymentInitiate,current_user: User = Depends(get_current_active_user)
@@ -15,7 +32,6 @@ async def initiate_payment(
     """Initiate payment with selected gateway"""
     try:
         result = await payment_service.initiate_payment(
-            db=db,
             order_id=payment_data.order_id,
             payment_method=payment_data.payment_method,
             user=current_user,
@@ -30,34 +46,40 @@ async def initiate_payment(
             payment_id=result.get("payment_id")
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/chapa/callback")
 async def chapa_callback(
-    callback_data: PaymentCallback):
-    """Handle Chapa payment callback"""
+    callback_data: Dict[str, Any] = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Store a Chapa payment callback; it is verified and applied in the background"""
     try:
-        result = await payment_service.handle_callback(
-            db=db,
-            callback_data=callback_data.dict(),
-            payment_method=PaymentMethod.CHAPA
+        event_id, duplicate = await payment_callback_inbox.ingest(
+            payment_method=PaymentMethod.CHAPA,
+            payload=callback_data,
+            idempotency_key=idempotency_key
         )
-        return result
+        return {"status": "received", "event_id": event_id, "duplicate": duplicate}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/telebirr/callback")
 async def telebirr_callback(
-    callback_data: PaymentCallback):
-    """Handle Telebirr payment callback"""
+    callback_data: Dict[str, Any] = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Store a Telebirr payment callback; it is verified and applied in the background"""
     try:
-        result = await payment_service.handle_callback(
-            db=db,
-            callback_data=callback_data.dict(),
-            payment_method=PaymentMethod.TELEBIRR
+        event_id, duplicate = await payment_callback_inbox.ingest(
+            payment_method=PaymentMethod.TELEBIRR,
+            payload=callback_data,
+            idempotency_key=idempotency_key
         )
-        return result
+        return {"status": "received", "event_id": event_id, "duplicate": duplicate}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -69,20 +91,21 @@ async def verify_payment(
     """Verify payment status"""
     try:
         result = await payment_service.verify_payment(
-            db=db,
             transaction_id=transaction_id,
             payment_method=payment_method
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/order/{order_id}", response_model=PaymentResponse)
-def get_order_payment(
-    order_id: int,current_user: User = Depends(get_current_active_user)
+async def get_order_payment(
+    order_id: str,current_user: User = Depends(get_current_active_user)
 ):
     """Get payment information for an order"""
-    payment = payment_service.get_payment_by_order(db, order_id)
+    payment = await payment_service.get_payment_by_order(order_id)
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
     
@@ -90,14 +113,17 @@ def get_order_payment(
     if payment.user_id != current_user.id and not current_user.has_admin_access:
         raise HTTPException(status_code=403, detail="Not authorized to view this payment")
     
-    return payment
+    return _to_payment_response(payment)
 
 @router.get("/my-payments", response_model=List[PaymentResponse])
-def get_my_payments(current_user: User = Depends(get_current_active_user)
+async def get_my_payments(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user)
 ):
     """Get current user's payment history"""
-    payments = payment_service.get_user_payments(db, current_user.id)
-    return payments
+    payments = await payment_service.get_user_payments(str(current_user.id), skip=skip, limit=limit)
+    return [_to_payment_response(payment) for payment in payments]
 
 @router.get("/methods")
 async def get_payment_methods(current_user: User = Depends(get_current_active_user)):
@@ -146,4 +172,42 @@ async def get_transactions(
         return {"transactions": transactions}
         
     except Exception as e:
-        return {"transactions": [], "error": str(e)}
\ No newline at end of file
+        return {"transactions": [], "error": str(e)}
+
+@router.get("/callbacks")
+async def get_callback_events(
+    status: Optional[CallbackEventStatus] = Query(None, description="Filter by event status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_manager_user)
+):
+    """Get received gateway callbacks and their processing state (Manager/Admin only)"""
+    events = await payment_callback_inbox.list_events(status=status, skip=skip, limit=limit)
+    return {
+        "events": [
+            {
+                "id": str(event.id),
+                "payment_method": event.payment_method,
+                "status": event.status,
+                "attempts": event.attempts,
+                "last_error": event.last_error,
+                "result": event.result,
+                "payload": event.payload,
+                "received_at": event.received_at,
+                "next_attempt_at": event.next_attempt_at,
+                "processed_at": event.processed_at
+            }
+            for event in events
+        ]
+    }
+
+@router.post("/callbacks/replay")
+async def replay_callback_events(
+    event_id: Optional[str] = Query(None, description="Replay one event; all failed events when omitted"),
+    current_user: User = Depends(get_manager_user)
+):
+    """Queue failed (or one specific) gateway callbacks for processing again (Manager/Admin only)"""
+    replayed = await payment_callback_inbox.replay(event_id)
+    if event_id and not replayed:
+        raise HTTPException(status_code=404, detail="Callback event not found or being processed")
+    return {"replayed": replayed}
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from api.deps import (
     get_current_active_user, get_admin_user, 
@@ -7,6 +7,9 @@ from api.deps import (
 from schemas.users_schema import UserResponse, UserUpdate
 from models.mongo_models import User, UserRole
 from crud.mongo_user import user_mongo_crud
+from services.user_cache import user_cache
+from core.responses import model_list_response
+from utils.pagination import next_cursor, set_next_cursor_header, NEXT_CURSOR_HEADER
 
 router = APIRouter(redirect_slashes=False)
 
@@ -14,23 +17,23 @@ router = APIRouter(redirect_slashes=False)
 async def get_all_users(
     current_user: User = Depends(get_manager_user),  # Manager or Admin access
     role: UserRole = Query(None, description="Filter by user role"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    skip: int = Query(0, ge=0, description="Legacy offset; ignored when cursor is given"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header")
 ):
     """Get all users (Manager/Admin only) with optional role filtering"""
-    if role:
-        users = await User.find(User.role == role).skip(skip).limit(limit).to_list()
-    else:
-        users = await User.find_all().skip(skip).limit(limit).to_list()
+    users = await user_mongo_crud.get_multi(skip=skip, limit=limit, cursor=cursor, role=role)
     
-    return [UserResponse(
+    response = model_list_response([UserResponse(
         id=str(user.id),
         full_name=user.full_name,
         phone=user.phone_number,
         email=user.email,
         role=user.role,
         is_active=user.is_active
-    ) for user in users]
+    ) for user in users])
+    set_next_cursor_header(response, next_cursor(users, limit))
+    return response
 
 @router.get("/regular-users", response_model=List[UserResponse])
 async def get_regular_users(
@@ -124,6 +127,7 @@ async def update_user_role(
     
     user.role = new_role
     await user.save()
+    await user_cache.invalidate(user.id)
     
     return UserResponse(
         id=str(user.id),
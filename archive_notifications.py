@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Notification Archival Script
+Moves read notifications older than NOTIFICATION_ARCHIVE_AFTER_DAYS into
+notifications_archive. The application does this periodically; run it by
+hand for the first pass after deploying, with --backfill-expiry to also
+apply the retention policy to read notifications created before it
+existed. Unread notifications past NOTIFICATION_UNREAD_RETENTION_DAYS are
+deleted and their users' unread counters adjusted.
+"""
+
+import argparse
+import asyncio
+import logging
+from database import init_db, close_mongo_connection
+from services.notification_archive import notification_archive
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def main():
+    """Connect, optionally backfill expires_at, and archive"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backfill-expiry", action="store_true", help="set expires_at on read notifications without one")
+    args = parser.parse_args()
+
+    print("🗄️  WashLink Notification Archival")
+    print("=" * 50)
+
+    # init_db also replaces the old expires_at index with the read-only TTL index
+    await init_db()
+    try:
+        if args.backfill_expiry:
+            updated = await notification_archive.backfill_expiry()
+            logger.info(f"Notifications given an expiry: {updated}")
+        expired = await notification_archive.expire_unread()
+        logger.info(f"Old unread notifications deleted: {expired['deleted']}")
+        result = await notification_archive.archive()
+        logger.info(f"Batches: {result['batches']}")
+        logger.info(f"Notifications archived: {result['archived']}")
+        print("\n✅ Archival completed successfully!")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
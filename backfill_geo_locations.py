@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+GeoJSON Location Backfill Script
+Populates the `location` field used by the 2dsphere indexes on
+service providers and drivers created before the field existed.
+"""
+
+import asyncio
+import logging
+from database import init_db, close_mongo_connection
+from services.location_service import location_service
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def main():
+    """Connect, build indexes and backfill locations"""
+    print("🌍 WashLink GeoJSON Location Backfill")
+    print("=" * 50)
+
+    # init_beanie creates the 2dsphere indexes if they are missing
+    await init_db()
+    try:
+        result = await location_service.backfill_locations()
+        logger.info(f"Service providers updated: {result['service_providers']}")
+        logger.info(f"Drivers updated: {result['drivers']}")
+        print("\n✅ Backfill completed successfully!")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
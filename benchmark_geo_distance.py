@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for utils.geo_distance.
+
+Compares the scalar haversine loop (the old LocationService.calculate_distance
+per candidate) with the vectorized haversine and equirectangular modes at
+100, 10k and 100k candidates around Addis Ababa, and reports the largest
+relative error of the equirectangular approximation.
+
+Usage: python benchmark_geo_distance.py
+"""
+
+import random
+import time
+
+from utils.geo_distance import (
+    HAS_NUMPY, HAVERSINE, EQUIRECTANGULAR,
+    haversine_km, distances_km
+)
+
+CENTER = (9.0054, 38.7636)
+SPREAD_DEG = 0.2  # roughly +/- 22 km
+
+def timed(func, repeat: int = 5) -> float:
+    """Best wall time of `repeat` runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    print(f"NumPy available: {HAS_NUMPY}")
+    print(f"{'candidates':>10} {'scalar ms':>10} {'haversine ms':>13} {'equirect ms':>12} {'max rel err':>12}")
+
+    random.seed(42)
+    lat, lng = CENTER
+    for n in (100, 10_000, 100_000):
+        lats = [lat + random.uniform(-SPREAD_DEG, SPREAD_DEG) for _ in range(n)]
+        lngs = [lng + random.uniform(-SPREAD_DEG, SPREAD_DEG) for _ in range(n)]
+
+        scalar = timed(lambda: [haversine_km(lat, lng, a, b) for a, b in zip(lats, lngs)])
+        vector = timed(lambda: distances_km(lat, lng, lats, lngs, mode=HAVERSINE))
+        approx = timed(lambda: distances_km(lat, lng, lats, lngs, mode=EQUIRECTANGULAR))
+
+        exact = distances_km(lat, lng, lats, lngs, mode=HAVERSINE)
+        fast = distances_km(lat, lng, lats, lngs, mode=EQUIRECTANGULAR)
+        max_error = max(abs(f - e) / e for f, e in zip(fast, exact) if e > 0)
+
+        print(f"{n:>10} {scalar:>10.2f} {vector:>13.2f} {approx:>12.2f} {max_error:>12.2e}")
+
+if __name__ == "__main__":
+    main()
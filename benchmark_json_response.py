@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+JSON response benchmark for a 1000-order listing.
+
+Serves the same 1000 OrderResponse objects from two minimal apps and reports
+CPU time per request:
+- default: response_model=List[OrderResponse] with FastAPI's JSONResponse,
+  so the models are validated again and rendered with the stdlib encoder
+- orjson: the endpoint returns core.responses.ORJSONResponse directly, as the
+  hot listing endpoints do
+
+No database is needed.
+
+Usage: python benchmark_json_response.py [--orders 1000] [--requests 200]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import List
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from schemas.order import OrderResponse, OrderItemResponse
+from core.responses import ORJSONResponse, model_list_response
+
+def build_orders(count: int) -> List[OrderResponse]:
+    now = datetime.utcnow()
+    return [
+        OrderResponse(
+            id=str(ObjectId()),
+            user_id=str(ObjectId()),
+            provider_id=str(ObjectId()),
+            status="pending",
+            total_amount=120.0 + i,
+            pickup_address="Bole, Addis Ababa",
+            delivery_address="Kazanchis, Addis Ababa",
+            pickup_lat=9.0054,
+            pickup_lng=38.7636,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+            items=[
+                OrderItemResponse(id=n, product_id=str(ObjectId()), category_id=1,
+                                  quantity=2, price=35.0, service_type="Machine Wash")
+                for n in range(3)
+            ]
+        )
+        for i in range(count)
+    ]
+
+def build_apps(orders: List[OrderResponse]):
+    default_app = FastAPI()
+    orjson_app = FastAPI(default_response_class=ORJSONResponse)
+
+    @default_app.get("/orders", response_model=List[OrderResponse])
+    def default_listing():
+        return orders
+
+    @orjson_app.get("/orders", response_model=List[OrderResponse])
+    def orjson_listing():
+        return model_list_response(orders)
+
+    return default_app, orjson_app
+
+def measure(client: TestClient, requests: int) -> float:
+    """CPU milliseconds per request (client and server share the process)"""
+    client.get("/orders")  # warm up
+    started = time.process_time()
+    for _ in range(requests):
+        response = client.get("/orders")
+        response.raise_for_status()
+    return (time.process_time() - started) * 1000 / requests
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    default_app, orjson_app = build_apps(build_orders(args.orders))
+    with TestClient(default_app) as default_client, TestClient(orjson_app) as orjson_client:
+        default_ms = measure(default_client, args.requests)
+        orjson_ms = measure(orjson_client, args.requests)
+
+    print(f"{args.orders}-order listing, {args.requests} requests")
+    print(f"default: {default_ms:7.2f} ms CPU/request")
+    print(f"orjson:  {orjson_ms:7.2f} ms CPU/request")
+    print(f"saved:   {default_ms - orjson_ms:7.2f} ms CPU/request ({(1 - orjson_ms / default_ms) * 100:.0f}%)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Order listing benchmark: full vs summary view.
+
+Seeds orders for a throwaway user, then times the two code paths behind
+GET /api/v1/orders/my-orders:
+- full: Beanie documents converted to OrderResponse (what ?view=full does)
+- summary: Motor projection rendered to plain dicts (what ?view=summary does)
+Response serialization is included for both. Seeded orders are removed at
+the end.
+
+Usage: python benchmark_order_listing.py [--orders 500] [--items 5] [--limit 100] [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from database import init_db, close_mongo_connection
+from models.mongo_models import Order, OrderItem
+from crud.mongo_order import order_mongo_crud
+from core.responses import ORJSONResponse
+from api.v1.endpoints.orders import _to_order_response, _to_order_summary
+
+async def seed(user_id: ObjectId, orders: int, items: int):
+    now = datetime.utcnow()
+    await Order.insert_many([
+        Order(
+            user_id=user_id,
+            subtotal=120.0 + i,
+            pickup_address="Bole, Addis Ababa",
+            delivery_address="Kazanchis, Addis Ababa",
+            pickup_latitude=9.0054,
+            pickup_longitude=38.7636,
+            created_at=now - timedelta(seconds=i),
+            items=[
+                OrderItem(product_id=str(ObjectId()), category_id=1, quantity=2, price=35.0, service_type="Machine Wash")
+                for _ in range(items)
+            ]
+        )
+        for i in range(orders)
+    ])
+
+async def time_path(label: str, render, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await render()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:>8}: {best * 1000:8.2f} ms (best of {rounds})")
+    return best
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    await init_db()
+    user_id = ObjectId()
+    try:
+        await seed(user_id, args.orders, args.items)
+        print(f"Seeded {args.orders} orders with {args.items} items each; page size {args.limit}")
+
+        async def full():
+            orders = await order_mongo_crud.get_by_user(str(user_id), limit=args.limit)
+            return ORJSONResponse([_to_order_response(o).model_dump() for o in orders]).body
+
+        async def summary():
+            docs = await order_mongo_crud.get_summaries(user_id=str(user_id), limit=args.limit)
+            return ORJSONResponse([_to_order_summary(d) for d in docs]).body
+
+        full_time = await time_path("full", full, args.rounds)
+        summary_time = await time_path("summary", summary, args.rounds)
+        print(f"Speedup: {full_time / summary_time:.1f}x")
+    finally:
+        await Order.get_motor_collection().delete_many({"user_id": user_id})
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
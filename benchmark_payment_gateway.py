@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Payment gateway HTTP client benchmark.
+
+Runs a local mock Chapa server (HTTPS with a throwaway self-signed cert
+unless --plain) and times ChapaPaymentGateway initiate + verify round trips:
+- per-call: a new httpx.AsyncClient for every request, as before
+- pooled: one keep-alive client injected into the gateway, as in the app
+
+--rtt-ms delays every new connection on the server side to stand in for the
+extra TCP/TLS round trips of a real network; on loopback the difference is
+mostly handshake CPU.
+
+Usage: python benchmark_payment_gateway.py [--payments 200] [--rtt-ms 0] [--plain]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+from services.payment_gateways.chapa import ChapaPaymentGateway
+
+class MockChapaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are written separately
+    connect_delay = 0.0
+
+    def setup(self):
+        super().setup()
+        if self.connect_delay:
+            time.sleep(self.connect_delay)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self._reply({"status": "success", "data": {"checkout_url": f"https://checkout.chapa.co/{body.get('tx_ref')}"}})
+
+    def do_GET(self):
+        tx_ref = self.path.rsplit("/", 1)[-1]
+        self._reply({"status": "success", "data": {
+            "status": "success", "amount": 150.0, "currency": "ETB",
+            "reference": f"ref_{tx_ref}", "tx_ref": tx_ref
+        }})
+
+    def _reply(self, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def self_signed_context(directory: str) -> ssl.SSLContext:
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+        check=True, capture_output=True
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+async def one_payment(gateway: ChapaPaymentGateway, order_id: int):
+    initiated = await gateway.initiate_payment(150.0, order_id, return_url="https://washlink.test")
+    verified = await gateway.verify_payment(initiated["transaction_reference"])
+    assert verified["payment_status"] == "success"
+
+async def run(base_url: str, payments: int, pooled: bool) -> float:
+    """Milliseconds per payment (initiate + verify)"""
+    options = {**ChapaPaymentGateway("").client_options(), "verify": False}
+    started = time.perf_counter()
+    if pooled:
+        async with httpx.AsyncClient(**options) as client:
+            gateway = ChapaPaymentGateway("sk_test", base_url=base_url, http_client=client)
+            for i in range(payments):
+                await one_payment(gateway, i)
+    else:
+        for i in range(payments):
+            async with httpx.AsyncClient(**options) as client:
+                await one_payment(ChapaPaymentGateway("sk_test", base_url=base_url, http_client=client), i)
+    return (time.perf_counter() - started) * 1000 / payments
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    parser.add_argument("--plain", action="store_true", help="plain HTTP instead of HTTPS")
+    args = parser.parse_args()
+
+    MockChapaHandler.connect_delay = args.rtt_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockChapaHandler)
+    with tempfile.TemporaryDirectory() as directory:
+        scheme = "http"
+        if not args.plain:
+            server.socket = self_signed_context(directory).wrap_socket(server.socket, server_side=True)
+            scheme = "https"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"{scheme}://127.0.0.1:{server.server_address[1]}/v1"
+
+        await run(base_url, 5, pooled=True)  # warm up
+        per_call = await run(base_url, args.payments, pooled=False)
+        pooled = await run(base_url, args.payments, pooled=True)
+        server.shutdown()
+
+    print(f"{args.payments} payments against a mock Chapa over {scheme.upper()}, connect delay {args.rtt_ms:.1f} ms")
+    print(f"per-call client: {per_call:7.2f} ms/payment")
+    print(f"pooled client:   {pooled:7.2f} ms/payment")
+    print(f"saved:           {per_call - pooled:7.2f} ms/payment ({per_call / pooled:.1f}x)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
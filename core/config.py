@@ -15,6 +15,7 @@ class Settings(BaseSettings):
     # Redis settings
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
+    REDIS_ENABLED: bool = False  # shared caches / pub-sub across workers
     # CORS settings
     CORS_ORIGINS: list = [
         # Web Applications
@@ -40,11 +41,49 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 180  # 6 months
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # decoded tokens kept in memory
+    # Order assignment
+    ASSIGNMENT_MAX_ATTEMPTS: int = 3
+    ASSIGNMENT_RADIUS_INCREMENT_KM: float = 2.0
+    ASSIGNMENT_CANDIDATE_LIMIT: int = 5
+    # Provider ranking weights (lower score wins; each term is normalized to 0..1)
+    ASSIGNMENT_WEIGHT_DISTANCE: float = 0.5
+    ASSIGNMENT_WEIGHT_RATING: float = 0.25
+    ASSIGNMENT_WEIGHT_LOAD: float = 0.15
+    ASSIGNMENT_WEIGHT_COMPLETION_TIME: float = 0.1
+    ASSIGNMENT_COMPLETION_TIME_SCALE_HOURS: float = 72.0
+    # Background assignment workers
+    ASSIGNMENT_WORKER_COUNT: int = 4
+    ASSIGNMENT_MAX_RETRIES: int = 3
+    ASSIGNMENT_RETRY_BACKOFF_SECONDS: float = 5.0
+    # In-memory driver location index
+    DRIVER_INDEX_CELL_SIZE_DEG: float = 0.02  # ~2.2km grid cells
+    DRIVER_INDEX_RECONCILE_SECONDS: int = 60
+    DRIVER_LOCATION_STALE_SECONDS: int = 300
+    DRIVER_LOCATION_FLUSH_SECONDS: float = 2.0
+    # Notification push (WebSocket/SSE)
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = 100  # undelivered events kept per connection
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: float = 15.0
+    NOTIFICATION_COUNTER_RECONCILE_SECONDS: float = 3600.0  # unread counter drift repair
+    NOTIFICATION_BULK_CHUNK_SIZE: int = 1000  # notifications per insert_many in broadcasts
+    NOTIFICATION_RETENTION_DAYS: int = 90  # read notifications expire this long after being read; 0 keeps them
+    NOTIFICATION_UNREAD_RETENTION_DAYS: int = 180  # older unread notifications are deleted by the archiver; 0 keeps them
+    NOTIFICATION_ARCHIVE_AFTER_DAYS: int = 30  # read notifications older than this are archived
+    NOTIFICATION_ARCHIVE_BATCH_SIZE: int = 1000
+    NOTIFICATION_ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+    # Authenticated user cache
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    ITEM_CATALOG_TTL_SECONDS: int = 300  # item cache refresh when Redis invalidation is off
+    ITEM_CATALOG_MAX_AGE_SECONDS: int = 60  # Cache-Control max-age of /items/public
     # Admin user
     DEFAULT_ADMIN_EMAIL: str = "admin@washlink.com"
     DEFAULT_ADMIN_PHONE: str = "+251911000000"
     DEFAULT_ADMIN_PASSWORD: str = "admin123"
     # AfroMessage/OTP
+    OTP_TTL_SECONDS: int = 300
+    OTP_MAX_ATTEMPTS: int = 5
+    OTP_MAX_ENTRIES: int = 100000  # in-memory store only
     AFRO_MESSAGE_API_KEY: str = ""
     AFRO_MESSAGE_SENDER_NAME: str = ""
     AFRO_MESSAGE_IDENTIFIER_ID: str = ""
@@ -54,6 +93,27 @@ class Settings(BaseSettings):
     AFRO_MESSAGE_TTL: str = ""
     AFRO_MESSAGE_LEN: str = ""
     AFRO_MESSAGE_T: str = ""
+    AFRO_MESSAGE_CALLBACK: str = ""
+    # Payment gateway HTTP pools (one per gateway)
+    PAYMENT_GATEWAY_TIMEOUT_SECONDS: float = 30.0
+    PAYMENT_GATEWAY_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    PAYMENT_GATEWAY_MAX_CONNECTIONS: int = 20
+    PAYMENT_GATEWAY_MAX_KEEPALIVE: int = 10
+    PAYMENT_GATEWAY_KEEPALIVE_SECONDS: float = 60.0
+    # Payment callback inbox
+    PAYMENT_CALLBACK_BATCH_SIZE: int = 20
+    PAYMENT_CALLBACK_MAX_ATTEMPTS: int = 8
+    PAYMENT_CALLBACK_RETRY_BACKOFF_SECONDS: float = 5.0
+    PAYMENT_CALLBACK_POLL_SECONDS: float = 2.0
+    PAYMENT_CALLBACK_LEASE_SECONDS: int = 60
+    # Outbound SMS
+    SMS_TIMEOUT_SECONDS: float = 10.0
+    SMS_MAX_RETRIES: int = 2
+    SMS_RETRY_BACKOFF_SECONDS: float = 0.5
+    SMS_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    SMS_CIRCUIT_RESET_SECONDS: float = 30.0
+    SMS_OUTBOX_WORKERS: int = 2
+    SMS_OUTBOX_MAX_SIZE: int = 1000
     # Google Auth
     GOOGLE_CLIENT_ID: str = ""
     GOOGLE_CLIENT_SECRET: str = ""
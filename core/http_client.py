@@ -0,0 +1,42 @@
+"""
+Shared pooled httpx.AsyncClient instances.
+
+Opening an AsyncClient per call pays a TCP and TLS handshake every time.
+Outbound integrations instead ask for a named client, created lazily and
+reused for the life of the process; close_http_clients() runs on shutdown.
+HTTP/2 is only negotiated when the optional h2 package is installed
+(httpx[http2]).
+"""
+
+import importlib.util
+from typing import Dict
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=10, keepalive_expiry=30.0)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def get_http_client(name: str, **options) -> httpx.AsyncClient:
+    """Pooled client for one upstream; options only apply when it is first created"""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        options.setdefault("timeout", DEFAULT_TIMEOUT)
+        options.setdefault("limits", DEFAULT_LIMITS)
+        client = httpx.AsyncClient(**options)
+        _clients[name] = client
+    return client
+
+async def close_http_clients():
+    clients = list(_clients.items())
+    _clients.clear()
+    for name, client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Closing HTTP client {name} failed: {str(e)}")
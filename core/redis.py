@@ -0,0 +1,35 @@
+from core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+def get_redis():
+    """
+    Shared asyncio Redis client, created on first use.
+    Returns None when REDIS_ENABLED is off or the redis package is missing,
+    so callers can fall back to their in-process behaviour.
+    """
+    global _client
+    if not settings.REDIS_ENABLED:
+        return None
+    if _client is None:
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            logger.warning("REDIS_ENABLED is set but the redis package is not installed")
+            return None
+        _client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True
+        )
+    return _client
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+        logger.info("Redis connection closed")
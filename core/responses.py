@@ -0,0 +1,40 @@
+from typing import Any
+from decimal import Decimal
+from bson import ObjectId
+from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+import orjson
+
+def orjson_default(value: Any) -> Any:
+    """Serialize the types orjson does not handle natively"""
+    # PydanticObjectId is an ObjectId subclass
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class ORJSONResponse(_ORJSONResponse):
+    """
+    App-wide JSON response class.
+
+    orjson serializes datetimes, enums, dataclasses and dicts natively; ObjectId
+    and pydantic models go through orjson_default. Endpoints that build their
+    payload from trusted data can return this class directly, which skips
+    FastAPI's response_model validation and jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+def model_list_response(models: list, **kwargs) -> ORJSONResponse:
+    """Return already-validated response models without re-validating them"""
+    return ORJSONResponse([model.model_dump() for model in models], **kwargs)
@@ -1,5 +1,8 @@
+import hashlib
+import time
+from collections import OrderedDict
 from passlib.context import CryptContext
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime, timedelta
 from jose import jwt
 from core.config import settings
@@ -35,10 +38,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
     return encoded_jwt
 
+# Decoded payloads of recently seen tokens, keyed by sha256 of the token and
+# kept until the token's own exp. Bounded LRU; only valid tokens are cached.
+_token_cache: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+
 def verify_token(token: str) -> Optional[dict]:
-    """Verify JWT token"""
+    """Verify JWT token. The returned payload is shared - do not mutate it"""
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        expires_at, payload = cached
+        if expires_at > time.time():
+            _token_cache.move_to_end(key)
+            return payload
+        del _token_cache[key]
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        _token_cache[key] = (float(expires_at), payload)
+        while len(_token_cache) > settings.TOKEN_CACHE_MAX_ENTRIES:
+            _token_cache.popitem(last=False)
+    return payload
+
+def clear_token_cache():
+    _token_cache.clear()
\ No newline at end of file
@@ -1,5 +1,6 @@
 from typing import Optional, List
 from models.mongo_models import Order, OrderStatus, ServiceType
+from utils.pagination import keyset_filter, KEYSET_SORT, KEYSET_SORT_SPEC
 from pydantic import BaseModel
 import logging
 from bson import ObjectId
@@ -42,6 +43,21 @@ class OrderUpdate(BaseModel):
     estimated_completion_time: Optional[datetime] = None
     estimated_delivery_time: Optional[datetime] = None
 
+# Fields needed to render an order row in a listing; items are reduced to a count
+ORDER_SUMMARY_PROJECTION = {
+    "user_id": 1,
+    "service_provider_id": 1,
+    "driver_id": 1,
+    "status": 1,
+    "service_type": 1,
+    "subtotal": 1,
+    "pickup_address": 1,
+    "delivery_address": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "item_count": {"$size": {"$ifNull": ["$items", []]}},
+}
+
 class OrderMongoCRUD:
     async def get(self, order_id: str) -> Optional[Order]:
         """Get order by ID"""
@@ -51,36 +67,60 @@ class OrderMongoCRUD:
             logger.error(f"Error getting order by ID {order_id}: {str(e)}")
             return None
 
-    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[Order]:
-        """Get all orders with pagination"""
-        try:
-            return await Order.find().skip(skip).limit(limit).sort("-created_at").to_list()
-        except Exception as e:
-            logger.error(f"Error getting all orders: {str(e)}")
-            return []
+    async def get_multi(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Order]:
+        """Get all orders, newest first. Pass `cursor` for keyset pagination; `skip` is the legacy fallback"""
+        return await self._find_page({}, skip, limit, cursor, "all orders")
 
-    async def get_by_user(self, user_id: str, skip: int = 0, limit: int = 100) -> List[Order]:
+    async def get_by_user(self, user_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Order]:
         """Get orders by user ID"""
-        try:
-            return await Order.find(Order.user_id == ObjectId(user_id)).skip(skip).limit(limit).to_list()
-        except Exception as e:
-            logger.error(f"Error getting orders for user {user_id}: {str(e)}")
-            return []
+        return await self._find_page({"user_id": ObjectId(user_id)}, skip, limit, cursor, f"orders for user {user_id}")
+
+    async def get_by_provider(
+        self,
+        provider_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[OrderStatus] = None
+    ) -> List[Order]:
+        """Get orders by service provider ID, optionally in one status"""
+        query = {"service_provider_id": ObjectId(provider_id)}
+        if status:
+            query["status"] = status
+        return await self._find_page(query, skip, limit, cursor, f"orders for provider {provider_id}")
 
-    async def get_by_provider(self, provider_id: str, skip: int = 0, limit: int = 100) -> List[Order]:
-        """Get orders by service provider ID"""
+    async def get_by_driver(self, driver_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Order]:
+        """Get orders by driver ID"""
+        return await self._find_page({"driver_id": ObjectId(driver_id)}, skip, limit, cursor, f"orders for driver {driver_id}")
+
+    async def get_summaries(
+        self,
+        user_id: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[dict]:
+        """Order listing rows as raw documents (ORDER_SUMMARY_PROJECTION), without model validation"""
+        query = keyset_filter({"user_id": ObjectId(user_id)} if user_id else {}, cursor)
         try:
-            return await Order.find(Order.service_provider_id == ObjectId(provider_id)).skip(skip).limit(limit).to_list()
+            find = Order.get_motor_collection().find(query, ORDER_SUMMARY_PROJECTION).sort(KEYSET_SORT_SPEC)
+            if not cursor:
+                find = find.skip(skip)
+            return await find.limit(limit).to_list(length=limit)
         except Exception as e:
-            logger.error(f"Error getting orders for provider {provider_id}: {str(e)}")
+            logger.error(f"Error getting order summaries: {str(e)}")
             return []
 
-    async def get_by_driver(self, driver_id: str, skip: int = 0, limit: int = 100) -> List[Order]:
-        """Get orders by driver ID"""
+    async def _find_page(self, query: dict, skip: int, limit: int, cursor: Optional[str], label: str) -> List[Order]:
+        # Built outside the try so an invalid cursor surfaces as a 400
+        query = keyset_filter(query, cursor)
         try:
-            return await Order.find(Order.driver_id == ObjectId(driver_id)).skip(skip).limit(limit).to_list()
+            find = Order.find(query).sort(*KEYSET_SORT)
+            if not cursor:
+                find = find.skip(skip)
+            return await find.limit(limit).to_list()
         except Exception as e:
-            logger.error(f"Error getting orders for driver {driver_id}: {str(e)}")
+            logger.error(f"Error getting {label}: {str(e)}")
             return []
 
     async def get_by_status(self, status: OrderStatus, skip: int = 0, limit: int = 100) -> List[Order]:
@@ -3,6 +3,8 @@ from models.mongo_models import User, UserRole
 from schemas.users_schema import UserCreate, UserUpdate
 from pydantic import BaseModel
 from core.security import get_password_hash
+from services.user_cache import user_cache
+from utils.pagination import keyset_filter, KEYSET_SORT
 import logging
 from bson import ObjectId
 
@@ -42,10 +44,20 @@ class UserMongoCRUD:
             logger.error(f"Error getting user by phone {phone}: {str(e)}")
             return None
 
-    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[User]:
-        """Get multiple users"""
+    async def get_multi(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        role: Optional[UserRole] = None
+    ) -> List[User]:
+        """Get multiple users, newest first. Pass `cursor` for keyset pagination; `skip` is the legacy fallback"""
+        query = keyset_filter({"role": role} if role else {}, cursor)
         try:
-            return await User.find_all().skip(skip).limit(limit).to_list()
+            find = User.find(query).sort(*KEYSET_SORT)
+            if not cursor:
+                find = find.skip(skip)
+            return await find.limit(limit).to_list()
         except Exception as e:
             logger.error(f"Error getting multiple users: {str(e)}")
             return []
@@ -92,6 +104,7 @@ class UserMongoCRUD:
                 setattr(user, field, value)
             
             await user.save()
+            await user_cache.invalidate(user.id)
             return user
         except Exception as e:
             logger.error(f"Error updating user: {str(e)}")
@@ -106,6 +119,7 @@ class UserMongoCRUD:
                 return False
             
             await user.delete()
+            await user_cache.invalidate(user_id)
             return True
         except Exception as e:
             logger.error(f"Error deleting user: {str(e)}")
@@ -24,6 +24,17 @@ def get_database_name_from_url(url: str) -> str:
     # If no database in URL, return default
     return db_name if db_name else 'washlink_db'
 
+async def migrate_notification_ttl_index(db):
+    """
+    Drop the former notifications.expires_at_1 index (plain, or the earlier
+    TTL on all notifications); init_beanie then creates expires_at_read_ttl,
+    which only expires read notifications.
+    """
+    indexes = await db.notifications.index_information()
+    if "expires_at_1" in indexes:
+        await db.notifications.drop_index("expires_at_1")
+        logger.info("Dropped notifications.expires_at_1 in favour of expires_at_read_ttl")
+
 # MongoDB connection
 async def connect_to_mongo():
     """Create database connection"""
@@ -36,15 +47,19 @@ async def connect_to_mongo():
         # Import all models for beanie initialization
         from models.mongo_models import (
             User, ServiceProvider, Driver, Order, 
-            Item, Payment, Notification
+            Item, Payment, PaymentCallbackEvent, Notification, NotificationArchive, NotificationCounter,
+            NotificationBroadcastJob, RevenueRollup
         )
+
+        await migrate_notification_ttl_index(database)
         
         # Initialize beanie with all models
         await init_beanie(
             database=database,
             document_models=[
                 User, ServiceProvider, Driver, Order,
-                Item, Payment, Notification
+                Item, Payment, PaymentCallbackEvent, Notification, NotificationArchive, NotificationCounter,
+                NotificationBroadcastJob, RevenueRollup
             ]
         )
         
@@ -4,7 +4,22 @@ from fastapi.middleware.cors import CORSMiddleware
 from api.v1.routers import api_router
 from routes.users_routes import router as legacy_users_router
 from database import init_db, close_mongo_connection
+from services.assignment_queue import assignment_queue
+from services.driver_index import driver_index
+from services.location_ingest import location_ingest
+from services.user_cache import user_cache
+from services.notification_broker import notification_broker
+from services.notification_counter import notification_counters
+from services.notification_broadcast import notification_broadcasts
+from services.notification_archive import notification_archive
+from services.item_catalog import item_catalog
+from services.sms_client import sms_client
+from services.payment_callback_inbox import payment_callback_inbox
 from core.config import settings
+from core.responses import ORJSONResponse
+from core.redis import close_redis
+from core.http_client import close_http_clients
+from utils.pagination import NEXT_CURSOR_HEADER
 import logging
 
 # Set up logging
@@ -15,7 +30,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
 # Event handlers for database connection
@@ -24,10 +40,33 @@ async def startup_event():
     """Initialize MongoDB connection on startup"""
     await init_db()
     logger.info("MongoDB connection initialized")
+    await assignment_queue.start()
+    await driver_index.start()
+    await location_ingest.start()
+    await user_cache.start()
+    await item_catalog.start()
+    await notification_broker.start()
+    await notification_counters.start()
+    await notification_archive.start()
+    await sms_client.start()
+    await payment_callback_inbox.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close MongoDB connection on shutdown"""
+    await assignment_queue.stop()
+    await location_ingest.stop()
+    await driver_index.stop()
+    await user_cache.stop()
+    await item_catalog.stop()
+    await notification_broadcasts.stop()
+    await notification_archive.stop()
+    await notification_counters.stop()
+    await notification_broker.stop()
+    await payment_callback_inbox.stop()
+    await sms_client.stop()
+    await close_http_clients()  # SMS and payment gateway pools
+    await close_redis()
     await close_mongo_connection()
     logger.info("MongoDB connection closed")
 
@@ -38,7 +77,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["*"]
+    expose_headers=["*", NEXT_CURSOR_HEADER]  # "*" is not honoured for credentialed requests
 )
 
 # Include API router with prefix
@@ -1,9 +1,10 @@
-from beanie import Document, Link, before_event, Replace, Insert, PydanticObjectId
+from beanie import Document, Link, before_event, Replace, Insert, Save, PydanticObjectId
 from pydantic import BaseModel, Field, EmailStr, ConfigDict
 from typing import Optional, List, Literal, Any
 from datetime import datetime
 from enum import Enum
 import pymongo
+from pymongo import IndexModel
 
 # Note: Using Document directly instead of custom base class to avoid version compatibility issues
 
@@ -62,6 +63,34 @@ class PaymentStatus(str, Enum):
     FAILED = "failed"
     CANCELLED = "cancelled"
 
+class CallbackEventStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"  # gave up after PAYMENT_CALLBACK_MAX_ATTEMPTS; replayable
+
+class BroadcastJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class RevenueGranularity(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    MONTH = "month"
+
+# GeoJSON point - coordinates are stored as [longitude, latitude]
+class GeoPoint(BaseModel):
+    type: Literal["Point"] = "Point"
+    coordinates: List[float]
+
+    @classmethod
+    def from_lat_lng(cls, latitude: Optional[float], longitude: Optional[float]) -> Optional["GeoPoint"]:
+        if latitude is None or longitude is None:
+            return None
+        return cls(coordinates=[longitude, latitude])
+
 # User Model
 class User(Document):
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -98,6 +127,9 @@ class User(Document):
             "phone_number",
             "role",
             "is_active",
+            # Keyset pagination (utils/pagination.py)
+            [("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+            [("role", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
         ]
 
 # Service Provider Model
@@ -120,6 +152,7 @@ class ServiceProvider(Document):
     longitude: float
     service_radius: float = 10.0
     nearby_condominum: str
+    location: Optional[GeoPoint] = None  # GeoJSON mirror of latitude/longitude
     
     # Personal info
     date_of_birth: datetime = Field(default=datetime(2000, 1, 1))
@@ -150,6 +183,10 @@ class ServiceProvider(Document):
     def update_timestamp(self):
         self.updated_at = datetime.utcnow()
 
+    @before_event([Replace, Insert, Save])
+    def sync_location(self):
+        self.location = GeoPoint.from_lat_lng(self.latitude, self.longitude)
+
     @property
     def full_name(self) -> str:
         return f"{self.first_name} {self.middle_name} {self.last_name}".strip()
@@ -160,6 +197,7 @@ class ServiceProvider(Document):
             "email",
             "phone_number",
             "status",
+            [("location", pymongo.GEOSPHERE)],
             [("latitude", pymongo.ASCENDING), ("longitude", pymongo.ASCENDING)],
             [("is_active", pymongo.ASCENDING), ("is_available", pymongo.ASCENDING)],
         ]
@@ -188,6 +226,7 @@ class Driver(Document):
     current_latitude: Optional[float] = None
     current_longitude: Optional[float] = None
     last_location_update: Optional[datetime] = None
+    location: Optional[GeoPoint] = None  # GeoJSON mirror of current_latitude/current_longitude
     service_radius: float = 15.0
     base_latitude: Optional[float] = None
     base_longitude: Optional[float] = None
@@ -211,6 +250,10 @@ class Driver(Document):
     def update_timestamp(self):
         self.updated_at = datetime.utcnow()
 
+    @before_event([Replace, Insert, Save])
+    def sync_location(self):
+        self.location = GeoPoint.from_lat_lng(self.current_latitude, self.current_longitude)
+
     @property
     def full_name(self) -> str:
         return f"{self.first_name} {self.last_name}"
@@ -223,6 +266,7 @@ class Driver(Document):
             "license_number",
             "vehicle_plate",
             "status",
+            [("location", pymongo.GEOSPHERE)],
             [("current_latitude", pymongo.ASCENDING), ("current_longitude", pymongo.ASCENDING)],
             [("is_active", pymongo.ASCENDING), ("status", pymongo.ASCENDING)],
         ]
@@ -303,7 +347,9 @@ class Order(Document):
     estimated_delivery_time: Optional[datetime] = None
     
     # Assignment details
+    pending_assignment: bool = False  # queued for background provider assignment
     assignment_attempts: int = 0
+    assignment_batch_id: Optional[PydanticObjectId] = None  # set by BatchAssignmentService
     max_assignment_radius: float = 5.0
     special_instructions: Optional[str] = None
     priority_level: int = 1
@@ -320,6 +366,15 @@ class Order(Document):
             "driver_id",
             "status",
             "created_at",
+            "pending_assignment",
+            IndexModel([("assignment_batch_id", pymongo.ASCENDING)], name="assignment_batch_id_1",
+                       partialFilterExpression={"assignment_batch_id": {"$type": "objectId"}}),
+            # Keyset pagination (utils/pagination.py)
+            [("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+            [("user_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+            [("service_provider_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+            [("service_provider_id", pymongo.ASCENDING), ("status", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+            [("driver_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
             [("pickup_latitude", pymongo.ASCENDING), ("pickup_longitude", pymongo.ASCENDING)],
             [("delivery_latitude", pymongo.ASCENDING), ("delivery_longitude", pymongo.ASCENDING)],
         ]
@@ -335,6 +390,7 @@ class Payment(Document):
     status: PaymentStatus = PaymentStatus.PENDING
     external_transaction_id: Optional[str] = None
     gateway_reference: Optional[str] = None
+    callback_keys: List[str] = []  # idempotency keys of callbacks already applied
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
@@ -351,7 +407,63 @@ class Payment(Document):
             "status",
             "payment_method",
             "created_at",
-            "external_transaction_id",
+            IndexModel(
+                [("external_transaction_id", pymongo.ASCENDING)],
+                name="external_transaction_id_unique",
+                unique=True,
+                # Payments get their gateway reference after insert
+                partialFilterExpression={"external_transaction_id": {"$type": "string"}}
+            ),
+        ]
+
+# Revenue Rollup Model - pre-aggregated completed payments per time bucket
+class RevenueRollup(Document):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    granularity: RevenueGranularity
+    period_start: datetime  # UTC start of the hour/day/month bucket
+    payment_method: str
+    service_type: str
+    total_amount: float = 0.0
+    payment_count: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "revenue_rollups"
+        indexes = [
+            IndexModel(
+                [
+                    ("granularity", pymongo.ASCENDING),
+                    ("period_start", pymongo.ASCENDING),
+                    ("payment_method", pymongo.ASCENDING),
+                    ("service_type", pymongo.ASCENDING),
+                ],
+                name="rollup_bucket",
+                unique=True
+            ),
+        ]
+
+# Payment Callback Event Model - durable inbox of raw gateway webhooks
+class PaymentCallbackEvent(Document):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    payment_method: PaymentMethod
+    idempotency_key: str
+    payload: dict
+    status: CallbackEventStatus = CallbackEventStatus.PENDING
+    attempts: int = 0
+    last_error: Optional[str] = None
+    result: Optional[dict] = None
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    locked_until: Optional[datetime] = None
+    processed_at: Optional[datetime] = None
+
+    class Settings:
+        name = "payment_callback_events"
+        indexes = [
+            IndexModel([("idempotency_key", pymongo.ASCENDING)], name="idempotency_key_unique", unique=True),
+            [("status", pymongo.ASCENDING), ("next_attempt_at", pymongo.ASCENDING)],
+            [("status", pymongo.ASCENDING), ("locked_until", pymongo.ASCENDING)],
+            [("received_at", pymongo.DESCENDING)],
         ]
 
 # Notification Model
@@ -364,7 +476,7 @@ class Notification(Document):
     is_read: bool = False
     data: Optional[dict] = None  # Additional data for the notification
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    expires_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None  # read notifications are removed by MongoDB once passed
 
     class Settings:
         name = "notifications"
@@ -372,5 +484,68 @@ class Notification(Document):
             "user_id",
             "is_read",
             "created_at",
-            "expires_at",
-        ] 
\ No newline at end of file
+            # TTL on read notifications only, so unread counters stay exact;
+            # database.py drops the former plain expires_at_1 index
+            IndexModel(
+                [("expires_at", pymongo.ASCENDING)],
+                name="expires_at_read_ttl",
+                expireAfterSeconds=0,
+                partialFilterExpression={"is_read": True}
+            ),
+            # Keyset pagination (utils/pagination.py)
+            [("user_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+            # Unread listings and counter reconciliation
+            [("user_id", pymongo.ASCENDING), ("is_read", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING)],
+        ]
+
+# Notification Archive Model - read notifications moved out of notifications, keeping their _id
+class NotificationArchive(Document):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    user_id: PydanticObjectId
+    title: str
+    message: str
+    type: str
+    data: Optional[dict] = None
+    created_at: datetime
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: Optional[datetime] = None
+
+    class Settings:
+        name = "notifications_archive"
+        indexes = [
+            [("user_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING)],
+            IndexModel([("expires_at", pymongo.ASCENDING)], name="expires_at_1", expireAfterSeconds=0),
+        ]
+
+# Notification Counter Model - unread count per user, _id is the user id
+class NotificationCounter(Document):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    unread_count: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "notification_counters"
+
+# Notification Broadcast Job Model - progress of a bulk notification send
+class NotificationBroadcastJob(Document):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    created_by: PydanticObjectId
+    title: str
+    message: str
+    type: str
+    data: Optional[dict] = None
+    target: dict  # BroadcastTarget filters
+    status: BroadcastJobStatus = BroadcastJobStatus.QUEUED
+    recipients: int = 0
+    sent: int = 0
+    failed: int = 0
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        name = "notification_broadcast_jobs"
+        indexes = [
+            [("created_at", pymongo.DESCENDING)],
+        ]
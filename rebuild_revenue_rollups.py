@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Revenue Rollup Rebuild Script
+Recomputes the hourly, daily and monthly revenue_rollups buckets from
+completed payments. Run once after deploying rollups, and again whenever
+payments were changed outside the application.
+"""
+
+import asyncio
+import logging
+from database import init_db, close_mongo_connection
+from services.revenue_service import revenue_service
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def main():
+    """Connect and rebuild all revenue buckets"""
+    print("💰 WashLink Revenue Rollup Rebuild")
+    print("=" * 50)
+
+    # init_beanie creates the unique bucket index $merge relies on
+    await init_db()
+    try:
+        result = await revenue_service.rebuild()
+        logger.info(f"Buckets: {result['buckets']}")
+        logger.info(f"Stale buckets removed: {result['removed']}")
+        print("\n✅ Rebuild completed successfully!")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
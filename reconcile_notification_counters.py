@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Notification Counter Reconciliation Script
+Recomputes unread notification counters from the notifications collection.
+The application does this periodically; run it by hand after notifications
+were changed outside the application.
+"""
+
+import asyncio
+import logging
+from database import init_db, close_mongo_connection
+from services.notification_counter import notification_counters
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def main():
+    """Connect and reconcile all unread counters"""
+    print("🔔 WashLink Notification Counter Reconciliation")
+    print("=" * 50)
+
+    await init_db()
+    try:
+        result = await notification_counters.reconcile()
+        logger.info(f"Counters checked: {result['checked']}")
+        logger.info(f"Counters corrected: {result['corrected']}")
+        print("\n✅ Reconciliation completed successfully!")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,10 +4,11 @@ from pydantic import BaseModel, EmailStr
 from typing import List, Any
 from models.mongo_models import User, UserRole
 from schemas.users_schema import UserResponse, UserCreate, UserUpdate
-from utils.otp_service import generate_otp, send_otp_sms, save_otp, verify_otp
+from utils.otp_service import generate_otp, queue_otp_sms, save_otp, verify_otp
 from datetime import datetime, timedelta
-import jwt
 from core.config import settings
+from core.security import create_access_token
+from services.user_cache import user_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,11 +30,11 @@ async def request_otp_legacy(request_data: dict):
         otp_code = generate_otp()
         
         # Save OTP
-        save_otp(phone_number, otp_code)
+        await save_otp(phone_number, otp_code)
         
-        # Send OTP via SMS
-        if send_otp_sms(phone_number, otp_code):
-            logger.info(f"OTP sent successfully to {phone_number}")
+        # Queue OTP SMS on the outbox
+        if queue_otp_sms(phone_number):
+            logger.info(f"OTP queued for {phone_number}")
             return {
                 "message": "OTP sent successfully", 
                 "note": "This is a legacy endpoint. Please use /api/v1/auth/request-otp for new implementations."
@@ -64,7 +65,7 @@ async def login_legacy(user: UserVerify, response: Response):
     """Legacy login endpoint - OTP-based login/register for customers"""
     try:
         # Step 1: Verify OTP
-        if not verify_otp(user.phone_number, user.otp_code):
+        if not await verify_otp(user.phone_number, user.otp_code):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired OTP"
@@ -95,6 +96,7 @@ async def login_legacy(user: UserVerify, response: Response):
                 updated = True
             if updated:
                 await db_user.save()
+                await user_cache.invalidate(db_user.id)
 
         # Update last login
         db_user.last_login = datetime.utcnow()
@@ -104,10 +106,9 @@ async def login_legacy(user: UserVerify, response: Response):
         payload = {
             "user_id": str(db_user.id),
             "role": db_user.role,
-            "is_active": db_user.is_active,
-            "exp": datetime.utcnow() + timedelta(days=7)
+            "is_active": db_user.is_active
         }
-        token = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        token = create_access_token(payload, expires_delta=timedelta(days=7))
         
         # Set cookie
         response.set_cookie(
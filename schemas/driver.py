@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, constr, confloat
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, constr, confloat
+from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -61,4 +61,13 @@ class DriverResponse(DriverBase):
 
 class LocationUpdate(BaseModel):
     latitude: float
-    longitude: float
\ No newline at end of file
+    longitude: float
+
+class DriverLocationPing(BaseModel):
+    driver_id: str
+    latitude: confloat(ge=-90, le=90)
+    longitude: confloat(ge=-180, le=180)
+    timestamp: Optional[datetime] = None  # device time (UTC); defaults to receive time
+
+class DriverLocationBatch(BaseModel):
+    pings: List[DriverLocationPing] = Field(..., max_length=1000)
@@ -1,7 +1,8 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List
 from datetime import datetime
 from enum import Enum
+from models.mongo_models import UserRole, OrderStatus
 
 class NotificationType(str, Enum):
     SUCCESS = "success"
@@ -41,4 +42,21 @@ class NotificationResponse(BaseModel):
     reference_id: Optional[int]
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class BroadcastTarget(BaseModel):
+    """Broadcast recipients: active users matching every filter given"""
+    roles: Optional[List[UserRole]] = None
+    # Users with at least one order in one of these statuses
+    order_statuses: Optional[List[OrderStatus]] = None
+    # Users with at least one order picked up within radius_km of this point
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    radius_km: Optional[float] = Field(None, gt=0, le=100)
+
+class NotificationBroadcast(BaseModel):
+    title: str = Field(..., min_length=1, max_length=200)
+    message: str = Field(..., min_length=1, max_length=2000)
+    type: str = "broadcast"
+    data: Optional[dict] = None
+    target: BroadcastTarget
@@ -15,7 +15,7 @@ class PaymentMethod(str, Enum):
     CASH_ON_DELIVERY = "cash_on_delivery"
 
 class PaymentInitiate(BaseModel):
-    order_id: int
+    order_id: str
     amount: float
     payment_method: PaymentMethod
     return_url: Optional[str] = None
@@ -31,9 +31,9 @@ class PaymentCallback(BaseModel):
     currency: Optional[str] = "ETB"
 
 class PaymentResponse(BaseModel):
-    id: int
-    order_id: int
-    user_id: int
+    id: str
+    order_id: str
+    user_id: str
     amount: float
     currency: str
     payment_method: PaymentMethod
@@ -52,4 +52,4 @@ class PaymentInitiateResponse(BaseModel):
     payment_url: Optional[str] = None
     transaction_reference: str
     message: str
-    payment_id: Optional[int] = None
\ No newline at end of file
+    payment_id: Optional[str] = None
\ No newline at end of file
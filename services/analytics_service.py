@@ -0,0 +1,128 @@
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+from models.mongo_models import (
+    Order, User, Driver, Payment,
+    OrderStatus, UserRole, DriverStatus, PaymentStatus
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+PERIOD_DAYS = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+IN_PROGRESS_STATUSES = (OrderStatus.ACCEPTED, OrderStatus.IN_PROGRESS, OrderStatus.OUT_FOR_DELIVERY)
+STAFF_ROLES = (UserRole.ADMIN, UserRole.MANAGER)
+BUSY_DRIVER_STATUSES = (DriverStatus.BUSY, DriverStatus.ON_DELIVERY)
+
+def _count_by(field: str) -> Dict[str, Any]:
+    return {"$group": {"_id": field, "count": {"$sum": 1}}}
+
+def _tag(source: str) -> Dict[str, Any]:
+    """Label rows so the branches of a $unionWith can be told apart"""
+    return {"$addFields": {"source": source}}
+
+class AnalyticsService:
+    """
+    Manager dashboard statistics computed with server-side aggregations.
+
+    Every count is a $group over the whole collection (served by the status /
+    role indexes), so totals stay correct regardless of collection size, and
+    the dashboard combines orders, users, drivers and payments into a single
+    round trip with $unionWith.
+    """
+
+    @staticmethod
+    def period_start(period: str) -> datetime:
+        return datetime.utcnow() - timedelta(days=PERIOD_DAYS[period])
+
+    async def get_dashboard_stats(self) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        month_start = today.replace(day=1)
+
+        rows = await Order.get_motor_collection().aggregate([
+            _count_by("$status"),
+            _tag("orders"),
+            {"$unionWith": {
+                "coll": User.Settings.name,
+                "pipeline": [_count_by({"role": "$role", "is_active": "$is_active"}), _tag("users")]
+            }},
+            {"$unionWith": {
+                "coll": Driver.Settings.name,
+                "pipeline": [_count_by("$status"), _tag("drivers")]
+            }},
+            {"$unionWith": {
+                "coll": Payment.Settings.name,
+                "pipeline": [
+                    {"$match": {"status": PaymentStatus.COMPLETED}},
+                    {"$group": {
+                        "_id": None,
+                        "total": {"$sum": "$amount"},
+                        "today": {"$sum": {"$cond": [{"$gte": ["$completed_at", today]}, "$amount", 0]}},
+                        "this_month": {"$sum": {"$cond": [{"$gte": ["$completed_at", month_start]}, "$amount", 0]}}
+                    }},
+                    _tag("revenue")
+                ]
+            }}
+        ]).to_list(length=None)
+
+        orders = {row["_id"]: row["count"] for row in rows if row["source"] == "orders"}
+        users = [row for row in rows if row["source"] == "users"]
+        drivers = {row["_id"]: row["count"] for row in rows if row["source"] == "drivers"}
+        revenue = next((row for row in rows if row["source"] == "revenue"), {})
+
+        user_stats = self._user_stats(users)
+        return {
+            "users": {
+                "total": user_stats["total_users"],
+                "regular": user_stats["regular_users"],
+                "admin": user_stats["admin_users"],
+                "active": user_stats["active_users"]
+            },
+            "drivers": {
+                "total": sum(drivers.values()),
+                "available": drivers.get(DriverStatus.AVAILABLE, 0),
+                "busy": sum(drivers.get(s, 0) for s in BUSY_DRIVER_STATUSES)
+            },
+            "orders": {
+                "total": sum(orders.values()),
+                "pending": orders.get(OrderStatus.PENDING, 0),
+                "completed": orders.get(OrderStatus.COMPLETED, 0),
+                "in_progress": sum(orders.get(s, 0) for s in IN_PROGRESS_STATUSES)
+            },
+            "revenue": {
+                "total": revenue.get("total", 0),
+                "today": revenue.get("today", 0),
+                "this_month": revenue.get("this_month", 0)
+            }
+        }
+
+    async def get_user_stats(self) -> Dict[str, int]:
+        rows = await User.get_motor_collection().aggregate([
+            _count_by({"role": "$role", "is_active": "$is_active"})
+        ]).to_list(length=None)
+        return self._user_stats(rows)
+
+    @staticmethod
+    def _user_stats(rows: List[dict]) -> Dict[str, int]:
+        total = sum(row["count"] for row in rows)
+        active = sum(row["count"] for row in rows if row["_id"].get("is_active"))
+        return {
+            "total_users": total,
+            "regular_users": sum(row["count"] for row in rows if row["_id"].get("role") == UserRole.USER),
+            "admin_users": sum(row["count"] for row in rows if row["_id"].get("role") in STAFF_ROLES),
+            "active_users": active,
+            "inactive_users": total - active
+        }
+
+    async def get_order_status_counts(self, since: Optional[datetime] = None) -> Dict[str, int]:
+        """Orders per status, optionally only those created since a date"""
+        pipeline = []
+        if since is not None:
+            pipeline.append({"$match": {"created_at": {"$gte": since}}})
+        pipeline.append(_count_by("$status"))
+
+        rows = await Order.get_motor_collection().aggregate(pipeline).to_list(length=None)
+        return {row["_id"]: row["count"] for row in rows}
+
+analytics_service = AnalyticsService()
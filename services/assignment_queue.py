@@ -0,0 +1,129 @@
+import asyncio
+from typing import List, Optional, Set, Tuple
+from beanie import UpdateResponse
+from models.mongo_models import Order, OrderStatus
+from services.assignment_service import assignment_service
+from core.config import settings
+import logging
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+class AssignmentQueue:
+    """
+    In-process worker pool that assigns new orders to providers off the
+    request path. Orders waiting for assignment carry `pending_assignment=True`
+    in Mongo, so work that was queued when the process stopped is picked up
+    again on startup. Claims in AssignmentService are atomic, so several
+    app processes recovering the same order is harmless.
+    """
+
+    def __init__(self):
+        self.worker_count = settings.ASSIGNMENT_WORKER_COUNT
+        self.max_retries = settings.ASSIGNMENT_MAX_RETRIES
+        self.retry_backoff = settings.ASSIGNMENT_RETRY_BACKOFF_SECONDS  # seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._retry_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """Start the worker pool and re-queue orders still pending assignment"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+        recovered = await self._recover_pending()
+        logger.info(f"Assignment queue started with {self.worker_count} workers, {recovered} orders recovered")
+
+    async def stop(self):
+        """Cancel workers and pending retries; queued orders stay flagged in Mongo"""
+        tasks = [*self._workers, *self._retry_tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._retry_tasks.clear()
+        self._queue = None
+        logger.info("Assignment queue stopped")
+
+    def enqueue(self, order_id: str, attempt: int = 0):
+        """Queue an order for assignment"""
+        if self._queue is None:
+            logger.warning(f"Assignment queue not running, order {order_id} left pending for recovery")
+            return
+        self._queue.put_nowait((order_id, attempt))
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _recover_pending(self) -> int:
+        """Enqueue every order flagged pending_assignment"""
+        recovered = 0
+        cursor = Order.get_motor_collection().find(
+            {"pending_assignment": True},
+            {"_id": 1}
+        ).sort("created_at", 1)
+        async for doc in cursor:
+            self.enqueue(str(doc["_id"]))
+            recovered += 1
+        return recovered
+
+    async def _worker(self, worker_id: int):
+        while True:
+            order_id, attempt = await self._queue.get()
+            try:
+                await self._process(order_id, attempt)
+            except Exception as e:
+                logger.error(f"Assignment worker {worker_id} failed on order {order_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, order_id: str, attempt: int):
+        provider = await assignment_service.assign_order_to_provider(order_id)
+        if provider:
+            # The provider claim clears pending_assignment
+            logger.info(f"Order {order_id} assigned to provider {provider.id} on attempt {attempt + 1}")
+            return
+
+        exhausted = attempt + 1 >= self.max_retries
+        update = {"$inc": {"assignment_attempts": 1}}
+        if exhausted:
+            update["$set"] = {"pending_assignment": False}
+
+        # Only keep retrying while the order is still waiting for a provider
+        order = await Order.find_one({
+            "_id": ObjectId(order_id),
+            "status": OrderStatus.PENDING
+        }).update(update, response_type=UpdateResponse.NEW_DOCUMENT)
+
+        if not order:
+            await Order.find_one({"_id": ObjectId(order_id)}).update(
+                {"$set": {"pending_assignment": False}}
+            )
+            logger.info(f"Order {order_id} is no longer pending, dropping from assignment queue")
+            return
+
+        if exhausted:
+            logger.warning(f"Could not auto-assign order {order_id} after {self.max_retries} attempts")
+            return
+
+        delay = self.retry_backoff * (2 ** attempt)
+        logger.info(f"Retrying assignment of order {order_id} in {delay:.1f}s")
+        self._schedule_retry(order_id, attempt + 1, delay)
+
+    def _schedule_retry(self, order_id: str, attempt: int, delay: float):
+        task = asyncio.create_task(self._delayed_enqueue(order_id, attempt, delay))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _delayed_enqueue(self, order_id: str, attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        self.enqueue(order_id, attempt)
+
+assignment_queue = AssignmentQueue()
@@ -1,10 +1,13 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime, timedelta
+from beanie import UpdateResponse
 from models.mongo_models import (
     Order, ServiceProvider, Driver, 
     DriverStatus, OrderStatus, ProviderStatus
 )
 from services.location_service import location_service
+from services.driver_index import driver_index
+from core.config import settings
 import logging
 from bson import ObjectId
 
@@ -12,8 +15,91 @@ logger = logging.getLogger(__name__)
 
 class AssignmentService:
     def __init__(self):
-        self.max_assignment_attempts = 3
-        self.assignment_radius_increment = 2.0  # km
+        self.max_assignment_attempts = settings.ASSIGNMENT_MAX_ATTEMPTS
+        self.assignment_radius_increment = settings.ASSIGNMENT_RADIUS_INCREMENT_KM  # km
+        self.candidate_limit = settings.ASSIGNMENT_CANDIDATE_LIMIT
+        self.weights = {
+            "distance": settings.ASSIGNMENT_WEIGHT_DISTANCE,
+            "rating": settings.ASSIGNMENT_WEIGHT_RATING,
+            "load": settings.ASSIGNMENT_WEIGHT_LOAD,
+            "completion_time": settings.ASSIGNMENT_WEIGHT_COMPLETION_TIME,
+        }
+        self.completion_time_scale = settings.ASSIGNMENT_COMPLETION_TIME_SCALE_HOURS
+
+    def _max_search_radius(self, base_radius: Optional[float]) -> float:
+        """Largest radius the old expanding search would have reached (km)"""
+        base_radius = base_radius or 5.0
+        return base_radius + self.assignment_radius_increment * (self.max_assignment_attempts - 1)
+
+    def _provider_score_expression(self, max_distance_m: float) -> dict:
+        """
+        Aggregation expression scoring a provider for an order (lower is better).
+        Combines distance, rating, current load and average completion time,
+        each normalized to 0..1 and weighted by the ASSIGNMENT_WEIGHT_* settings.
+        """
+        return {
+            "$add": [
+                {"$multiply": [
+                    self.weights["distance"],
+                    {"$divide": ["$distance", max_distance_m]}
+                ]},
+                {"$multiply": [
+                    self.weights["rating"],
+                    {"$subtract": [1, {"$divide": [{"$min": [{"$ifNull": ["$rating", 0]}, 5]}, 5]}]}
+                ]},
+                {"$multiply": [
+                    self.weights["load"],
+                    {"$divide": ["$current_order_count", "$max_daily_orders"]}
+                ]},
+                {"$multiply": [
+                    self.weights["completion_time"],
+                    {"$min": [
+                        {"$divide": [{"$ifNull": ["$average_completion_time", 0]}, self.completion_time_scale]},
+                        1
+                    ]}
+                ]}
+            ]
+        }
+
+    async def rank_providers(
+        self,
+        latitude: float,
+        longitude: float,
+        max_radius: float,
+        limit: Optional[int] = None
+    ) -> List[Tuple[ServiceProvider, float]]:
+        """
+        Rank available providers with spare capacity around a point in a
+        single aggregation. Returns list of tuples (provider, distance_km),
+        best candidate first.
+        """
+        max_distance_m = max_radius * 1000
+        results = await ServiceProvider.aggregate([
+            {
+                "$geoNear": {
+                    "near": {"type": "Point", "coordinates": [longitude, latitude]},
+                    "distanceField": "distance",
+                    "maxDistance": max_distance_m,
+                    "spherical": True,
+                    "query": {
+                        "is_active": True,
+                        "is_available": True,
+                        "status": ProviderStatus.ACTIVE
+                    }
+                }
+            },
+            {"$match": {"$expr": {"$lt": ["$current_order_count", "$max_daily_orders"]}}},
+            {"$addFields": {"assignment_score": self._provider_score_expression(max_distance_m)}},
+            {"$sort": {"assignment_score": 1, "distance": 1}},
+            {"$limit": limit or self.candidate_limit}
+        ]).to_list()
+
+        ranked = []
+        for doc in results:
+            distance = doc.pop("distance") / 1000
+            doc.pop("assignment_score", None)
+            ranked.append((ServiceProvider.model_validate(doc), distance))
+        return ranked
 
     async def assign_order_to_provider(
         self, 
@@ -29,69 +115,37 @@ class AssignmentService:
                 logger.error(f"Order {order_id} not found")
                 return None
 
+            if order.status != OrderStatus.PENDING:
+                logger.info(f"Order {order_id} is {order.status}, skipping provider assignment")
+                return None
+
             # If preferred provider is specified, try to assign to them first
             if preferred_provider_id:
-                provider = await ServiceProvider.get(ObjectId(preferred_provider_id))
-                if provider and provider.is_active and provider.is_available:
-                    await self._assign_provider(order, provider)
+                provider = await self._claim_provider(order, ObjectId(preferred_provider_id))
+                if provider:
                     return provider
 
-            # Find providers within radius
-            base_radius = order.max_assignment_radius or 5.0  # km
-            current_radius = base_radius
+            if order.pickup_latitude is None or order.pickup_longitude is None:
+                logger.warning(f"Order {order_id} has no pickup location, cannot assign provider")
+                return None
 
-            for attempt in range(self.max_assignment_attempts):
-                # Find available providers within radius
-                providers = await ServiceProvider.find(
-                    {
-                        "is_active": True,
-                        "is_available": True,
-                        "status": ProviderStatus.ACTIVE,
-                        "current_order_count": {"$lt": "$max_daily_orders"},
-                        "$and": [
-                            {
-                                "$expr": {
-                                    "$lte": [
-                                        {
-                                            "$sqrt": {
-                                                "$add": [
-                                                    {
-                                                        "$pow": [
-                                                            {"$subtract": ["$latitude", order.pickup_latitude]},
-                                                            2
-                                                        ]
-                                                    },
-                                                    {
-                                                        "$pow": [
-                                                            {"$subtract": ["$longitude", order.pickup_longitude]},
-                                                            2
-                                                        ]
-                                                    }
-                                                ]
-                                            }
-                                        },
-                                        current_radius / 111.0  # Convert km to degrees (approximate)
-                                    ]
-                                }
-                            }
-                        ]
-                    }
-                ).sort([
-                    ("rating", -1),
-                    ("total_orders_completed", -1)
-                ]).to_list()
-
-                if providers:
-                    # Assign to best matching provider
-                    best_provider = providers[0]
-                    await self._assign_provider(order, best_provider)
-                    return best_provider
-
-                # Increase radius for next attempt
-                current_radius += self.assignment_radius_increment
-                logger.info(f"No providers found within {current_radius}km, expanding search radius")
-
-            logger.warning(f"Failed to assign order {order_id} after {self.max_assignment_attempts} attempts")
+            # Rank candidates out to the largest radius in one round trip
+            max_radius = self._max_search_radius(order.max_assignment_radius)
+            candidates = await self.rank_providers(
+                order.pickup_latitude,
+                order.pickup_longitude,
+                max_radius
+            )
+
+            # Claim the best candidate that still has capacity; candidates
+            # that filled up concurrently fall through to the next one
+            for candidate, distance in candidates:
+                provider = await self._claim_provider(order, candidate.id)
+                if provider:
+                    logger.info(f"Order {order_id} matched provider {provider.id} at {distance:.2f}km")
+                    return provider
+
+            logger.warning(f"No available providers within {max_radius}km for order {order_id}")
             return None
 
         except Exception as e:
@@ -111,51 +165,24 @@ class AssignmentService:
                 logger.error(f"Order {order_id} not found")
                 return None
 
-            # Find available drivers within radius
+            if order.pickup_latitude is None or order.pickup_longitude is None:
+                logger.warning(f"Order {order_id} has no pickup location, cannot assign driver")
+                return None
+
+            # Find available drivers within radius, nearest first
             base_radius = 5.0  # km
-            drivers = await Driver.find(
-                {
-                    "status": DriverStatus.AVAILABLE,
-                    "is_active": True,
-                    "current_order_id": None,
-                    "$and": [
-                        {
-                            "$expr": {
-                                "$lte": [
-                                    {
-                                        "$sqrt": {
-                                            "$add": [
-                                                {
-                                                    "$pow": [
-                                                        {"$subtract": ["$current_latitude", order.pickup_latitude]},
-                                                        2
-                                                    ]
-                                                },
-                                                {
-                                                    "$pow": [
-                                                        {"$subtract": ["$current_longitude", order.pickup_longitude]},
-                                                        2
-                                                    ]
-                                                }
-                                            ]
-                                        }
-                                    },
-                                    base_radius / 111.0  # Convert km to degrees (approximate)
-                                ]
-                            }
-                        }
-                    ]
-                }
-            ).sort([
-                ("rating", -1),
-                ("successful_deliveries", -1)
-            ]).to_list()
+            nearby_drivers = await location_service.find_nearby_drivers(
+                order.pickup_latitude,
+                order.pickup_longitude,
+                max_radius=base_radius
+            )
+            drivers = [driver for driver, _ in nearby_drivers if driver.current_order_id is None]
 
-            if drivers:
-                # Assign to best matching driver
-                best_driver = drivers[0]
-                await self._assign_driver(order, best_driver)
-                return best_driver
+            # Claim the nearest driver that is still available
+            for candidate in drivers:
+                driver = await self._claim_driver(order, candidate.id)
+                if driver:
+                    return driver
 
             logger.warning(f"No available drivers found for order {order_id}")
             return None
@@ -164,42 +191,114 @@ class AssignmentService:
             logger.error(f"Error assigning driver to order: {str(e)}")
             return None
 
-    async def _assign_provider(self, order: Order, provider: ServiceProvider):
-        """Helper method to update order and provider after assignment"""
-        try:
-            # Update order
-            order.service_provider_id = provider.id
-            order.status = OrderStatus.ASSIGNED
-            order.assigned_at = datetime.utcnow()
-            await order.save()
+    async def _claim_provider(
+        self,
+        order: Order,
+        provider_id: ObjectId
+    ) -> Optional[ServiceProvider]:
+        """
+        Atomically reserve capacity on a provider and attach it to the order.
+        Returns the updated provider, or None if the provider is full/unavailable
+        or the order was already assigned elsewhere.
+        """
+        now = datetime.utcnow()
 
-            # Update provider
-            provider.current_order_count += 1
-            await provider.save()
+        # Reserve a slot only if the provider is still below capacity
+        provider = await ServiceProvider.find_one({
+            "_id": provider_id,
+            "is_active": True,
+            "is_available": True,
+            "$expr": {"$lt": ["$current_order_count", "$max_daily_orders"]}
+        }).update(
+            {"$inc": {"current_order_count": 1}, "$set": {"updated_at": now}},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if not provider:
+            return None
 
-            logger.info(f"Order {order.id} assigned to provider {provider.id}")
+        # Attach the order only if nobody else has assigned it meanwhile
+        claimed_order = await Order.find_one({
+            "_id": order.id,
+            "status": OrderStatus.PENDING
+        }).update(
+            {
+                "$set": {
+                    "service_provider_id": provider.id,
+                    "status": OrderStatus.ASSIGNED,
+                    "assigned_at": now,
+                    "updated_at": now,
+                    "pending_assignment": False
+                },
+                "$inc": {"assignment_attempts": 1}
+            },
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if not claimed_order:
+            # Give the reserved slot back
+            await ServiceProvider.find_one({"_id": provider.id}).update(
+                {"$inc": {"current_order_count": -1}}
+            )
+            logger.info(f"Order {order.id} was assigned concurrently, released provider {provider.id}")
+            return None
 
-        except Exception as e:
-            logger.error(f"Error in _assign_provider: {str(e)}")
-            raise
+        order.service_provider_id = provider.id
+        order.status = OrderStatus.ASSIGNED
+        order.assigned_at = now
+        logger.info(f"Order {order.id} assigned to provider {provider.id}")
+        return provider
 
-    async def _assign_driver(self, order: Order, driver: Driver):
-        """Helper method to update order and driver after assignment"""
-        try:
-            # Update order
-            order.driver_id = driver.id
-            order.status = OrderStatus.OUT_FOR_DELIVERY
-            await order.save()
+    async def _claim_driver(
+        self,
+        order: Order,
+        driver_id: ObjectId
+    ) -> Optional[Driver]:
+        """
+        Atomically move an AVAILABLE driver onto the order.
+        Returns the updated driver, or None if the driver was taken
+        or the order already has a driver.
+        """
+        now = datetime.utcnow()
 
-            # Update driver
-            driver.status = DriverStatus.ON_DELIVERY
-            driver.current_order_id = order.id
-            await driver.save()
+        driver = await Driver.find_one({
+            "_id": driver_id,
+            "is_active": True,
+            "status": DriverStatus.AVAILABLE,
+            "current_order_id": None
+        }).update(
+            {"$set": {
+                "status": DriverStatus.ON_DELIVERY,
+                "current_order_id": order.id,
+                "updated_at": now
+            }},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        # Either way the driver is no longer available for new orders
+        driver_index.remove(driver_id)
+        if not driver:
+            return None
 
-            logger.info(f"Driver {driver.id} assigned to order {order.id}")
+        claimed_order = await Order.find_one({
+            "_id": order.id,
+            "driver_id": None
+        }).update(
+            {"$set": {
+                "driver_id": driver.id,
+                "status": OrderStatus.OUT_FOR_DELIVERY,
+                "updated_at": now
+            }},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if not claimed_order:
+            # Put the driver back exactly as we found them
+            await Driver.find_one({"_id": driver.id, "current_order_id": order.id}).update(
+                {"$set": {"status": DriverStatus.AVAILABLE, "current_order_id": None}}
+            )
+            logger.info(f"Order {order.id} got a driver concurrently, released driver {driver.id}")
+            return None
 
-        except Exception as e:
-            logger.error(f"Error in _assign_driver: {str(e)}")
-            raise
+        order.driver_id = driver.id
+        order.status = OrderStatus.OUT_FOR_DELIVERY
+        logger.info(f"Driver {driver.id} assigned to order {order.id}")
+        return driver
 
 assignment_service = AssignmentService()
\ No newline at end of file
@@ -0,0 +1,266 @@
+import math
+import time
+from collections import defaultdict
+from typing import List, Dict, Any
+from datetime import datetime
+import asyncio
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne, ReturnDocument
+from models.mongo_models import Order, ServiceProvider, OrderStatus, ProviderStatus
+from services.assignment_service import assignment_service
+from utils.geo_distance import distances_km, pairwise_distances_km, EQUIRECTANGULAR
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BatchAssignmentService:
+    """
+    Matches many PENDING orders to providers at once. Orders and providers in
+    an area are loaded in two queries, scored as a NumPy cost matrix using the
+    same weights as AssignmentService, and matched with a greedy-with-capacity
+    heuristic (globally cheapest feasible pairs first).
+
+    Like AssignmentService._claim_provider, capacity is reserved before any
+    order is attached: each provider's slots are claimed with a guarded $inc
+    that cannot pass max_daily_orders, then the orders go out in one
+    bulk_write tagged with a batch id, and slots left unused (orders taken by
+    the assignment workers meanwhile) are released.
+    """
+
+    async def assign_pending_orders(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float = 10.0,
+        max_orders: int = 500
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+
+        orders = await self._load_pending_orders(latitude, longitude, radius_km, max_orders)
+        if not orders:
+            return self._summary(0, 0, 0, started)
+
+        # Providers may sit outside the area but within an order's match radius
+        match_radius = np.array([assignment_service._max_search_radius(o.get("max_assignment_radius")) for o in orders])
+        providers = await self._load_providers(latitude, longitude, radius_km + float(match_radius.max()))
+        if not providers:
+            return self._summary(len(orders), 0, 0, started)
+
+        matches = self._match(orders, providers, match_radius)
+        assigned = await self._write_matches(matches)
+
+        summary = self._summary(len(orders), len(providers), assigned, started)
+        logger.info(f"Batch assignment: {summary}")
+        return summary
+
+    async def _load_pending_orders(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        max_orders: int
+    ) -> List[dict]:
+        """Oldest PENDING, unassigned orders whose pickup is inside the area"""
+        lat_delta = radius_km / 111.0
+        lng_delta = radius_km / (111.0 * max(math.cos(math.radians(latitude)), 0.01))
+        cursor = Order.get_motor_collection().find(
+            {
+                "status": OrderStatus.PENDING,
+                "service_provider_id": None,
+                # Bounding box served by the (pickup_latitude, pickup_longitude) index
+                "pickup_latitude": {"$gte": latitude - lat_delta, "$lte": latitude + lat_delta},
+                "pickup_longitude": {"$gte": longitude - lng_delta, "$lte": longitude + lng_delta}
+            },
+            {"_id": 1, "pickup_latitude": 1, "pickup_longitude": 1, "max_assignment_radius": 1}
+        ).sort("created_at", 1).limit(max_orders)
+        orders = await cursor.to_list(length=max_orders)
+        if not orders:
+            return []
+
+        # Trim the bounding box corners to the actual circle
+        distances = distances_km(
+            latitude, longitude,
+            [o["pickup_latitude"] for o in orders],
+            [o["pickup_longitude"] for o in orders],
+            mode=EQUIRECTANGULAR
+        )
+        return [o for o, d in zip(orders, distances) if d <= radius_km]
+
+    async def _load_providers(self, latitude: float, longitude: float, radius_km: float) -> List[dict]:
+        """Available providers with spare capacity, as plain documents"""
+        return await ServiceProvider.get_motor_collection().aggregate([
+            {
+                "$geoNear": {
+                    "near": {"type": "Point", "coordinates": [longitude, latitude]},
+                    "distanceField": "distance",
+                    "maxDistance": radius_km * 1000,
+                    "spherical": True,
+                    "query": {
+                        "is_active": True,
+                        "is_available": True,
+                        "status": ProviderStatus.ACTIVE
+                    }
+                }
+            },
+            {"$match": {"$expr": {"$lt": ["$current_order_count", "$max_daily_orders"]}}},
+            {"$project": {
+                "latitude": 1,
+                "longitude": 1,
+                "rating": 1,
+                "current_order_count": 1,
+                "max_daily_orders": 1,
+                "average_completion_time": 1
+            }}
+        ]).to_list(length=None)
+
+    def _match(self, orders: List[dict], providers: List[dict], match_radius: np.ndarray) -> List[tuple]:
+        """Return (order_id, provider_id) pairs from the capacity-constrained greedy match"""
+        weights = assignment_service.weights
+
+        distance = pairwise_distances_km(
+            [o["pickup_latitude"] for o in orders],
+            [o["pickup_longitude"] for o in orders],
+            [p["latitude"] for p in providers],
+            [p["longitude"] for p in providers],
+            mode=EQUIRECTANGULAR
+        )
+        rating = np.array([p.get("rating") or 0.0 for p in providers], dtype=float)
+        current = np.array([p.get("current_order_count", 0) for p in providers], dtype=float)
+        max_daily = np.array([p.get("max_daily_orders", 0) for p in providers], dtype=float)
+        completion = np.array([p.get("average_completion_time") or 0.0 for p in providers], dtype=float)
+
+        # Same score as AssignmentService._provider_score_expression (lower is better)
+        provider_cost = (
+            weights["rating"] * (1 - np.minimum(rating, 5) / 5)
+            + weights["load"] * (current / max_daily)
+            + weights["completion_time"] * np.minimum(completion / assignment_service.completion_time_scale, 1)
+        )
+        cost = weights["distance"] * (distance / match_radius[:, None]) + provider_cost[None, :]
+        cost[distance > match_radius[:, None]] = np.inf
+
+        capacity = (max_daily - current).astype(int)
+        order_done = np.zeros(len(orders), dtype=bool)
+        n_providers = len(providers)
+
+        matches = []
+        for flat_index in np.argsort(cost, axis=None):
+            order_index, provider_index = divmod(int(flat_index), n_providers)
+            if not np.isfinite(cost[order_index, provider_index]):
+                break
+            if order_done[order_index] or capacity[provider_index] <= 0:
+                continue
+            order_done[order_index] = True
+            capacity[provider_index] -= 1
+            matches.append((orders[order_index]["_id"], providers[provider_index]["_id"]))
+            if len(matches) == len(orders):
+                break
+        return matches
+
+    async def _write_matches(self, matches: List[tuple]) -> int:
+        """Reserve provider capacity, then attach orders; returns orders assigned"""
+        if not matches:
+            return 0
+
+        orders_by_provider: Dict[Any, List[Any]] = defaultdict(list)
+        for order_id, provider_id in matches:
+            orders_by_provider[provider_id].append(order_id)
+
+        provider_ids = list(orders_by_provider)
+        reserved_counts = await asyncio.gather(*(
+            self._reserve(provider_id, len(orders_by_provider[provider_id])) for provider_id in provider_ids
+        ))
+        reserved = {provider_id: n for provider_id, n in zip(provider_ids, reserved_counts) if n}
+        if not reserved:
+            return 0
+
+        now = datetime.utcnow()
+        batch_id = ObjectId()
+        orders_collection = Order.get_motor_collection()
+        await orders_collection.bulk_write([
+            UpdateOne(
+                {"_id": order_id, "status": OrderStatus.PENDING, "service_provider_id": None},
+                {
+                    "$set": {
+                        "service_provider_id": provider_id,
+                        "status": OrderStatus.ASSIGNED,
+                        "assigned_at": now,
+                        "updated_at": now,
+                        "pending_assignment": False,
+                        "assignment_batch_id": batch_id
+                    },
+                    "$inc": {"assignment_attempts": 1}
+                }
+            )
+            for provider_id, count in reserved.items()
+            # Best matches first, as many as the provider had room for
+            for order_id in orders_by_provider[provider_id][:count]
+        ], ordered=False)
+
+        # Orders claimed by a worker in the meantime did not match the filter
+        assigned_per_provider = {
+            row["_id"]: row["count"]
+            for row in await orders_collection.aggregate([
+                {"$match": {"assignment_batch_id": batch_id}},
+                {"$group": {"_id": "$service_provider_id", "count": {"$sum": 1}}}
+            ]).to_list(length=None)
+        }
+
+        releases = [
+            UpdateOne(
+                {"_id": provider_id},
+                {"$inc": {"current_order_count": assigned_per_provider.get(provider_id, 0) - count}}
+            )
+            for provider_id, count in reserved.items()
+            if assigned_per_provider.get(provider_id, 0) < count
+        ]
+        if releases:
+            await ServiceProvider.get_motor_collection().bulk_write(releases, ordered=False)
+
+        return sum(assigned_per_provider.values())
+
+    @staticmethod
+    async def _reserve(provider_id: Any, wanted: int, attempts: int = 3) -> int:
+        """
+        Claim up to `wanted` slots on a provider without passing
+        max_daily_orders; returns how many were claimed
+        """
+        providers = ServiceProvider.get_motor_collection()
+        n = wanted
+        for _ in range(attempts):
+            if n <= 0:
+                return 0
+            provider = await providers.find_one_and_update(
+                {
+                    "_id": provider_id,
+                    "is_active": True,
+                    "is_available": True,
+                    "$expr": {"$lte": [{"$add": ["$current_order_count", n]}, "$max_daily_orders"]}
+                },
+                {"$inc": {"current_order_count": n}, "$set": {"updated_at": datetime.utcnow()}},
+                projection={"_id": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if provider:
+                return n
+            # Capacity was taken concurrently: retry with what is left
+            current = await providers.find_one(
+                {"_id": provider_id, "is_active": True, "is_available": True},
+                {"current_order_count": 1, "max_daily_orders": 1}
+            )
+            if not current:
+                return 0
+            n = min(wanted, current.get("max_daily_orders", 0) - current.get("current_order_count", 0))
+        return 0
+
+    @staticmethod
+    def _summary(orders: int, providers: int, assigned: int, started: float) -> Dict[str, Any]:
+        return {
+            "orders_considered": orders,
+            "providers_considered": providers,
+            "assigned": assigned,
+            "unassigned": orders - assigned,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+batch_assignment_service = BatchAssignmentService()
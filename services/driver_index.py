@@ -0,0 +1,226 @@
+import asyncio
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+from models.mongo_models import Driver, DriverStatus
+from core.config import settings
+from utils.geo_distance import distances_km, EQUIRECTANGULAR
+import logging
+
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[int, int]
+
+class DriverSpatialIndex:
+    """
+    In-process grid index of AVAILABLE drivers with a fresh location.
+
+    Drivers are bucketed into fixed-size lat/lng cells so a radius query only
+    touches the cells around the point. The location-update path keeps it
+    current incrementally; Mongo stays the durable store and a periodic
+    reconciliation rebuilds the index from it and evicts drivers whose
+    last_location_update is older than DRIVER_LOCATION_STALE_SECONDS.
+
+    The index only generates candidates - assignment still claims drivers with
+    a guarded update in Mongo, so a slightly stale entry costs one failed claim.
+    """
+
+    def __init__(self):
+        self.cell_size = settings.DRIVER_INDEX_CELL_SIZE_DEG
+        self.stale_after = timedelta(seconds=settings.DRIVER_LOCATION_STALE_SECONDS)
+        self.reconcile_interval = settings.DRIVER_INDEX_RECONCILE_SECONDS
+        self._drivers: Dict[str, Driver] = {}
+        self._cell_of: Dict[str, Cell] = {}
+        self._cells: Dict[Cell, Set[str]] = defaultdict(set)
+        self._ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_ready(self) -> bool:
+        """True once the index has been loaded from Mongo"""
+        return self._ready
+
+    def __len__(self) -> int:
+        return len(self._drivers)
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        return (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+
+    def _is_stale(self, driver: Driver, now: datetime) -> bool:
+        return driver.last_location_update is None or now - driver.last_location_update > self.stale_after
+
+    def _is_eligible(self, driver: Driver) -> bool:
+        return (
+            driver.is_active
+            and driver.status == DriverStatus.AVAILABLE
+            and driver.current_order_id is None
+            and driver.current_latitude is not None
+            and driver.current_longitude is not None
+        )
+
+    def _place(self, driver_id: str, driver: Driver):
+        cell = self._cell(driver.current_latitude, driver.current_longitude)
+        old_cell = self._cell_of.get(driver_id)
+        if old_cell != cell:
+            if old_cell is not None:
+                self._discard_from_cell(driver_id, old_cell)
+            self._cells[cell].add(driver_id)
+            self._cell_of[driver_id] = cell
+        self._drivers[driver_id] = driver
+
+    def _discard_from_cell(self, driver_id: str, cell: Cell):
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(driver_id)
+            if not members:
+                del self._cells[cell]
+
+    def upsert(self, driver: Driver):
+        """Add, move or drop a driver according to its current state"""
+        driver_id = str(driver.id)
+        if self._is_eligible(driver):
+            self._place(driver_id, driver)
+        else:
+            self.remove(driver_id)
+
+    def update_position(
+        self,
+        driver_id: str,
+        latitude: float,
+        longitude: float,
+        timestamp: Optional[datetime] = None
+    ) -> bool:
+        """Move an indexed driver; returns False if the driver is not indexed"""
+        driver = self._drivers.get(driver_id)
+        if driver is None:
+            return False
+        driver.current_latitude = latitude
+        driver.current_longitude = longitude
+        driver.last_location_update = timestamp or datetime.utcnow()
+        self._place(driver_id, driver)
+        return True
+
+    def remove(self, driver_id) -> None:
+        driver_id = str(driver_id)
+        self._drivers.pop(driver_id, None)
+        cell = self._cell_of.pop(driver_id, None)
+        if cell is not None:
+            self._discard_from_cell(driver_id, cell)
+
+    def query(
+        self,
+        latitude: float,
+        longitude: float,
+        max_radius: float
+    ) -> List[Tuple[Driver, float]]:
+        """
+        Available drivers within max_radius (and their own service radius),
+        sorted by distance and rating. Returns list of tuples (driver, distance_km)
+        """
+        now = datetime.utcnow()
+        lat_span = math.ceil(max_radius / 111.0 / self.cell_size)
+        lng_span = math.ceil(max_radius / (111.0 * max(math.cos(math.radians(latitude)), 0.01)) / self.cell_size)
+        center_lat, center_lng = self._cell(latitude, longitude)
+
+        candidates = []
+        stale = []
+        for lat_cell in range(center_lat - lat_span, center_lat + lat_span + 1):
+            for lng_cell in range(center_lng - lng_span, center_lng + lng_span + 1):
+                for driver_id in self._cells.get((lat_cell, lng_cell), ()):
+                    driver = self._drivers[driver_id]
+                    if self._is_stale(driver, now):
+                        stale.append(driver_id)
+                    else:
+                        candidates.append(driver)
+
+        for driver_id in stale:
+            self.remove(driver_id)
+
+        if not candidates:
+            return []
+
+        # Search radii are city-scale, so the flat approximation is accurate enough
+        distances = distances_km(
+            latitude, longitude,
+            [driver.current_latitude for driver in candidates],
+            [driver.current_longitude for driver in candidates],
+            mode=EQUIRECTANGULAR
+        )
+        nearby = [
+            (driver, float(distance))
+            for driver, distance in zip(candidates, distances)
+            if distance <= min(driver.service_radius, max_radius)
+        ]
+
+        nearby.sort(key=lambda x: (x[1], -x[0].rating))
+        return nearby
+
+    def evict_stale(self) -> int:
+        """Drop drivers whose last location update is too old"""
+        now = datetime.utcnow()
+        stale = [driver_id for driver_id, driver in self._drivers.items() if self._is_stale(driver, now)]
+        for driver_id in stale:
+            self.remove(driver_id)
+        return len(stale)
+
+    async def reconcile(self):
+        """Rebuild the index from Mongo, keeping fresher in-memory positions"""
+        cutoff = datetime.utcnow() - self.stale_after
+        drivers = await Driver.find({
+            "status": DriverStatus.AVAILABLE,
+            "is_active": True,
+            "current_order_id": None,
+            "location": {"$ne": None},
+            "last_location_update": {"$gte": cutoff}
+        }).to_list()
+
+        previous = self._drivers
+        self._drivers = {}
+        self._cell_of = {}
+        self._cells = defaultdict(set)
+
+        for driver in drivers:
+            driver_id = str(driver.id)
+            known = previous.get(driver_id)
+            # Pings may not have reached Mongo yet; keep the newer position
+            if (
+                known is not None
+                and known.last_location_update is not None
+                and known.last_location_update > driver.last_location_update
+            ):
+                driver.current_latitude = known.current_latitude
+                driver.current_longitude = known.current_longitude
+                driver.last_location_update = known.last_location_update
+            self._place(driver_id, driver)
+
+        self._ready = True
+        logger.debug(f"Driver index reconciled: {len(self._drivers)} drivers")
+
+    async def start(self):
+        """Load the index and start periodic reconciliation"""
+        if self._task:
+            return
+        try:
+            await self.reconcile()
+        except Exception as e:
+            logger.error(f"Initial driver index load failed, falling back to Mongo lookups: {str(e)}")
+        self._task = asyncio.create_task(self._reconcile_loop())
+        logger.info(f"Driver index started with {len(self._drivers)} drivers")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._ready = False
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Driver index reconciliation failed: {str(e)}")
+
+driver_index = DriverSpatialIndex()
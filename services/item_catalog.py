@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+import orjson
+from models.mongo_models import Item
+from core.config import settings
+from core.redis import get_redis
+from core.responses import orjson_default
+import logging
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "item_catalog:invalidate"
+
+# Rendered /items/public pages kept per snapshot
+MAX_RENDERED_PAGES = 256
+
+def item_payload(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """API representation of a raw items document"""
+    return {
+        "id": str(doc["_id"]),
+        "name": doc["name"],
+        "description": doc.get("description"),
+        "price": doc["price"],
+        "currency": doc.get("currency", "ETB"),
+        "category": doc.get("category"),
+        "is_active": doc.get("is_active", True),
+        "estimated_time": doc.get("estimated_time"),
+        "created_at": doc.get("created_at"),
+        "updated_at": doc.get("updated_at")
+    }
+
+class ItemCatalog:
+    """
+    Read-through cache of the items collection.
+
+    The catalog is small, so the whole collection is loaded in one query on
+    first use and indexed by id and by category; every read is then served
+    from memory. Writes go to Mongo and call invalidate(), which drops the
+    snapshot here and, with REDIS_ENABLED, on every other worker. Without
+    Redis other workers pick up changes within ITEM_CATALOG_TTL_SECONDS.
+
+    Rendered /items/public pages are cached with their ETag per snapshot.
+    Returned item dicts are shared and must not be modified.
+    """
+
+    def __init__(self):
+        self.ttl = settings.ITEM_CATALOG_TTL_SECONDS
+        self._items: Optional[List[Dict[str, Any]]] = None
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_category: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        self._rendered: Dict[Tuple[Optional[str], int, int], Tuple[str, bytes]] = {}
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _ensure_loaded(self):
+        if self._items is not None and time.monotonic() < self._expires_at:
+            return
+        async with self._lock:
+            if self._items is not None and time.monotonic() < self._expires_at:
+                return
+            while True:
+                generation = self._generation
+                docs = await Item.get_motor_collection().find({}).sort([("created_at", 1), ("_id", 1)]).to_list(length=None)
+                # Invalidated while loading: the write may not be in docs
+                if generation == self._generation:
+                    break
+            self._install([item_payload(doc) for doc in docs])
+
+    def _install(self, items: List[Dict[str, Any]]):
+        by_category: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for item in items:
+            by_category.setdefault(item["category"], []).append(item)
+        self._items = items
+        self._by_id = {item["id"]: item for item in items}
+        self._by_category = by_category
+        self._rendered = {}
+        self._expires_at = time.monotonic() + self.ttl
+
+    async def list_items(self, category: Optional[str] = None, is_active: Optional[bool] = None) -> List[Dict[str, Any]]:
+        await self._ensure_loaded()
+        items = self._by_category.get(category, []) if category else self._items
+        if is_active is not None:
+            items = [item for item in items if item["is_active"] == is_active]
+        return items
+
+    async def get_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        await self._ensure_loaded()
+        return self._by_id.get(item_id)
+
+    async def public_page(self, category: Optional[str], skip: int, limit: int) -> Tuple[str, bytes]:
+        """(ETag, JSON body) of active items for /items/public"""
+        await self._ensure_loaded()
+        key = (category, skip, limit)
+        page = self._rendered.get(key)
+        if page is None:
+            items = await self.list_items(category=category, is_active=True)
+            body = orjson.dumps(items[skip:skip + limit], default=orjson_default)
+            page = (f'"{hashlib.sha1(body).hexdigest()[:20]}"', body)
+            if len(self._rendered) >= MAX_RENDERED_PAGES:
+                self._rendered.clear()
+            self._rendered[key] = page
+        return page
+
+    async def categories(self) -> List[str]:
+        await self._ensure_loaded()
+        return sorted(category for category in self._by_category if category)
+
+    async def stats(self) -> Dict[str, Any]:
+        await self._ensure_loaded()
+        active = sum(1 for item in self._items if item["is_active"])
+        return {
+            "total_items": len(self._items),
+            "active_items": active,
+            "inactive_items": len(self._items) - active,
+            "categories": {category: len(items) for category, items in self._by_category.items()}
+        }
+
+    async def name_exists(self, name: str, exclude_id: Optional[str] = None) -> bool:
+        """Case-insensitive name check against Mongo (not the snapshot)"""
+        query: Dict[str, Any] = {"name": {"$regex": f"^{re.escape(name)}$", "$options": "i"}}
+        if exclude_id and ObjectId.is_valid(exclude_id):
+            query["_id"] = {"$ne": ObjectId(exclude_id)}
+        doc = await Item.get_motor_collection().find_one(query, {"_id": 1})
+        return doc is not None
+
+    def _drop(self):
+        self._generation += 1
+        self._items = None
+        self._by_id = {}
+        self._by_category = {}
+        self._rendered = {}
+
+    async def invalidate(self) -> None:
+        """Drop the snapshot on every worker after an item write"""
+        self._drop()
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.publish(INVALIDATION_CHANNEL, "1")
+        except Exception as e:
+            logger.warning(f"Item catalog invalidation via Redis failed: {str(e)}")
+
+    async def start(self):
+        """Listen for invalidations from other workers (Redis only)"""
+        if self._task or get_redis() is None:
+            return
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = get_redis().pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._drop()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Invalidations may have been missed until resubscribed
+                logger.error(f"Item catalog invalidation listener error: {str(e)}")
+                self._drop()
+                await asyncio.sleep(5)
+
+item_catalog = ItemCatalog()
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Dict, Optional, Tuple
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from models.mongo_models import Driver
+from services.driver_index import driver_index
+from core.config import settings
+import logging
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+class LocationIngestBuffer:
+    """
+    Coalesces high-frequency driver GPS pings.
+
+    Each ping replaces the buffered position for that driver (only the latest
+    one is kept) and moves the driver in the in-memory index immediately.
+    A background task flushes the buffer every DRIVER_LOCATION_FLUSH_SECONDS
+    with one unordered bulk_write of $set updates on the location fields only,
+    so no driver document is read or replaced on the ping path.
+    """
+
+    def __init__(self):
+        self.flush_interval = settings.DRIVER_LOCATION_FLUSH_SECONDS
+        self._pending: Dict[str, Tuple[float, float, datetime]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(
+        self,
+        driver_id: str,
+        latitude: float,
+        longitude: float,
+        timestamp: Optional[datetime] = None
+    ) -> bool:
+        """Buffer a ping; returns False if the driver id is not valid"""
+        if not ObjectId.is_valid(driver_id):
+            return False
+
+        now = datetime.utcnow()
+        if timestamp is None:
+            timestamp = now
+        else:
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            # Never trust device clocks that run ahead
+            timestamp = min(timestamp, now)
+
+        # Out-of-order pings must not overwrite a newer position
+        buffered = self._pending.get(driver_id)
+        if buffered is not None and buffered[2] >= timestamp:
+            return True
+
+        self._pending[driver_id] = (latitude, longitude, timestamp)
+        driver_index.update_position(driver_id, latitude, longitude, timestamp)
+        return True
+
+    async def flush(self) -> int:
+        """Write buffered positions to Mongo; returns number of drivers written"""
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, {}
+        operations = [
+            UpdateOne(
+                # Skip documents that already hold a newer position
+                {"_id": ObjectId(driver_id), "last_location_update": {"$not": {"$gt": timestamp}}},
+                {"$set": {
+                    "current_latitude": latitude,
+                    "current_longitude": longitude,
+                    "location": {"type": "Point", "coordinates": [longitude, latitude]},
+                    "last_location_update": timestamp
+                }}
+            )
+            for driver_id, (latitude, longitude, timestamp) in batch.items()
+        ]
+
+        try:
+            await Driver.get_motor_collection().bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Driver location flush failed for {len(batch)} drivers: {str(e)}")
+            # Re-buffer positions that have not been superseded meanwhile
+            for driver_id, position in batch.items():
+                self._pending.setdefault(driver_id, position)
+            return 0
+
+        return len(batch)
+
+    async def start(self):
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Driver location ingest started, flushing every {self.flush_interval}s")
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still buffered"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                written = await self.flush()
+                if written:
+                    logger.debug(f"Flushed locations for {written} drivers")
+            except Exception as e:
+                logger.error(f"Driver location flush loop error: {str(e)}")
+
+location_ingest = LocationIngestBuffer()
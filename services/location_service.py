@@ -1,6 +1,8 @@
-import math
 from typing import List, Tuple, Optional
 from models.mongo_models import ServiceProvider, Driver, DriverStatus, Order
+from services.driver_index import driver_index
+from utils.geo_distance import haversine_km
+from beanie import UpdateResponse
 from bson import ObjectId
 from datetime import datetime
 import logging
@@ -15,18 +17,12 @@ class LocationService:
         on the earth (specified in decimal degrees)
         Returns distance in kilometers
         """
-        # Convert decimal degrees to radians
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+        return haversine_km(lat1, lon1, lat2, lon2)
 
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Radius of earth in kilometers
-        r = 6371
-        return c * r
+    @staticmethod
+    def _geo_point(latitude: float, longitude: float) -> dict:
+        """GeoJSON point for $geoNear/$nearSphere (coordinates are [lng, lat])"""
+        return {"type": "Point", "coordinates": [longitude, latitude]}
 
     @staticmethod
     async def find_nearby_providers(
@@ -39,54 +35,25 @@ class LocationService:
         Find service providers within a given radius, sorted by distance
         Returns list of tuples (provider, distance_km)
         """
-        # Use MongoDB's geospatial query to find nearby providers
-        providers = await ServiceProvider.find(
+        # $geoNear uses the 2dsphere index on `location` and returns
+        # candidates already sorted by distance (in meters)
+        results = await ServiceProvider.aggregate([
             {
-                "is_active": True,
-                "$and": [
-                    {
-                        "$expr": {
-                            "$lte": [
-                                {
-                                    "$sqrt": {
-                                        "$add": [
-                                            {
-                                                "$pow": [
-                                                    {"$subtract": ["$latitude", latitude]},
-                                                    2
-                                                ]
-                                            },
-                                            {
-                                                "$pow": [
-                                                    {"$subtract": ["$longitude", longitude]},
-                                                    2
-                                                ]
-                                            }
-                                        ]
-                                    }
-                                },
-                                max_radius / 111.0  # Convert km to degrees (approximate)
-                            ]
-                        }
-                    }
-                ]
+                "$geoNear": {
+                    "near": LocationService._geo_point(latitude, longitude),
+                    "distanceField": "distance",
+                    "maxDistance": max_radius * 1000,
+                    "spherical": True,
+                    "query": {"is_active": True}
+                }
             }
-        ).to_list()
+        ]).to_list()
 
         nearby_providers = []
-        
-        for provider in providers:
-            distance = LocationService.calculate_distance(
-                latitude, longitude,
-                provider.latitude, provider.longitude
-            )
-            
-            # Check if provider is within max radius
-            if distance <= max_radius:
-                nearby_providers.append((provider, distance))
+        for doc in results:
+            distance = doc.pop("distance") / 1000
+            nearby_providers.append((ServiceProvider.model_validate(doc), distance))
 
-        # Sort by distance
-        nearby_providers.sort(key=lambda x: x[1])
         return nearby_providers
 
     @staticmethod
@@ -99,57 +66,38 @@ class LocationService:
         Find available drivers within a given radius, sorted by distance
         Returns list of tuples (driver, distance_km)
         """
-        # Use MongoDB's geospatial query to find nearby drivers
-        drivers = await Driver.find(
+        # Answer from the in-memory index once it is loaded
+        if driver_index.is_ready:
+            return driver_index.query(latitude, longitude, max_radius)
+
+        results = await Driver.aggregate([
             {
-                "status": DriverStatus.AVAILABLE,
-                "is_active": True,
-                "current_latitude": {"$ne": None},
-                "current_longitude": {"$ne": None},
-                "$and": [
-                    {
-                        "$expr": {
-                            "$lte": [
-                                {
-                                    "$sqrt": {
-                                        "$add": [
-                                            {
-                                                "$pow": [
-                                                    {"$subtract": ["$current_latitude", latitude]},
-                                                    2
-                                                ]
-                                            },
-                                            {
-                                                "$pow": [
-                                                    {"$subtract": ["$current_longitude", longitude]},
-                                                    2
-                                                ]
-                                            }
-                                        ]
-                                    }
-                                },
-                                max_radius / 111.0  # Convert km to degrees (approximate)
-                            ]
-                        }
+                "$geoNear": {
+                    "near": LocationService._geo_point(latitude, longitude),
+                    "distanceField": "distance",
+                    "maxDistance": max_radius * 1000,
+                    "spherical": True,
+                    "query": {
+                        "status": DriverStatus.AVAILABLE,
+                        "is_active": True
                     }
-                ]
-            }
-        ).to_list()
+                }
+            },
+            # Driver must also be within their own service radius
+            {
+                "$match": {
+                    "$expr": {"$lte": ["$distance", {"$multiply": ["$service_radius", 1000]}]}
+                }
+            },
+            # Sort by distance and rating
+            {"$sort": {"distance": 1, "rating": -1}}
+        ]).to_list()
 
         nearby_drivers = []
-        
-        for driver in drivers:
-            distance = LocationService.calculate_distance(
-                latitude, longitude,
-                driver.current_latitude, driver.current_longitude
-            )
-            
-            # Check if driver is within their service radius and our max radius
-            if distance <= min(driver.service_radius, max_radius):
-                nearby_drivers.append((driver, distance))
+        for doc in results:
+            distance = doc.pop("distance") / 1000
+            nearby_drivers.append((Driver.model_validate(doc), distance))
 
-        # Sort by distance and rating
-        nearby_drivers.sort(key=lambda x: (x[1], -x[0].rating))
         return nearby_drivers
 
     @staticmethod
@@ -158,17 +106,22 @@ class LocationService:
         latitude: float,
         longitude: float
     ) -> Optional[Driver]:
-        """Update driver's current location"""
+        """Update driver's current location ($set on the location fields only)"""
         try:
-            driver = await Driver.get(ObjectId(driver_id))
+            now = datetime.utcnow()
+            driver = await Driver.find_one({"_id": ObjectId(driver_id)}).update(
+                {"$set": {
+                    "current_latitude": latitude,
+                    "current_longitude": longitude,
+                    "location": {"type": "Point", "coordinates": [longitude, latitude]},
+                    "last_location_update": now
+                }},
+                response_type=UpdateResponse.NEW_DOCUMENT
+            )
             if not driver:
                 return None
 
-            driver.current_latitude = latitude
-            driver.current_longitude = longitude
-            driver.last_location_update = datetime.utcnow()
-            await driver.save()
-
+            driver_index.upsert(driver)
             return driver
         except Exception as e:
             logger.error(f"Error updating driver location: {str(e)}")
@@ -180,39 +133,18 @@ class LocationService:
         longitude: float,
         radius: float = 10.0
     ) -> List[Driver]:
-        """Get all active drivers in a specific area"""
+        """Get all active drivers in a specific area, nearest first"""
         try:
             return await Driver.find(
                 {
                     "is_active": True,
                     "status": {"$in": [DriverStatus.AVAILABLE, DriverStatus.ON_DELIVERY]},
-                    "$and": [
-                        {
-                            "$expr": {
-                                "$lte": [
-                                    {
-                                        "$sqrt": {
-                                            "$add": [
-                                                {
-                                                    "$pow": [
-                                                        {"$subtract": ["$current_latitude", latitude]},
-                                                        2
-                                                    ]
-                                                },
-                                                {
-                                                    "$pow": [
-                                                        {"$subtract": ["$current_longitude", longitude]},
-                                                        2
-                                                    ]
-                                                }
-                                            ]
-                                        }
-                                    },
-                                    radius / 111.0  # Convert km to degrees (approximate)
-                                ]
-                            }
+                    "location": {
+                        "$nearSphere": {
+                            "$geometry": LocationService._geo_point(latitude, longitude),
+                            "$maxDistance": radius * 1000
                         }
-                    ]
+                    }
                 }
             ).to_list()
         except Exception as e:
@@ -225,43 +157,49 @@ class LocationService:
         longitude: float,
         radius: float = 10.0
     ) -> List[ServiceProvider]:
-        """Get all active service providers in a specific area"""
+        """Get all active service providers in a specific area, nearest first"""
         try:
             return await ServiceProvider.find(
                 {
                     "is_active": True,
                     "is_available": True,
-                    "$and": [
-                        {
-                            "$expr": {
-                                "$lte": [
-                                    {
-                                        "$sqrt": {
-                                            "$add": [
-                                                {
-                                                    "$pow": [
-                                                        {"$subtract": ["$latitude", latitude]},
-                                                        2
-                                                    ]
-                                                },
-                                                {
-                                                    "$pow": [
-                                                        {"$subtract": ["$longitude", longitude]},
-                                                        2
-                                                    ]
-                                                }
-                                            ]
-                                        }
-                                    },
-                                    radius / 111.0  # Convert km to degrees (approximate)
-                                ]
-                            }
+                    "location": {
+                        "$nearSphere": {
+                            "$geometry": LocationService._geo_point(latitude, longitude),
+                            "$maxDistance": radius * 1000
                         }
-                    ]
+                    }
                 }
             ).to_list()
         except Exception as e:
             logger.error(f"Error getting active providers in area: {str(e)}")
             return []
 
+    @staticmethod
+    async def backfill_locations() -> dict:
+        """
+        Populate the GeoJSON `location` field for providers and drivers
+        stored before it existed. Safe to run repeatedly.
+        """
+        providers = await ServiceProvider.get_motor_collection().update_many(
+            {
+                "location": None,
+                "latitude": {"$ne": None},
+                "longitude": {"$ne": None}
+            },
+            [{"$set": {"location": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}]
+        )
+        drivers = await Driver.get_motor_collection().update_many(
+            {
+                "location": None,
+                "current_latitude": {"$ne": None},
+                "current_longitude": {"$ne": None}
+            },
+            [{"$set": {"location": {"type": "Point", "coordinates": ["$current_longitude", "$current_latitude"]}}}]
+        )
+        return {
+            "service_providers": providers.modified_count,
+            "drivers": drivers.modified_count
+        }
+
 location_service = LocationService()
\ No newline at end of file
@@ -0,0 +1,149 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from bson import ObjectId
+from models.mongo_models import Notification, NotificationArchive
+from services.notification_counter import notification_counters
+from core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class NotificationArchiveService:
+    """
+    Keeps the notifications collection down to recent and unread documents.
+
+    Read notifications older than NOTIFICATION_ARCHIVE_AFTER_DAYS are copied
+    into notifications_archive with $merge (fewer fields and indexes, same
+    _id) and then deleted, one batch at a time so each step touches a
+    bounded number of documents. A batch interrupted between the two steps
+    is simply merged again.
+
+    Expiry never touches unread notifications through the TTL monitor: the
+    notifications TTL index only covers read ones (expires_at is set when a
+    notification is read), so unread counters stay exact. Unread
+    notifications older than NOTIFICATION_UNREAD_RETENTION_DAYS are deleted
+    here instead, adjusting each user's counter by what was removed.
+    """
+
+    def __init__(self):
+        self.archive_after = timedelta(days=settings.NOTIFICATION_ARCHIVE_AFTER_DAYS)
+        self.unread_retention_days = settings.NOTIFICATION_UNREAD_RETENTION_DAYS
+        self.batch_size = settings.NOTIFICATION_ARCHIVE_BATCH_SIZE
+        self.interval = settings.NOTIFICATION_ARCHIVE_INTERVAL_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    async def archive(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Move eligible read notifications to the archive; returns batch and document counts"""
+        notifications = Notification.get_motor_collection()
+        cutoff = datetime.utcnow() - self.archive_after
+        batches = 0
+        archived = 0
+
+        while max_batches is None or batches < max_batches:
+            ids = [
+                doc["_id"] async for doc in notifications.find(
+                    {"is_read": True, "created_at": {"$lt": cutoff}}, {"_id": 1}
+                ).sort("created_at", 1).limit(self.batch_size)
+            ]
+            if not ids:
+                break
+
+            await notifications.aggregate([
+                {"$match": {"_id": {"$in": ids}}},
+                {"$project": {
+                    "user_id": 1,
+                    "title": 1,
+                    "message": 1,
+                    "type": 1,
+                    "data": 1,
+                    "created_at": 1,
+                    "expires_at": 1,
+                    "archived_at": {"$literal": datetime.utcnow()}
+                }},
+                {"$merge": {
+                    "into": NotificationArchive.Settings.name,
+                    "on": "_id",
+                    "whenMatched": "keepExisting",
+                    "whenNotMatched": "insert"
+                }}
+            ]).to_list(length=None)
+            result = await notifications.delete_many({"_id": {"$in": ids}, "is_read": True})
+
+            batches += 1
+            archived += result.deleted_count
+            # Let API requests in between batches
+            await asyncio.sleep(0)
+
+        if archived:
+            logger.info(f"Archived {archived} read notifications in {batches} batches")
+        return {"batches": batches, "archived": archived}
+
+    async def expire_unread(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Delete unread notifications past NOTIFICATION_UNREAD_RETENTION_DAYS, keeping counters in step"""
+        if self.unread_retention_days <= 0:
+            return {"batches": 0, "deleted": 0}
+        notifications = Notification.get_motor_collection()
+        cutoff = datetime.utcnow() - timedelta(days=self.unread_retention_days)
+        batches = 0
+        deleted = 0
+
+        while max_batches is None or batches < max_batches:
+            docs = await notifications.find(
+                {"is_read": False, "created_at": {"$lt": cutoff}}, {"_id": 1, "user_id": 1}
+            ).sort("created_at", 1).limit(self.batch_size).to_list(length=None)
+            if not docs:
+                break
+
+            ids_by_user: Dict[ObjectId, List[ObjectId]] = defaultdict(list)
+            for doc in docs:
+                ids_by_user[doc["user_id"]].append(doc["_id"])
+            for user_id, ids in ids_by_user.items():
+                # Still unread: one read meanwhile was already counted down by mark_as_read
+                result = await notifications.delete_many({"_id": {"$in": ids}, "is_read": False})
+                if result.deleted_count:
+                    await notification_counters.adjust(str(user_id), -result.deleted_count)
+                deleted += result.deleted_count
+
+            batches += 1
+            await asyncio.sleep(0)
+
+        if deleted:
+            logger.info(f"Deleted {deleted} unread notifications older than {self.unread_retention_days} days")
+        return {"batches": batches, "deleted": deleted}
+
+    @staticmethod
+    async def backfill_expiry() -> int:
+        """Give read notifications from before the retention policy an expires_at (from created_at)"""
+        if settings.NOTIFICATION_RETENTION_DAYS <= 0:
+            return 0
+        retention_ms = settings.NOTIFICATION_RETENTION_DAYS * 24 * 3600 * 1000
+        result = await Notification.get_motor_collection().update_many(
+            {"is_read": True, "expires_at": None},
+            [{"$set": {"expires_at": {"$add": ["$created_at", retention_ms]}}}]
+        )
+        return result.modified_count
+
+    async def start(self):
+        """Start periodic archival"""
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._archive_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _archive_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.expire_unread()
+                await self.archive()
+            except Exception as e:
+                logger.error(f"Notification archival failed: {str(e)}")
+
+notification_archive = NotificationArchiveService()
@@ -0,0 +1,170 @@
+import asyncio
+import math
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+from bson import ObjectId
+from models.mongo_models import User, Order, NotificationBroadcastJob, BroadcastJobStatus
+from schemas.notification import BroadcastTarget, NotificationBroadcast
+from services.notification_service import notification_service
+from core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+KM_PER_DEGREE = 111.0
+
+class NotificationBroadcastService:
+    """
+    Manager broadcasts to many users.
+
+    Recipients are streamed from a users cursor (or from the distinct
+    customers of matching orders, checked against the user filters a chunk
+    at a time) straight into NotificationService.create_notifications_bulk,
+    so memory stays bounded by one chunk. Each broadcast runs as a background
+    task whose progress is written to a NotificationBroadcastJob after every
+    batch and can be polled from any worker. A job interrupted by shutdown is
+    marked FAILED with the counts it reached.
+    """
+
+    def __init__(self):
+        self.chunk_size = settings.NOTIFICATION_BULK_CHUNK_SIZE
+        self._tasks: Dict[ObjectId, asyncio.Task] = {}
+
+    @staticmethod
+    def has_filters(target: BroadcastTarget) -> bool:
+        return bool(target.roles or target.order_statuses or target.radius_km)
+
+    @staticmethod
+    def _order_query(target: BroadcastTarget) -> Optional[Dict[str, Any]]:
+        query: Dict[str, Any] = {}
+        if target.order_statuses:
+            query["status"] = {"$in": [s.value for s in target.order_statuses]}
+        if target.radius_km:
+            lat, lng, radius = target.latitude, target.longitude, target.radius_km
+            lng_scale = max(math.cos(math.radians(lat)), 0.01)
+            lat_delta = radius / KM_PER_DEGREE
+            lng_delta = radius / (KM_PER_DEGREE * lng_scale)
+            # Bounding box served by the (pickup_latitude, pickup_longitude) index
+            query["pickup_latitude"] = {"$gte": lat - lat_delta, "$lte": lat + lat_delta}
+            query["pickup_longitude"] = {"$gte": lng - lng_delta, "$lte": lng + lng_delta}
+            # Trim the corners: equirectangular distance, squared, in km
+            query["$expr"] = {"$lte": [
+                {"$add": [
+                    {"$pow": [{"$multiply": [{"$subtract": ["$pickup_latitude", lat]}, KM_PER_DEGREE]}, 2]},
+                    {"$pow": [{"$multiply": [{"$subtract": ["$pickup_longitude", lng]}, KM_PER_DEGREE * lng_scale]}, 2]}
+                ]},
+                radius * radius
+            ]}
+        return query or None
+
+    async def recipients(self, target: BroadcastTarget) -> AsyncIterator[ObjectId]:
+        """Ids of active users matching every filter in target, each once"""
+        user_query: Dict[str, Any] = {"is_active": True}
+        if target.roles:
+            user_query["role"] = {"$in": [r.value for r in target.roles]}
+        users = User.get_motor_collection()
+
+        order_query = self._order_query(target)
+        if order_query is None:
+            async for user in users.find(user_query, {"_id": 1}, batch_size=self.chunk_size):
+                yield user["_id"]
+            return
+
+        async def matching(batch: List[ObjectId]) -> List[ObjectId]:
+            cursor = users.find({**user_query, "_id": {"$in": batch}}, {"_id": 1})
+            return [user["_id"] async for user in cursor]
+
+        batch: List[ObjectId] = []
+        async for row in Order.get_motor_collection().aggregate(
+            [{"$match": order_query}, {"$group": {"_id": "$user_id"}}],
+            allowDiskUse=True,
+            batchSize=self.chunk_size
+        ):
+            batch.append(row["_id"])
+            if len(batch) >= self.chunk_size:
+                for user_id in await matching(batch):
+                    yield user_id
+                batch = []
+        if batch:
+            for user_id in await matching(batch):
+                yield user_id
+
+    async def start_broadcast(self, broadcast: NotificationBroadcast, created_by: User) -> NotificationBroadcastJob:
+        """Record the job and start sending in the background"""
+        job = NotificationBroadcastJob(
+            created_by=created_by.id,
+            title=broadcast.title,
+            message=broadcast.message,
+            type=broadcast.type,
+            data=broadcast.data,
+            target=broadcast.target.model_dump(mode="json", exclude_none=True)
+        )
+        await job.insert()
+        task = asyncio.create_task(self._run(job.id, broadcast))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        return job
+
+    async def _run(self, job_id: ObjectId, broadcast: NotificationBroadcast):
+        jobs = NotificationBroadcastJob.get_motor_collection()
+        started = datetime.utcnow()
+        await jobs.update_one({"_id": job_id}, {"$set": {
+            "status": BroadcastJobStatus.RUNNING.value,
+            "started_at": started
+        }})
+
+        async def record_progress(stats: Dict[str, Any]):
+            await jobs.update_one({"_id": job_id}, {"$set": {
+                "recipients": stats["recipients"],
+                "sent": stats["sent"],
+                "failed": stats["failed"]
+            }})
+
+        final: Dict[str, Any]
+        try:
+            stats = await notification_service.create_notifications_bulk(
+                self.recipients(broadcast.target),
+                title=broadcast.title,
+                message=broadcast.message,
+                notification_type=broadcast.type,
+                data=broadcast.data,
+                chunk_size=self.chunk_size,
+                on_progress=record_progress
+            )
+            final = {
+                "status": BroadcastJobStatus.COMPLETED.value,
+                "recipients": stats["recipients"],
+                "sent": stats["sent"],
+                "failed": stats["failed"]
+            }
+            logger.info(
+                f"Broadcast {job_id}: {stats['sent']} sent, {stats['failed']} failed "
+                f"in {stats['elapsed_seconds']}s ({stats['per_second']}/s)"
+            )
+        except asyncio.CancelledError:
+            final = {"status": BroadcastJobStatus.FAILED.value, "error": "Interrupted by shutdown"}
+            await jobs.update_one({"_id": job_id}, {"$set": {**final, "finished_at": datetime.utcnow()}})
+            raise
+        except Exception as e:
+            logger.error(f"Broadcast {job_id} failed: {str(e)}")
+            final = {"status": BroadcastJobStatus.FAILED.value, "error": str(e)}
+
+        await jobs.update_one({"_id": job_id}, {"$set": {**final, "finished_at": datetime.utcnow()}})
+
+    async def stop(self):
+        """Cancel running broadcasts; their jobs are marked FAILED"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_job(self, job_id: str) -> Optional[NotificationBroadcastJob]:
+        if not ObjectId.is_valid(job_id):
+            return None
+        return await NotificationBroadcastJob.get(job_id)
+
+    async def list_jobs(self, skip: int = 0, limit: int = 50) -> List[NotificationBroadcastJob]:
+        """Most recent jobs first"""
+        return await NotificationBroadcastJob.find().sort("-created_at").skip(skip).limit(limit).to_list()
+
+notification_broadcasts = NotificationBroadcastService()
@@ -0,0 +1,118 @@
+import asyncio
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+import orjson
+from core.config import settings
+from core.redis import get_redis
+from core.responses import orjson_default
+import logging
+
+logger = logging.getLogger(__name__)
+
+PUSH_CHANNEL = "notifications:push"
+
+class NotificationBroker:
+    """
+    Per-user fan-out of notification events to open WebSocket/SSE connections.
+
+    Each connection owns a bounded queue registered under its user id; a
+    slow client loses its oldest undelivered events rather than blocking
+    publishers (it can always re-read the notification list). Events are
+    serialized once per publish. With REDIS_ENABLED every publish is also
+    sent on PUSH_CHANNEL so connections held by other workers receive it;
+    each worker skips its own messages, which it has already delivered.
+    """
+
+    def __init__(self):
+        self.queue_size = settings.NOTIFICATION_STREAM_QUEUE_SIZE
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._origin = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+
+    def connection_count(self, user_id: Optional[str] = None) -> int:
+        if user_id is not None:
+            return len(self._subscribers.get(user_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    @asynccontextmanager
+    async def connect(self, user_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Register a connection for the duration of the block; yields its queue of JSON strings"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[user_id].add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    async def publish(self, user_id: str, event: str, data: Dict[str, Any]) -> None:
+        """Push an event to the user's connections on every worker; never raises"""
+        await self.publish_many([(user_id, event, data)])
+
+    async def publish_many(self, events: Iterable[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Push (user_id, event, data) events; other workers get them in one Redis message"""
+        messages: List[Tuple[str, str]] = []
+        for user_id, event, data in events:
+            try:
+                message = orjson.dumps({"event": event, "data": data}, default=orjson_default).decode()
+            except TypeError as e:
+                logger.error(f"Notification event for {user_id} is not serializable: {str(e)}")
+                continue
+            self._deliver(user_id, message)
+            messages.append((user_id, message))
+
+        redis = get_redis()
+        if redis is None or not messages:
+            return
+        try:
+            await redis.publish(PUSH_CHANNEL, orjson.dumps({
+                "origin": self._origin,
+                "messages": messages
+            }).decode())
+        except Exception as e:
+            logger.warning(f"Notification push via Redis failed for {len(messages)} events: {str(e)}")
+
+    def _deliver(self, user_id: str, message: str):
+        for queue in tuple(self._subscribers.get(user_id, ())):
+            if queue.full():
+                # Drop the oldest event for a client that is not keeping up
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def start(self):
+        """Receive events published by other workers (Redis only)"""
+        if self._task or get_redis() is None:
+            return
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = get_redis().pubsub()
+                await pubsub.subscribe(PUSH_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    envelope = orjson.loads(message["data"])
+                    if envelope.get("origin") == self._origin:
+                        continue
+                    for user_id, event_message in envelope["messages"]:
+                        self._deliver(user_id, event_message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification push listener error: {str(e)}")
+                await asyncio.sleep(5)
+
+notification_broker = NotificationBroker()
@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from models.mongo_models import Notification, NotificationCounter
+from services.notification_broker import notification_broker
+from core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_BATCH_SIZE = 1000
+
+class NotificationCounterService:
+    """
+    Unread notification count per user, kept in notification_counters (one
+    document per user, _id = user id) so a badge request is a single _id
+    lookup instead of counting notifications.
+
+    NotificationService adjusts the counter with $inc after every change to
+    a user's unread set and the new value is pushed to open notification
+    streams. A missing counter is seeded from a count on first use. A
+    periodic reconciliation recomputes counters from the notifications
+    collection to repair drift; counters touched while it runs are skipped.
+    """
+
+    def __init__(self):
+        self.reconcile_interval = settings.NOTIFICATION_COUNTER_RECONCILE_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self, user_id: str) -> int:
+        doc = await NotificationCounter.get_motor_collection().find_one({"_id": ObjectId(user_id)})
+        if doc is None:
+            return await self._seed(ObjectId(user_id))
+        return max(0, doc["unread_count"])
+
+    async def adjust(self, user_id: str, delta: int) -> int:
+        """Apply a change that has already been written to notifications"""
+        oid = ObjectId(user_id)
+        doc = await NotificationCounter.get_motor_collection().find_one_and_update(
+            {"_id": oid},
+            {"$inc": {"unread_count": delta}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        # Without a counter the change is already part of the seeding count
+        count = max(0, doc["unread_count"]) if doc else await self._seed(oid)
+        await notification_broker.publish(user_id, "unread_count", {"unread_count": count})
+        return count
+
+    async def adjust_many(self, user_ids: Sequence[ObjectId], delta: int = 1) -> None:
+        """adjust() for a batch of users in one bulk write; missing counters are seeded on next read"""
+        if not user_ids:
+            return
+        collection = NotificationCounter.get_motor_collection()
+        now = datetime.utcnow()
+        await collection.bulk_write([
+            UpdateOne({"_id": user_id}, {"$inc": {"unread_count": delta}, "$set": {"updated_at": now}})
+            for user_id in user_ids
+        ], ordered=False)
+        await notification_broker.publish_many([
+            (str(doc["_id"]), "unread_count", {"unread_count": max(0, doc["unread_count"])})
+            async for doc in collection.find({"_id": {"$in": list(user_ids)}}, {"unread_count": 1})
+        ])
+
+    @staticmethod
+    async def _seed(user_oid: ObjectId) -> int:
+        count = await Notification.find({"user_id": user_oid, "is_read": False}).count()
+        doc = await NotificationCounter.get_motor_collection().find_one_and_update(
+            {"_id": user_oid},
+            {"$setOnInsert": {"unread_count": count, "updated_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return max(0, doc["unread_count"])
+
+    async def reconcile(self) -> Dict[str, int]:
+        """Correct every existing counter that disagrees with the notifications collection"""
+        started = datetime.utcnow()
+        counts: Dict[ObjectId, int] = {}
+        async for row in Notification.get_motor_collection().aggregate([
+            {"$match": {"is_read": False}},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}}
+        ]):
+            counts[row["_id"]] = row["count"]
+
+        counters = NotificationCounter.get_motor_collection()
+        checked = 0
+        corrected = 0
+        ops: List[UpdateOne] = []
+        async for doc in counters.find({"updated_at": {"$lt": started}}, {"unread_count": 1}):
+            checked += 1
+            expected = counts.get(doc["_id"], 0)
+            if doc["unread_count"] == expected:
+                continue
+            ops.append(UpdateOne(
+                {"_id": doc["_id"], "updated_at": {"$lt": started}},
+                {"$set": {"unread_count": expected, "updated_at": started}}
+            ))
+            if len(ops) >= RECONCILE_BATCH_SIZE:
+                corrected += (await counters.bulk_write(ops, ordered=False)).modified_count
+                ops = []
+        if ops:
+            corrected += (await counters.bulk_write(ops, ordered=False)).modified_count
+
+        if corrected:
+            logger.warning(f"Notification counter reconciliation corrected {corrected} of {checked} counters")
+        return {"checked": checked, "corrected": corrected}
+
+    async def start(self):
+        """Start periodic reconciliation"""
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Notification counter reconciliation failed: {str(e)}")
+
+notification_counters = NotificationCounterService()
@@ -1,9 +1,38 @@
-from typing import List, Optional
-from datetime import datetime
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from datetime import datetime, timedelta
 from models.mongo_models import Notification
 from schemas.notification import NotificationCreate, NotificationType, NotificationCategory
 from models.mongo_models import User
 from bson import ObjectId
+from beanie import PydanticObjectId, UpdateResponse
+from pymongo.errors import BulkWriteError
+from utils.pagination import keyset_filter, KEYSET_SORT
+from services.notification_broker import notification_broker
+from services.notification_counter import notification_counters
+from core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+def notification_payload(notification: Notification) -> dict:
+    """API/push representation of a notification"""
+    return {
+        "id": str(notification.id),
+        "user_id": str(notification.user_id),
+        "title": notification.title,
+        "message": notification.message,
+        "type": notification.type,
+        "is_read": notification.is_read,
+        "data": notification.data,
+        "created_at": notification.created_at
+    }
+
+def default_expiry() -> Optional[datetime]:
+    """expires_at for a notification being read, under NOTIFICATION_RETENTION_DAYS (0 = keep)"""
+    if settings.NOTIFICATION_RETENTION_DAYS <= 0:
+        return None
+    return datetime.utcnow() + timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
 
 class NotificationService:
     @staticmethod
@@ -23,38 +52,135 @@ class NotificationService:
             data=data
         )
         await notification.insert()
+        await notification_broker.publish(str(notification.user_id), "notification", notification_payload(notification))
+        await notification_counters.adjust(user_id, 1)
         return notification
 
+    @staticmethod
+    async def create_notifications_bulk(
+        user_ids: Union[Iterable[Any], AsyncIterable[Any]],
+        title: str,
+        message: str,
+        notification_type: str = "info",
+        data: Optional[dict] = None,
+        chunk_size: Optional[int] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Create the same notification for many users. Recipients are consumed
+        as they arrive (a cursor can be passed directly) and written in
+        unordered insert_many batches of chunk_size, so one bad document does
+        not stop the rest. Returns recipients/sent/failed/elapsed_seconds/
+        per_second; on_progress gets the same after every batch.
+        """
+        chunk_size = chunk_size or settings.NOTIFICATION_BULK_CHUNK_SIZE
+        started = time.perf_counter()
+        stats: Dict[str, Any] = {"recipients": 0, "sent": 0, "failed": 0, "elapsed_seconds": 0.0, "per_second": 0.0}
+
+        async def flush(batch: List[Any]):
+            sent = await NotificationService._insert_batch(batch, title, message, notification_type, data)
+            stats["recipients"] += len(batch)
+            stats["sent"] += sent
+            stats["failed"] += len(batch) - sent
+            elapsed = time.perf_counter() - started
+            stats["elapsed_seconds"] = round(elapsed, 3)
+            stats["per_second"] = round(stats["sent"] / elapsed, 1) if elapsed else 0.0
+            if on_progress:
+                await on_progress(dict(stats))
+
+        batch: List[Any] = []
+        if hasattr(user_ids, "__aiter__"):
+            async for user_id in user_ids:
+                batch.append(user_id)
+                if len(batch) >= chunk_size:
+                    await flush(batch)
+                    batch = []
+        else:
+            for user_id in user_ids:
+                batch.append(user_id)
+                if len(batch) >= chunk_size:
+                    await flush(batch)
+                    batch = []
+        if batch:
+            await flush(batch)
+        return stats
+
+    @staticmethod
+    async def _insert_batch(
+        user_ids: List[Any],
+        title: str,
+        message: str,
+        notification_type: str,
+        data: Optional[dict]
+    ) -> int:
+        """Insert one notification per user; returns how many were written"""
+        notifications = [
+            Notification(
+                id=PydanticObjectId(),
+                user_id=ObjectId(user_id),
+                title=title,
+                message=message,
+                type=notification_type,
+                data=data
+            )
+            for user_id in user_ids
+            if ObjectId.is_valid(user_id)
+        ]
+        if not notifications:
+            return 0
+        try:
+            await Notification.insert_many(notifications, ordered=False)
+            written = notifications
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            written = [n for i, n in enumerate(notifications) if i not in failed]
+            logger.warning(f"Bulk notification batch: {len(failed)} of {len(notifications)} inserts failed")
+        except Exception as e:
+            logger.error(f"Bulk notification batch of {len(notifications)} failed: {str(e)}")
+            return 0
+
+        await notification_broker.publish_many(
+            (str(n.user_id), "notification", notification_payload(n)) for n in written
+        )
+        await notification_counters.adjust_many([n.user_id for n in written], 1)
+        return len(written)
+
     @staticmethod
     async def get_user_notifications(
         user_id: str,
         skip: int = 0,
         limit: int = 50,
-        unread_only: bool = False
+        unread_only: bool = False,
+        cursor: Optional[str] = None
     ) -> List[Notification]:
-        """Get notifications for a user"""
+        """Get notifications for a user, newest first. `cursor` takes precedence over `skip`"""
         query = {"user_id": ObjectId(user_id)}
         
         if unread_only:
             query["is_read"] = False
         
-        notifications = await Notification.find(query).skip(skip).limit(limit).sort("-created_at").to_list()
+        find = Notification.find(keyset_filter(query, cursor)).sort(*KEYSET_SORT)
+        if not cursor:
+            find = find.skip(skip)
+        notifications = await find.limit(limit).to_list()
         return notifications
 
     @staticmethod
     async def mark_as_read(notification_id: str, user_id: str) -> Optional[Notification]:
         """Mark a notification as read"""
         try:
-            notification = await Notification.find_one({
-                "_id": ObjectId(notification_id),
-                "user_id": ObjectId(user_id)
-            })
-            
-            if notification and not notification.is_read:
-                notification.is_read = True
-                await notification.save()
-            
-            return notification
+            query = {"_id": ObjectId(notification_id), "user_id": ObjectId(user_id)}
+            # Only the request that flips is_read adjusts the unread counter;
+            # the retention period (TTL on read notifications) starts now
+            notification = await Notification.find_one({**query, "is_read": False}).update(
+                {"$set": {"is_read": True, "expires_at": default_expiry()}},
+                response_type=UpdateResponse.NEW_DOCUMENT
+            )
+            if notification:
+                await notification_counters.adjust(user_id, -1)
+                return notification
+
+            return await Notification.find_one(query)
         except Exception:
             return None
 
@@ -63,9 +189,12 @@ class NotificationService:
         """Mark all notifications as read for a user"""
         try:
             result = await Notification.find({"user_id": ObjectId(user_id), "is_read": False}).update_many(
-                {"$set": {"is_read": True}}
+                {"$set": {"is_read": True, "expires_at": default_expiry()}}
             )
-            return result.modified_count if result else 0
+            modified = result.modified_count if result else 0
+            if modified:
+                await notification_counters.adjust(user_id, -modified)
+            return modified
         except Exception:
             return 0
 
@@ -73,27 +202,26 @@ class NotificationService:
     async def delete_notification(notification_id: str, user_id: str) -> bool:
         """Delete a notification"""
         try:
-            notification = await Notification.find_one({
-                "_id": ObjectId(notification_id),
-                "user_id": ObjectId(user_id)
-            })
-            
-            if notification:
-                await notification.delete()
-                return True
-            return False
+            deleted = await Notification.get_motor_collection().find_one_and_delete(
+                {"_id": ObjectId(notification_id), "user_id": ObjectId(user_id)},
+                projection={"is_read": 1}
+            )
+            if not deleted:
+                return False
+            if not deleted.get("is_read"):
+                await notification_counters.adjust(user_id, -1)
+            return True
         except Exception:
             return False
 
     @staticmethod
     async def get_notification_count(user_id: str, unread_only: bool = False) -> int:
-        """Get notification count for a user"""
+        """Get notification count for a user; the unread count is read from its counter"""
         try:
-            query = {"user_id": ObjectId(user_id)}
             if unread_only:
-                query["is_read"] = False
-            
-            count = await Notification.find(query).count()
+                return await notification_counters.get(user_id)
+
+            count = await Notification.find({"user_id": ObjectId(user_id)}).count()
             return count
         except Exception:
             return 0
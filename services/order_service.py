@@ -1,7 +1,7 @@
 from fastapi import HTTPException
 from schemas.order import OrderCreate, OrderUpdate, OrderResponse, OrderItemCreate
 from models.mongo_models import Order, OrderItem, OrderStatus
-from services.assignment_service import assignment_service
+from services.assignment_queue import assignment_queue
 from typing import List
 import logging
 from bson import ObjectId
@@ -45,21 +45,16 @@ async def create_order_with_items(order: OrderCreate) -> Order:
             )
             new_order.items.append(order_item)
 
+        # Orders without a provider are assigned by the background workers
+        new_order.pending_assignment = (
+            new_order.service_provider_id is None and new_order.status == OrderStatus.PENDING
+        )
+
         # Save the order
         await new_order.insert()
 
-        # Auto-assign to service provider (if needed)
-        try:
-            assigned_provider = await assignment_service.assign_order_to_provider(
-                str(new_order.id)
-            )
-            if assigned_provider:
-                logger.info(f"Order {new_order.id} automatically assigned to provider {assigned_provider.id}")
-            else:
-                logger.warning(f"Could not auto-assign order {new_order.id}")
-        except Exception as e:
-            logger.error(f"Failed to auto-assign order {new_order.id}: {e}")
-            # Don't fail the entire order creation if assignment fails
+        if new_order.pending_assignment:
+            assignment_queue.enqueue(str(new_order.id))
 
         return new_order
     except Exception as e:
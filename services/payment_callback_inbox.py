@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from models.mongo_models import PaymentCallbackEvent, CallbackEventStatus, PaymentMethod
+from services.payment_service import payment_service
+from core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# handle_callback results that are final; anything else ("error") is retried
+FINAL_RESULT_STATUSES = {"success", "failed", "pending"}
+
+MAX_RETRY_DELAY_SECONDS = 3600
+
+def payload_idempotency_key(payment_method: PaymentMethod, payload: Dict[str, Any]) -> str:
+    """Key for a webhook delivered without an Idempotency-Key header"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{payment_method}:{canonical}".encode()).hexdigest()
+
+class PaymentCallbackInbox:
+    """
+    Durable inbox for payment gateway webhooks.
+
+    Callback endpoints only insert the raw payload into
+    payment_callback_events (one write, deduplicated by a unique idempotency
+    key) and acknowledge. A background consumer claims due events in
+    batches, applies them through PaymentService.handle_callback - which
+    verifies with the gateway and performs the guarded status transition -
+    and retries errors with exponential backoff. Events that still fail after
+    PAYMENT_CALLBACK_MAX_ATTEMPTS are marked FAILED and can be replayed.
+
+    Claims are leases (locked_until), so any number of app processes can run
+    the consumer and an event held by a crashed process is picked up again.
+    Events for the same transaction within a batch are applied in order.
+    """
+
+    def __init__(self):
+        self.batch_size = settings.PAYMENT_CALLBACK_BATCH_SIZE
+        self.max_attempts = settings.PAYMENT_CALLBACK_MAX_ATTEMPTS
+        self.retry_backoff = settings.PAYMENT_CALLBACK_RETRY_BACKOFF_SECONDS  # seconds
+        self.poll_interval = settings.PAYMENT_CALLBACK_POLL_SECONDS
+        self.lease = timedelta(seconds=settings.PAYMENT_CALLBACK_LEASE_SECONDS)
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    async def ingest(
+        self,
+        payment_method: PaymentMethod,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """Store a webhook; returns (event id, whether it was a duplicate delivery)"""
+        key = idempotency_key or payload_idempotency_key(payment_method, payload)
+        now = datetime.utcnow()
+        collection = PaymentCallbackEvent.get_motor_collection()
+        try:
+            inserted = await collection.insert_one({
+                "payment_method": payment_method.value,
+                "idempotency_key": key,
+                "payload": payload,
+                "status": CallbackEventStatus.PENDING.value,
+                "attempts": 0,
+                "last_error": None,
+                "result": None,
+                "received_at": now,
+                "next_attempt_at": now,
+                "locked_until": None,
+                "processed_at": None
+            })
+        except DuplicateKeyError:
+            existing = await collection.find_one({"idempotency_key": key}, {"_id": 1})
+            return (str(existing["_id"]) if existing else ""), True
+
+        self._wake.set()
+        return str(inserted.inserted_id), False
+
+    async def start(self):
+        """Start the background consumer"""
+        if self.is_running:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Payment callback consumer started")
+
+    async def stop(self):
+        """Stop the consumer; claimed events are released when their lease expires"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info("Payment callback consumer stopped")
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                processed = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Payment callback consumer error: {str(e)}")
+                processed = 0
+
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def process_batch(self) -> int:
+        """Claim and apply up to batch_size due events; returns how many were claimed"""
+        events = []
+        for _ in range(self.batch_size):
+            event = await self._claim()
+            if event is None:
+                break
+            events.append(event)
+        if not events:
+            return 0
+
+        # Same transaction -> same group, applied sequentially in arrival order
+        groups: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        for event in sorted(events, key=lambda e: e["received_at"]):
+            groups[await self._transaction_key(event)].append(event)
+
+        await asyncio.gather(*(self._process_group(group) for group in groups.values()))
+        return len(events)
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await PaymentCallbackEvent.get_motor_collection().find_one_and_update(
+            {"$or": [
+                {"status": CallbackEventStatus.PENDING.value, "next_attempt_at": {"$lte": now}},
+                # Lease expired: the process holding it stopped mid-event
+                {"status": CallbackEventStatus.PROCESSING.value, "locked_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {"status": CallbackEventStatus.PROCESSING.value, "locked_until": now + self.lease},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    async def _transaction_key(event: Dict[str, Any]):
+        try:
+            parsed = await payment_service.parse_callback(event["payload"], PaymentMethod(event["payment_method"]))
+            transaction_id = parsed.get("transaction_id")
+        except Exception:
+            transaction_id = None
+        return (event["payment_method"], transaction_id) if transaction_id else event["_id"]
+
+    async def _process_group(self, events: List[Dict[str, Any]]):
+        for event in events:
+            await self._process(event)
+
+    async def _process(self, event: Dict[str, Any]):
+        try:
+            result = await payment_service.handle_callback(
+                callback_data=event["payload"],
+                payment_method=PaymentMethod(event["payment_method"]),
+                idempotency_key=event["idempotency_key"]
+            )
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+
+        if result.get("status") in FINAL_RESULT_STATUSES:
+            await self._finish(event, {
+                "status": CallbackEventStatus.PROCESSED.value,
+                "result": result,
+                "last_error": None,
+                "processed_at": datetime.utcnow()
+            })
+            return
+
+        error = result.get("message", "Unknown error")
+        if event["attempts"] >= self.max_attempts:
+            logger.error(f"Payment callback {event['_id']} failed after {event['attempts']} attempts: {error}")
+            await self._finish(event, {"status": CallbackEventStatus.FAILED.value, "result": result, "last_error": error})
+            return
+
+        delay = min(self.retry_backoff * (2 ** (event["attempts"] - 1)), MAX_RETRY_DELAY_SECONDS)
+        logger.warning(f"Payment callback {event['_id']} attempt {event['attempts']} failed ({error}), retrying in {delay:.0f}s")
+        await self._finish(event, {
+            "status": CallbackEventStatus.PENDING.value,
+            "last_error": error,
+            "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay)
+        })
+
+    @staticmethod
+    async def _finish(event: Dict[str, Any], fields: Dict[str, Any]):
+        # Guarded on our own claim so a lease that expired and was re-claimed is not overwritten
+        await PaymentCallbackEvent.get_motor_collection().update_one(
+            {"_id": event["_id"], "status": CallbackEventStatus.PROCESSING.value, "locked_until": event["locked_until"]},
+            {"$set": {**fields, "locked_until": None}}
+        )
+
+    async def replay(self, event_id: Optional[str] = None) -> int:
+        """
+        Queue events again: one event by id (unless it is being processed),
+        or every FAILED event. Already-applied callbacks stay no-ops.
+        """
+        if event_id is not None:
+            if not ObjectId.is_valid(event_id):
+                return 0
+            query = {"_id": ObjectId(event_id), "status": {"$ne": CallbackEventStatus.PROCESSING.value}}
+        else:
+            query = {"status": CallbackEventStatus.FAILED.value}
+
+        result = await PaymentCallbackEvent.get_motor_collection().update_many(query, {"$set": {
+            "status": CallbackEventStatus.PENDING.value,
+            "attempts": 0,
+            "last_error": None,
+            "next_attempt_at": datetime.utcnow()
+        }})
+        if result.modified_count:
+            self._wake.set()
+        return result.modified_count
+
+    async def list_events(
+        self,
+        status: Optional[CallbackEventStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[PaymentCallbackEvent]:
+        """Most recent events first"""
+        query = {"status": status.value} if status else {}
+        return await PaymentCallbackEvent.find(query).sort("-received_at").skip(skip).limit(limit).to_list()
+
+payment_callback_inbox = PaymentCallbackInbox()
@@ -1,20 +1,50 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import httpx
+from core.config import settings
+from core.http_client import get_http_client, HTTP2_AVAILABLE
 
 class BasePaymentGateway(ABC):
     """Abstract base class for payment gateways"""
-    
+
+    # Name of this gateway's pooled client in core.http_client
+    client_name: str = "payment_gateway"
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        # http_client is injectable so a local mock gateway can be used
+        self._http_client = http_client
+
+    def client_options(self) -> Dict[str, Any]:
+        """Keep-alive pool settings for this gateway's client"""
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "timeout": httpx.Timeout(
+                settings.PAYMENT_GATEWAY_TIMEOUT_SECONDS,
+                connect=settings.PAYMENT_GATEWAY_CONNECT_TIMEOUT_SECONDS
+            ),
+            "limits": httpx.Limits(
+                max_connections=settings.PAYMENT_GATEWAY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PAYMENT_GATEWAY_MAX_KEEPALIVE,
+                keepalive_expiry=settings.PAYMENT_GATEWAY_KEEPALIVE_SECONDS
+            )
+        }
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared client, closed by close_http_clients() on shutdown"""
+        return self._http_client or get_http_client(self.client_name, **self.client_options())
+
     @abstractmethod
     async def initiate_payment(self, amount: float, order_id: int, return_url: str = None) -> Dict[str, Any]:
         """Initiate a payment transaction"""
         pass
-    
+
     @abstractmethod
     async def verify_payment(self, transaction_id: str) -> Dict[str, Any]:
         """Verify a payment transaction"""
         pass
-    
+
     @abstractmethod
     async def handle_callback(self, callback_data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle payment gateway callback"""
-        pass
\ No newline at end of file
+        pass
@@ -1,13 +1,16 @@
 import httpx
 import logging
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from services.payment_gateways.base_payment import BasePaymentGateway
 
 logger = logging.getLogger(__name__)
 
 class ChapaPaymentGateway(BasePaymentGateway):
-    def __init__(self, secret_key: str, base_url: str = "https://api.chapa.co/v1"):
+    client_name = "chapa"
+
+    def __init__(self, secret_key: str, base_url: str = "https://api.chapa.co/v1", http_client: Optional[httpx.AsyncClient] = None):
+        super().__init__(http_client)
         self.secret_key = secret_key
         self.base_url = base_url
         self.headers = {
@@ -44,29 +47,27 @@ class ChapaPaymentGateway(BasePaymentGateway):
         }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/transaction/initialize",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self.client.post(
+                f"{self.base_url}/transaction/initialize",
+                headers=self.headers,
+                json=payload
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("status") == "success":
+                return {
+                    "status": "success",
+                    "payment_url": data.get("data", {}).get("checkout_url"),
+                    "transaction_reference": payload["tx_ref"],
+                    "message": "Payment initiated successfully"
+                }
+            else:
+                return {
+                    "status": "error",
+                    "message": data.get("message", "Payment initiation failed")
+                }
                 
-                if data.get("status") == "success":
-                    return {
-                        "status": "success",
-                        "payment_url": data.get("data", {}).get("checkout_url"),
-                        "transaction_reference": payload["tx_ref"],
-                        "message": "Payment initiated successfully"
-                    }
-                else:
-                    return {
-                        "status": "error",
-                        "message": data.get("message", "Payment initiation failed")
-                    }
-                    
         except httpx.HTTPError as e:
             logger.error(f"Chapa payment initiation failed: {e}")
             raise Exception(f"Payment initiation failed: {str(e)}")
@@ -74,31 +75,29 @@ class ChapaPaymentGateway(BasePaymentGateway):
     async def verify_payment(self, transaction_id: str) -> Dict[str, Any]:
         """Verify Chapa payment"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/transaction/verify/{transaction_id}",
-                    headers=self.headers,
-                    timeout=30
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self.client.get(
+                f"{self.base_url}/transaction/verify/{transaction_id}",
+                headers=self.headers
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get("status") == "success":
+                payment_data = data.get("data", {})
+                return {
+                    "status": "success",
+                    "payment_status": payment_data.get("status"),
+                    "amount": payment_data.get("amount"),
+                    "currency": payment_data.get("currency"),
+                    "reference": payment_data.get("reference"),
+                    "tx_ref": payment_data.get("tx_ref")
+                }
+            else:
+                return {
+                    "status": "error",
+                    "message": data.get("message", "Payment verification failed")
+                }
                 
-                if data.get("status") == "success":
-                    payment_data = data.get("data", {})
-                    return {
-                        "status": "success",
-                        "payment_status": payment_data.get("status"),
-                        "amount": payment_data.get("amount"),
-                        "currency": payment_data.get("currency"),
-                        "reference": payment_data.get("reference"),
-                        "tx_ref": payment_data.get("tx_ref")
-                    }
-                else:
-                    return {
-                        "status": "error",
-                        "message": data.get("message", "Payment verification failed")
-                    }
-                    
         except httpx.HTTPError as e:
             logger.error(f"Chapa payment verification failed: {e}")
             raise Exception(f"Payment verification failed: {str(e)}")
@@ -108,7 +107,7 @@ class ChapaPaymentGateway(BasePaymentGateway):
         # Process the callback data according to Chapa's webhook format
         return {
             "status": callback_data.get("status"),
-            "transaction_id": callback_data.get("trx_ref"),
+            "transaction_id": callback_data.get("trx_ref") or callback_data.get("tx_ref") or callback_data.get("transaction_id"),
             "amount": callback_data.get("amount"),
             "reference": callback_data.get("reference"),
             "currency": callback_data.get("currency", "ETB")
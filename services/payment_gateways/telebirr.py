@@ -3,17 +3,24 @@ import logging
 import time
 import hashlib
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from services.payment_gateways.base_payment import BasePaymentGateway
 
 logger = logging.getLogger(__name__)
 
 class TelebirrPaymentGateway(BasePaymentGateway):
-    def __init__(self, app_id: str, app_key: str, base_url: str = "https://196.188.120.3:38443/apiaccess"):
+    client_name = "telebirr"
+
+    def __init__(self, app_id: str, app_key: str, base_url: str = "https://196.188.120.3:38443/apiaccess", http_client: Optional[httpx.AsyncClient] = None):
+        super().__init__(http_client)
         self.app_id = app_id
         self.app_key = app_key
         self.base_url = base_url
 
+    def client_options(self) -> Dict[str, Any]:
+        # Telebirr often uses self-signed certs
+        return {**super().client_options(), "verify": False}
+
     def _generate_signature(self, data: Dict[str, Any]) -> str:
         """Generate signature for Telebirr API"""
         # Sort the data by keys and create a string
@@ -50,27 +57,25 @@ class TelebirrPaymentGateway(BasePaymentGateway):
         payment_data["sign"] = self._generate_signature(payment_data)
 
         try:
-            async with httpx.AsyncClient(verify=False) as client:  # Telebirr often uses self-signed certs
-                response = await client.post(
-                    f"{self.base_url}/payment/v1/web",
-                    json=payment_data,
-                    timeout=30
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get("code") == "0":
-                    return {
-                        "status": "success",
-                        "payment_url": data.get("data", {}).get("toPayUrl"),
-                        "transaction_reference": payment_data["outTradeNo"],
-                        "message": "Payment initiated successfully"
-                    }
-                else:
-                    return {
-                        "status": "error",
-                        "message": data.get("msg", "Payment initiation failed")
-                    }
+            response = await self.client.post(
+                f"{self.base_url}/payment/v1/web",
+                json=payment_data
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get("code") == "0":
+                return {
+                    "status": "success",
+                    "payment_url": data.get("data", {}).get("toPayUrl"),
+                    "transaction_reference": payment_data["outTradeNo"],
+                    "message": "Payment initiated successfully"
+                }
+            else:
+                return {
+                    "status": "error",
+                    "message": data.get("msg", "Payment initiation failed")
+                }
 
         except httpx.HTTPError as e:
             logger.error(f"Telebirr payment initiation failed: {e}")
@@ -88,30 +93,28 @@ class TelebirrPaymentGateway(BasePaymentGateway):
         query_data["sign"] = self._generate_signature(query_data)
 
         try:
-            async with httpx.AsyncClient(verify=False) as client:
-                response = await client.post(
-                    f"{self.base_url}/payment/v1/query",
-                    json=query_data,
-                    timeout=30
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get("code") == "0":
-                    payment_info = data.get("data", {})
-                    return {
-                        "status": "success",
-                        "payment_status": payment_info.get("tradeStatus"),
-                        "amount": payment_info.get("totalAmount"),
-                        "currency": "ETB",
-                        "reference": payment_info.get("transactionNo"),
-                        "out_trade_no": payment_info.get("outTradeNo")
-                    }
-                else:
-                    return {
-                        "status": "error",
-                        "message": data.get("msg", "Payment verification failed")
-                    }
+            response = await self.client.post(
+                f"{self.base_url}/payment/v1/query",
+                json=query_data
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get("code") == "0":
+                payment_info = data.get("data", {})
+                return {
+                    "status": "success",
+                    "payment_status": payment_info.get("tradeStatus"),
+                    "amount": payment_info.get("totalAmount"),
+                    "currency": "ETB",
+                    "reference": payment_info.get("transactionNo"),
+                    "out_trade_no": payment_info.get("outTradeNo")
+                }
+            else:
+                return {
+                    "status": "error",
+                    "message": data.get("msg", "Payment verification failed")
+                }
 
         except httpx.HTTPError as e:
             logger.error(f"Telebirr payment verification failed: {e}")
@@ -120,9 +123,9 @@ class TelebirrPaymentGateway(BasePaymentGateway):
     async def handle_callback(self, callback_data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle Telebirr callback"""
         return {
-            "status": callback_data.get("tradeStatus"),
-            "transaction_id": callback_data.get("outTradeNo"),
-            "amount": callback_data.get("totalAmount"),
-            "reference": callback_data.get("transactionNo"),
+            "status": callback_data.get("tradeStatus") or callback_data.get("status"),
+            "transaction_id": callback_data.get("outTradeNo") or callback_data.get("transaction_id"),
+            "amount": callback_data.get("totalAmount") or callback_data.get("amount"),
+            "reference": callback_data.get("transactionNo") or callback_data.get("reference"),
             "currency": "ETB"
         }
\ No newline at end of file
@@ -1,18 +1,52 @@
-from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from bson import ObjectId
+from beanie import UpdateResponse
+from pymongo.errors import DuplicateKeyError
 from fastapi import HTTPException
 from models.mongo_models import Payment, PaymentStatus, PaymentMethod
 from models.mongo_models import Order
 from models.mongo_models import User
+from services.payment_gateways.base_payment import BasePaymentGateway
 from services.payment_gateways.chapa import ChapaPaymentGateway
 from services.payment_gateways.telebirr import TelebirrPaymentGateway
+from services.revenue_service import revenue_service
+from services.notification_service import notification_service
 from core.config import get_settings
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Gateway statuses, lowercased
+SUCCESS_STATUSES = {"success", "completed", "paid"}
+PENDING_STATUSES = {"pending", "processing", "waiting"}
+
+# target status -> statuses a payment may move from
+ALLOWED_TRANSITIONS = {
+    PaymentStatus.COMPLETED: [PaymentStatus.PENDING, PaymentStatus.FAILED],
+    PaymentStatus.FAILED: [PaymentStatus.PENDING],
+    PaymentStatus.CANCELLED: [PaymentStatus.PENDING],
+}
+
+def callback_idempotency_key(payment_method: PaymentMethod, transaction_id: str, status: str, reference: Optional[str]) -> str:
+    """Key identifying one gateway notification, used when the gateway sends none"""
+    raw = f"{payment_method}:{transaction_id}:{status}:{reference or ''}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
 class PaymentService:
+    """
+    Payments on the Payment document.
+
+    Every status change is a conditional update that only matches a payment
+    in one of ALLOWED_TRANSITIONS' source states, so concurrent verifications
+    and callbacks cannot complete a payment twice; the caller that wins the
+    transition records revenue and notifies the user. Callbacks also carry an
+    idempotency key that is stored on the payment in the same update, which
+    makes a redelivered webhook a no-op.
+    """
+
     def __init__(self):
         # Initialize payment gateways with settings
         self.chapa_gateway = ChapaPaymentGateway(
@@ -23,219 +57,275 @@ class PaymentService:
             app_key=getattr(settings, 'TELEBIRR_APP_KEY', '')
         )
 
+    def _gateway(self, payment_method: PaymentMethod) -> BasePaymentGateway:
+        if payment_method == PaymentMethod.CHAPA:
+            return self.chapa_gateway
+        if payment_method == PaymentMethod.TELEBIRR:
+            return self.telebirr_gateway
+        raise HTTPException(status_code=400, detail="Unsupported payment method")
+
     async def initiate_payment(
-        self, 
-        db: Session, 
-        order_id: int, 
+        self,
+        order_id: str,
         payment_method: PaymentMethod,
         user: User,
         return_url: Optional[str] = None
     ) -> Dict[str, Any]:
         """Initiate payment for an order"""
-        
-        # Get order details
-        order = db.query(Booking).filter(Booking.id == order_id).first()
+        gateway = self._gateway(payment_method)
+
+        if not ObjectId.is_valid(order_id):
+            raise HTTPException(status_code=404, detail="Order not found")
+        order = await Order.get(order_id)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
-        
+
         # Check if user owns the order or is admin/manager
         if order.user_id != user.id and not user.has_admin_access:
             raise HTTPException(status_code=403, detail="Not authorized to pay for this order")
-        
+
         # Check if order already has a completed payment
-        existing_payment = db.query(Payment).filter(
-            Payment.order_id == order_id,
-            Payment.status == PaymentStatus.COMPLETED
-        ).first()
-        
+        existing_payment = await Payment.find_one({
+            "order_id": order.id,
+            "status": PaymentStatus.COMPLETED
+        })
         if existing_payment:
             raise HTTPException(status_code=400, detail="Order already paid")
 
-        # Create payment record
+        amount = order.price_tag or order.subtotal
         payment = Payment(
-            order_id=order_id,
-            user_id=user.id,
-            amount=order.price_tag,
+            order_id=order.id,
+            user_id=order.user_id,
+            amount=amount,
             payment_method=payment_method,
             status=PaymentStatus.PENDING
         )
-        
-        db.add(payment)
-        db.commit()
-        db.refresh(payment)
+        await payment.insert()
 
         # Prepare customer data
+        names = (user.full_name or "").split()
         customer_data = {
             "email": user.email or f"user{user.id}@washlink.com",
-            "first_name": user.full_name.split()[0] if user.full_name else "Customer",
-            "last_name": " ".join(user.full_name.split()[1:]) if len(user.full_name.split()) > 1 else "Name",
-            "phone_number": user.phone
+            "first_name": names[0] if names else "Customer",
+            "last_name": " ".join(names[1:]) if len(names) > 1 else "Name",
+            "phone_number": user.phone_number
         }
 
         try:
-            # Initiate payment with selected gateway
-            if payment_method == PaymentMethod.CHAPA:
-                result = await self.chapa_gateway.initiate_payment(
-                    amount=order.price_tag,
-                    order_id=order_id,
-                    return_url=return_url,
-                    customer_data=customer_data
-                )
-            elif payment_method == PaymentMethod.TELEBIRR:
-                result = await self.telebirr_gateway.initiate_payment(
-                    amount=order.price_tag,
-                    order_id=order_id,
-                    return_url=return_url,
-                    customer_data=customer_data
-                )
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported payment method")
-
-            # Update payment with external reference
-            if result.get("status") == "success":
-                payment.external_transaction_id = result.get("transaction_reference")
-                db.commit()
-                
-                return {
-                    "status": "success",
-                    "payment_url": result.get("payment_url"),
-                    "transaction_reference": result.get("transaction_reference"),
-                    "message": result.get("message"),
-                    "payment_id": payment.id
-                }
-            else:
-                payment.status = PaymentStatus.FAILED
-                db.commit()
-                raise HTTPException(status_code=500, detail=result.get("message", "Payment initiation failed"))
-
+            result = await gateway.initiate_payment(
+                amount=amount,
+                order_id=str(order.id),
+                return_url=return_url,
+                customer_data=customer_data
+            )
         except Exception as e:
-            payment.status = PaymentStatus.FAILED
-            db.commit()
+            await self._transition({"_id": payment.id}, PaymentStatus.FAILED)
             logger.error(f"Payment initiation failed for order {order_id}: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
+        if result.get("status") != "success":
+            await self._transition({"_id": payment.id}, PaymentStatus.FAILED)
+            raise HTTPException(status_code=500, detail=result.get("message", "Payment initiation failed"))
+
+        # Record the gateway reference; it is unique across payments
+        try:
+            await Payment.find_one({"_id": payment.id, "external_transaction_id": None}).update(
+                {"$set": {"external_transaction_id": result.get("transaction_reference"), "updated_at": datetime.utcnow()}}
+            )
+        except DuplicateKeyError:
+            await self._transition({"_id": payment.id}, PaymentStatus.FAILED)
+            raise HTTPException(status_code=409, detail="A payment with this transaction reference already exists")
+
+        return {
+            "status": "success",
+            "payment_url": result.get("payment_url"),
+            "transaction_reference": result.get("transaction_reference"),
+            "message": result.get("message"),
+            "payment_id": str(payment.id)
+        }
+
     async def verify_payment(
-        self, 
-        db: Session, 
-        transaction_id: str, 
+        self,
+        transaction_id: str,
         payment_method: PaymentMethod
     ) -> Dict[str, Any]:
-        """Verify payment status"""
-        
-        try:
-            if payment_method == PaymentMethod.CHAPA:
-                result = await self.chapa_gateway.verify_payment(transaction_id)
-            elif payment_method == PaymentMethod.TELEBIRR:
-                result = await self.telebirr_gateway.verify_payment(transaction_id)
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported payment method")
-
-            # Update payment record if verification successful
-            if result.get("status") == "success":
-                payment = db.query(Payment).filter(
-                    Payment.external_transaction_id == transaction_id
-                ).first()
-                
-                if payment:
-                    payment_status = result.get("payment_status", "").lower()
-                    if payment_status in ["success", "completed", "paid"]:
-                        payment.status = PaymentStatus.COMPLETED
-                        payment.gateway_reference = result.get("reference")
-                        from datetime import datetime
-                        payment.completed_at = datetime.utcnow()
-                        
-                        # Update order status
-                        # Note: This needs to be updated for MongoDB
-                        # order = await Order.get(payment.order_id)
-                        # if order:
-                        #     order.status = OrderStatus.ACCEPTED  # Move to next stage after payment
-                        #     await order.save()
-                        
-                        db.commit()
-                        
-                        return {
-                            "status": "completed",
-                            "message": "Payment verified successfully",
-                            "amount": result.get("amount"),
-                            "reference": result.get("reference")
-                        }
-                    else:
-                        payment.status = PaymentStatus.FAILED
-                        db.commit()
-                        return {
-                            "status": "failed",
-                            "message": "Payment verification failed"
-                        }
-            
-            return result
+        """Verify payment status with the gateway and apply it"""
+        gateway = self._gateway(payment_method)
 
+        try:
+            result = await gateway.verify_payment(transaction_id)
         except Exception as e:
             logger.error(f"Payment verification failed for transaction {transaction_id}: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
+        if result.get("status") != "success":
+            return result
+
+        payment = await Payment.find_one({"external_transaction_id": transaction_id})
+        if not payment:
+            return result
+
+        payment_status = (result.get("payment_status") or "").lower()
+        if payment_status in SUCCESS_STATUSES:
+            await self._transition(
+                {"_id": payment.id},
+                PaymentStatus.COMPLETED,
+                gateway_reference=result.get("reference")
+            )
+            return {
+                "status": "completed",
+                "message": "Payment verified successfully",
+                "amount": result.get("amount"),
+                "reference": result.get("reference")
+            }
+
+        if payment_status in PENDING_STATUSES:
+            return {
+                "status": "pending",
+                "message": "Payment not completed yet"
+            }
+
+        await self._transition({"_id": payment.id}, PaymentStatus.FAILED)
+        return {
+            "status": "failed",
+            "message": "Payment verification failed"
+        }
+
     async def handle_callback(
-        self, 
-        db: Session, 
-        callback_data: Dict[str, Any], 
-        payment_method: PaymentMethod
+        self,
+        callback_data: Dict[str, Any],
+        payment_method: PaymentMethod,
+        idempotency_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Handle payment gateway callback"""
-        
+        """
+        Apply a gateway callback. Success callbacks are confirmed with the
+        gateway's verify endpoint, since callbacks are not authenticated.
+        """
         try:
-            if payment_method == PaymentMethod.CHAPA:
-                result = await self.chapa_gateway.handle_callback(callback_data)
-            elif payment_method == PaymentMethod.TELEBIRR:
-                result = await self.telebirr_gateway.handle_callback(callback_data)
-            else:
-                return {"status": "error", "message": "Unsupported payment method"}
+            gateway = self._gateway(payment_method)
+        except HTTPException:
+            return {"status": "error", "message": "Unsupported payment method"}
 
-            # Find and update payment record
+        try:
+            result = await self.parse_callback(callback_data, payment_method)
             transaction_id = result.get("transaction_id")
-            if transaction_id:
-                payment = db.query(Payment).filter(
-                    Payment.external_transaction_id == transaction_id
-                ).first()
-                
-                if payment:
-                    status = result.get("status", "").lower()
-                    if status in ["success", "completed", "paid"]:
-                        payment.status = PaymentStatus.COMPLETED
-                        payment.gateway_reference = result.get("reference")
-                        from datetime import datetime
-                        payment.completed_at = datetime.utcnow()
-                        
-                        # Update order status
-                        # Note: This needs to be updated for MongoDB
-                        # order = await Order.get(payment.order_id)
-                        # if order:
-                        #     order.status = OrderStatus.ACCEPTED
-                        #     await order.save()
-                        
-                        db.commit()
-                        
-                        return {"status": "success", "message": "Payment processed successfully"}
-                    else:
-                        payment.status = PaymentStatus.FAILED
-                        db.commit()
-                        return {"status": "failed", "message": "Payment failed"}
-
-            return {"status": "error", "message": "Payment record not found"}
+            if not transaction_id:
+                return {"status": "error", "message": "Payment record not found"}
+
+            status = (result.get("status") or "").lower()
+            key = idempotency_key or callback_idempotency_key(
+                payment_method, transaction_id, status, result.get("reference")
+            )
+
+            payment = await Payment.find_one({"external_transaction_id": transaction_id})
+            if not payment:
+                return {"status": "error", "message": "Payment record not found"}
+            if key in payment.callback_keys:
+                return {"status": "success", "message": "Callback already processed"}
+
+            if status in SUCCESS_STATUSES:
+                if payment.status not in ALLOWED_TRANSITIONS[PaymentStatus.COMPLETED]:
+                    # Already completed; no need to ask the gateway again
+                    await self._mark_callback(payment.id, key)
+                    return {"status": "success", "message": "Callback already processed"}
+                verified = await gateway.verify_payment(transaction_id)
+                verified_status = (verified.get("payment_status") or "").lower()
+                if verified.get("status") != "success" or verified_status not in SUCCESS_STATUSES:
+                    logger.warning(f"Callback for {transaction_id} reported success but gateway says {verified}")
+                    return {"status": "error", "message": "Payment not confirmed by gateway"}
+                target = PaymentStatus.COMPLETED
+                reference = verified.get("reference") or result.get("reference")
+            elif status in PENDING_STATUSES:
+                await self._mark_callback(payment.id, key)
+                return {"status": "pending", "message": "Payment not completed yet"}
+            else:
+                target = PaymentStatus.FAILED
+                reference = result.get("reference")
+
+            updated = await self._transition(
+                {"_id": payment.id},
+                target,
+                idempotency_key=key,
+                gateway_reference=reference
+            )
+            if not updated:
+                # Duplicate delivery, or the payment already left the source states
+                await self._mark_callback(payment.id, key)
+                return {"status": "success", "message": "Callback already processed"}
+
+            if target == PaymentStatus.COMPLETED:
+                return {"status": "success", "message": "Payment processed successfully"}
+            return {"status": "failed", "message": "Payment failed"}
 
         except Exception as e:
             logger.error(f"Callback processing failed: {e}")
             return {"status": "error", "message": str(e)}
 
-    def get_payment_by_order(self, db: Session, order_id: int) -> Optional[Payment]:
-        """Get payment record for an order"""
-        return db.query(Payment).filter(Payment.order_id == order_id).first()
+    async def parse_callback(self, callback_data: Dict[str, Any], payment_method: PaymentMethod) -> Dict[str, Any]:
+        """Normalize a raw gateway callback to status/transaction_id/amount/reference/currency"""
+        return await self._gateway(payment_method).handle_callback(callback_data)
+
+    async def _transition(
+        self,
+        query: Dict[str, Any],
+        new_status: PaymentStatus,
+        idempotency_key: Optional[str] = None,
+        gateway_reference: Optional[str] = None
+    ) -> Optional[Payment]:
+        """
+        Atomically move a payment to new_status. Returns the updated payment,
+        or None when no payment in an allowed source state matched.
+        """
+        now = datetime.utcnow()
+        query = {**query, "status": {"$in": ALLOWED_TRANSITIONS[new_status]}}
+        update: Dict[str, Any] = {"$set": {"status": new_status, "updated_at": now}}
+        if new_status == PaymentStatus.COMPLETED:
+            update["$set"]["completed_at"] = now
+        if gateway_reference:
+            update["$set"]["gateway_reference"] = gateway_reference
+        if idempotency_key:
+            query["callback_keys"] = {"$ne": idempotency_key}
+            update["$addToSet"] = {"callback_keys": idempotency_key}
+
+        payment = await Payment.find_one(query).update(update, response_type=UpdateResponse.NEW_DOCUMENT)
+        if payment and new_status == PaymentStatus.COMPLETED:
+            await self._on_completed(payment)
+        return payment
+
+    @staticmethod
+    async def _mark_callback(payment_id: ObjectId, idempotency_key: str):
+        await Payment.find_one({"_id": payment_id}).update({"$addToSet": {"callback_keys": idempotency_key}})
+
+    @staticmethod
+    async def _on_completed(payment: Payment):
+        """Side effects of the single transition to COMPLETED"""
+        try:
+            await revenue_service.record_completed_payment(payment)
+        except Exception as e:
+            logger.error(f"Recording revenue for payment {payment.id} failed: {str(e)}")
+        try:
+            await notification_service.notify_payment_confirmation(
+                user_id=str(payment.user_id),
+                payment_id=str(payment.id),
+                amount=payment.amount
+            )
+        except Exception as e:
+            logger.error(f"Payment confirmation notification for {payment.id} failed: {str(e)}")
+
+    async def get_payment_by_order(self, order_id: str) -> Optional[Payment]:
+        """Latest payment record for an order"""
+        if not ObjectId.is_valid(order_id):
+            return None
+        payments = await Payment.find({"order_id": ObjectId(order_id)}).sort("-created_at").limit(1).to_list()
+        return payments[0] if payments else None
 
-    def get_user_payments(self, db: Session, user_id: int) -> list[Payment]:
-        """Get all payments for a user"""
-        return db.query(Payment).filter(Payment.user_id == user_id).all()
+    async def get_user_payments(self, user_id: str, skip: int = 0, limit: int = 100) -> List[Payment]:
+        """Get a user's payments, newest first"""
+        return await Payment.find({"user_id": ObjectId(user_id)}).sort("-created_at").skip(skip).limit(limit).to_list()
 
-    def get_all_payments(self, db: Session) -> list[Payment]:
+    async def get_all_payments(self, skip: int = 0, limit: int = 100) -> List[Payment]:
         """Get all payments (admin only)"""
-        return db.query(Payment).all()
+        return await Payment.find().sort("-created_at").skip(skip).limit(limit).to_list()
 
 # Global instance
-payment_service = PaymentService()
\ No newline at end of file
+payment_service = PaymentService()
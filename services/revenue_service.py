@@ -0,0 +1,172 @@
+from typing import Dict, Any, List
+from datetime import datetime, timedelta
+from collections import defaultdict
+from pymongo import UpdateOne
+from models.mongo_models import (
+    Payment, Order, RevenueRollup,
+    PaymentStatus, RevenueGranularity
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_SERVICE_TYPE = "unknown"
+
+# period -> (bucket granularity, number of buckets including the current one)
+PERIOD_BUCKETS = {
+    "day": (RevenueGranularity.HOUR, 24),
+    "week": (RevenueGranularity.DAY, 7),
+    "month": (RevenueGranularity.DAY, 30),
+    "year": (RevenueGranularity.MONTH, 12),
+}
+
+def bucket_start(timestamp: datetime, granularity: RevenueGranularity) -> datetime:
+    """Truncate a UTC timestamp to the start of its bucket"""
+    if granularity == RevenueGranularity.HOUR:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == RevenueGranularity.DAY:
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _months_back(month_start: datetime, months: int) -> datetime:
+    index = month_start.year * 12 + month_start.month - 1 - months
+    return month_start.replace(year=index // 12, month=index % 12 + 1)
+
+class RevenueService:
+    """
+    Revenue analytics backed by the revenue_rollups collection.
+
+    Each completed payment increments one hourly, one daily and one monthly
+    bucket keyed by (period_start, payment_method, service_type), so a report
+    reads at most a few hundred small documents instead of scanning payments.
+    rebuild() recomputes every bucket from the payments collection.
+    """
+
+    async def record_completed_payment(self, payment: Payment) -> None:
+        """Add a payment that just transitioned to COMPLETED to its buckets"""
+        completed_at = payment.completed_at or datetime.utcnow()
+        order = await Order.get_motor_collection().find_one(
+            {"_id": payment.order_id}, {"service_type": 1}
+        )
+        service_type = (order or {}).get("service_type") or UNKNOWN_SERVICE_TYPE
+        now = datetime.utcnow()
+
+        await RevenueRollup.get_motor_collection().bulk_write([
+            UpdateOne(
+                {
+                    "granularity": granularity,
+                    "period_start": bucket_start(completed_at, granularity),
+                    "payment_method": payment.payment_method,
+                    "service_type": service_type
+                },
+                {
+                    "$inc": {"total_amount": payment.amount, "payment_count": 1},
+                    "$set": {"updated_at": now}
+                },
+                upsert=True
+            )
+            for granularity in RevenueGranularity
+        ], ordered=False)
+
+    async def rebuild(self) -> Dict[str, int]:
+        """Recompute all buckets from completed payments with $merge"""
+        started = datetime.utcnow()
+        payments = Payment.get_motor_collection()
+
+        for granularity in RevenueGranularity:
+            await payments.aggregate(self._rebuild_pipeline(granularity, started)).to_list(length=None)
+
+        # Buckets not touched by the rebuild (nor by live payments since) no longer have payments
+        removed = await RevenueRollup.get_motor_collection().delete_many(
+            {"updated_at": {"$lt": started}}
+        )
+        total = await RevenueRollup.get_motor_collection().count_documents({})
+        logger.info(f"Revenue rollups rebuilt: {total} buckets, {removed.deleted_count} stale removed")
+        return {"buckets": total, "removed": removed.deleted_count}
+
+    @staticmethod
+    def _rebuild_pipeline(granularity: RevenueGranularity, rebuilt_at: datetime) -> List[Dict[str, Any]]:
+        parts = {"year": {"$year": "$completed_at"}, "month": {"$month": "$completed_at"}}
+        if granularity != RevenueGranularity.MONTH:
+            parts["day"] = {"$dayOfMonth": "$completed_at"}
+        if granularity == RevenueGranularity.HOUR:
+            parts["hour"] = {"$hour": "$completed_at"}
+
+        return [
+            {"$match": {"status": PaymentStatus.COMPLETED, "completed_at": {"$ne": None}}},
+            {"$lookup": {
+                "from": Order.Settings.name,
+                "localField": "order_id",
+                "foreignField": "_id",
+                "as": "order"
+            }},
+            {"$group": {
+                "_id": {
+                    "period_start": {"$dateFromParts": parts},
+                    "payment_method": "$payment_method",
+                    "service_type": {"$ifNull": [
+                        {"$arrayElemAt": ["$order.service_type", 0]}, UNKNOWN_SERVICE_TYPE
+                    ]}
+                },
+                "total_amount": {"$sum": "$amount"},
+                "payment_count": {"$sum": 1}
+            }},
+            {"$project": {
+                "_id": 0,
+                "granularity": granularity.value,
+                "period_start": "$_id.period_start",
+                "payment_method": "$_id.payment_method",
+                "service_type": "$_id.service_type",
+                "total_amount": 1,
+                "payment_count": 1,
+                "updated_at": {"$literal": rebuilt_at}
+            }},
+            {"$merge": {
+                "into": RevenueRollup.Settings.name,
+                "on": ["granularity", "period_start", "payment_method", "service_type"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }}
+        ]
+
+    async def get_revenue(self, period: str) -> Dict[str, Any]:
+        """Revenue per bucket for a day/week/month/year report"""
+        granularity, buckets = PERIOD_BUCKETS[period]
+        current = bucket_start(datetime.utcnow(), granularity)
+        if granularity == RevenueGranularity.HOUR:
+            since = current - timedelta(hours=buckets - 1)
+        elif granularity == RevenueGranularity.DAY:
+            since = current - timedelta(days=buckets - 1)
+        else:
+            since = _months_back(current, buckets - 1)
+
+        rows = await RevenueRollup.get_motor_collection().find(
+            {"granularity": granularity, "period_start": {"$gte": since}},
+            {"_id": 0, "period_start": 1, "payment_method": 1, "service_type": 1,
+             "total_amount": 1, "payment_count": 1}
+        ).to_list(length=None)
+
+        per_bucket = defaultdict(lambda: {"amount": 0.0, "count": 0})
+        by_payment_method = defaultdict(float)
+        by_service_type = defaultdict(float)
+        for row in rows:
+            bucket = per_bucket[row["period_start"]]
+            bucket["amount"] += row["total_amount"]
+            bucket["count"] += row["payment_count"]
+            by_payment_method[row["payment_method"]] += row["total_amount"]
+            by_service_type[row["service_type"]] += row["total_amount"]
+
+        return {
+            "period": period,
+            "granularity": granularity.value,
+            "total_revenue": sum(b["amount"] for b in per_bucket.values()),
+            "payment_count": sum(b["count"] for b in per_bucket.values()),
+            "revenue_data": [
+                {"period_start": start, "amount": b["amount"], "count": b["count"]}
+                for start, b in sorted(per_bucket.items())
+            ],
+            "by_payment_method": dict(by_payment_method),
+            "by_service_type": dict(by_service_type)
+        }
+
+revenue_service = RevenueService()
@@ -0,0 +1,258 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+from core.config import settings
+from core.http_client import get_http_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.afromessage.com/api"
+
+def challenge_params(phone_number: str) -> Dict[str, Any]:
+    """Query parameters of an OTP challenge; sender and options come from settings"""
+    return {
+        "from": settings.AFRO_MESSAGE_IDENTIFIER_ID,
+        "sender": settings.AFRO_MESSAGE_SENDER_NAME,
+        "to": phone_number,
+        "ps": "",
+        "sb": settings.AFRO_MESSAGE_SB or 0,
+        "sa": settings.AFRO_MESSAGE_SA or 0,
+        "ttl": settings.AFRO_MESSAGE_TTL or 0,
+        "len": settings.AFRO_MESSAGE_LEN or 6,
+        "t": settings.AFRO_MESSAGE_T or 0,
+        "callback": settings.AFRO_MESSAGE_CALLBACK
+    }
+
+class SMSDeliveryError(Exception):
+    """AfroMessage could not be reached, or kept failing after all retries"""
+
+class CircuitOpenError(SMSDeliveryError):
+    """Calls are short-circuited while AfroMessage is failing"""
+
+class SMSNotConfiguredError(SMSDeliveryError):
+    """AFRO_MESSAGE_API_KEY (or, for challenges, AFRO_MESSAGE_IDENTIFIER_ID) is not set"""
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failed calls. While open every
+    call fails fast; once reset_timeout has passed a single trial call is let
+    through (again every reset_timeout) and its outcome closes or re-opens
+    the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        now = time.monotonic()
+        if self._trial_at is None or now - self._trial_at >= self.reset_timeout:
+            self._trial_at = now
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._trial_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        self._trial_at = None
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+class SMSClient:
+    """
+    Async AfroMessage client on a shared, pooled httpx connection.
+
+    Calls are retried with jittered exponential backoff on timeouts,
+    connection errors, 429 and 5xx; a call that still fails counts against a
+    circuit breaker so an AfroMessage outage fails fast instead of tying up
+    the event loop. OTP challenges go through an in-process outbox: request
+    handlers enqueue and return, and SMS_OUTBOX_WORKERS tasks deliver in the
+    background. The outbox is not persisted - a challenge lost on restart is
+    simply requested again by the user.
+
+    Credentials come from AFRO_MESSAGE_API_KEY / AFRO_MESSAGE_IDENTIFIER_ID /
+    AFRO_MESSAGE_SENDER_NAME. Without them every call raises
+    SMSNotConfiguredError and the outbox accepts nothing.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None):
+        self.base_url = (base_url or settings.AFRO_MESSAGE_BASE_URL or DEFAULT_BASE_URL).rstrip("/")
+        self.max_retries = settings.SMS_MAX_RETRIES
+        self.retry_backoff = settings.SMS_RETRY_BACKOFF_SECONDS  # seconds
+        self.worker_count = settings.SMS_OUTBOX_WORKERS
+        self.outbox_size = settings.SMS_OUTBOX_MAX_SIZE
+        self.breaker = CircuitBreaker(settings.SMS_CIRCUIT_FAILURE_THRESHOLD, settings.SMS_CIRCUIT_RESET_SECONDS)
+        # http_client is injectable so a local stub server can be used in tests
+        self._http_client = http_client
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._http_client or get_http_client(
+            "afromessage",
+            timeout=httpx.Timeout(settings.SMS_TIMEOUT_SECONDS, connect=5.0)
+        )
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(settings.AFRO_MESSAGE_API_KEY and settings.AFRO_MESSAGE_IDENTIFIER_ID)
+
+    async def call(self, path: str, params: Dict[str, Any], token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        GET an AfroMessage endpoint and return the parsed JSON body ({} for a
+        non-200 or unparsable answer). Raises SMSDeliveryError when the
+        provider is unreachable, the circuit is open or no token is configured.
+        """
+        token = token or settings.AFRO_MESSAGE_API_KEY
+        if not token:
+            raise SMSNotConfiguredError("AFRO_MESSAGE_API_KEY is not set")
+        if not self.breaker.allow():
+            raise CircuitOpenError("AfroMessage circuit is open")
+
+        url = f"{self.base_url}/{path}"
+        headers = {"Authorization": f"Bearer {token}"}
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.0))
+            try:
+                response = await self.client.get(url, params=params, headers=headers)
+            except httpx.TransportError as e:
+                last_error = f"{type(e).__name__}: {str(e)}"
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                last_error = f"HTTP {response.status_code}"
+                continue
+
+            # AfroMessage answered, so it is healthy even if it rejected the call
+            self.breaker.record_success()
+            if response.status_code != 200:
+                logger.error(f"AfroMessage {path} failed with status {response.status_code}: {response.text}")
+                return {}
+            try:
+                return response.json()
+            except ValueError:
+                logger.error(f"Invalid JSON from AfroMessage {path}: {response.text}")
+                return {}
+
+        self.breaker.record_failure()
+        raise SMSDeliveryError(f"AfroMessage {path} failed after {self.max_retries + 1} attempts: {last_error}")
+
+    async def challenge(self, phone_number: str) -> Dict[str, Any]:
+        """Raw challenge call; raises SMSDeliveryError like call()"""
+        if not settings.AFRO_MESSAGE_IDENTIFIER_ID:
+            raise SMSNotConfiguredError("AFRO_MESSAGE_IDENTIFIER_ID is not set")
+        return await self.call("challenge", challenge_params(phone_number))
+
+    async def send_challenge(self, phone_number: str) -> bool:
+        """Ask AfroMessage to generate and text an OTP to phone_number"""
+        try:
+            data = await self.challenge(phone_number)
+        except SMSDeliveryError as e:
+            logger.error(f"SMS to {phone_number} not sent: {str(e)}")
+            return False
+        if data.get("acknowledge") == "success":
+            logger.info(f"SMS sent successfully to {phone_number}")
+            return True
+        logger.warning(f"SMS to {phone_number} failed: {data}")
+        return False
+
+    async def verify_code(self, phone_number: str, code: str) -> bool:
+        """Check an OTP generated by a challenge"""
+        try:
+            data = await self.call("verify", {"to": phone_number, "code": code})
+        except SMSDeliveryError as e:
+            logger.error(f"OTP verification for {phone_number} failed: {str(e)}")
+            return False
+        if data.get("acknowledge") == "success":
+            return True
+        logger.warning(f"AfroMessage rejected OTP for {phone_number}: {data}")
+        return False
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """Start the outbox workers"""
+        if self.is_running:
+            return
+        if not self.is_configured:
+            logger.warning("AfroMessage credentials are not configured; OTP SMS will be rejected")
+        self._queue = asyncio.Queue(maxsize=self.outbox_size)
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+        logger.info(f"SMS outbox started with {self.worker_count} workers")
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Give queued messages a moment to go out, then cancel the workers"""
+        if not self.is_running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"SMS outbox stopped with {self._queue.qsize()} messages undelivered")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        logger.info("SMS outbox stopped")
+
+    def enqueue_challenge(self, phone_number: str) -> bool:
+        """Queue an OTP challenge; False if it cannot be accepted right now"""
+        if self._queue is None:
+            logger.warning(f"SMS outbox not running, challenge for {phone_number} dropped")
+            return False
+        if not self.is_configured:
+            logger.error(f"AfroMessage credentials are not configured, challenge for {phone_number} rejected")
+            return False
+        if self.breaker.state == "open":
+            logger.warning(f"AfroMessage circuit is open, challenge for {phone_number} rejected")
+            return False
+        try:
+            self._queue.put_nowait(phone_number)
+        except asyncio.QueueFull:
+            logger.warning(f"SMS outbox full, challenge for {phone_number} rejected")
+            return False
+        return True
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _worker(self, worker_id: int):
+        while True:
+            phone_number = await self._queue.get()
+            try:
+                await self.send_challenge(phone_number)
+            except Exception as e:
+                logger.error(f"SMS worker {worker_id} failed for {phone_number}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+sms_client = SMSClient()
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from bson import ObjectId
+from beanie import PydanticObjectId
+from models.mongo_models import User
+from core.config import settings
+from core.redis import get_redis
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields request handlers read from current_user
+CACHED_FIELDS = ("full_name", "phone_number", "email", "role", "is_active")
+
+REDIS_KEY_PREFIX = "user_cache:"
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+
+class UserCache:
+    """
+    Cache of the small user projection needed to authenticate a request.
+
+    An in-process LRU bounded by USER_CACHE_MAX_ENTRIES and
+    USER_CACHE_TTL_SECONDS answers most lookups; with REDIS_ENABLED a shared
+    Redis entry sits behind it and invalidations are broadcast so every
+    worker drops its local copy. Without Redis, other workers may serve a
+    changed user for at most one TTL.
+
+    Users returned from the cache are partial documents built with
+    model_construct - they must never be saved.
+    """
+
+    def __init__(self):
+        self.ttl = settings.USER_CACHE_TTL_SECONDS
+        self.max_entries = settings.USER_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_user(self, user_id: str) -> Optional[User]:
+        """Cached user, loading the projection from Mongo on a miss"""
+        fields = self._get_local(user_id)
+        if fields is None:
+            fields = await self._get_remote(user_id)
+            if fields is None:
+                fields = await self._load(user_id)
+                if fields is None:
+                    return None
+                await self._set_remote(user_id, fields)
+            self._set_local(user_id, fields)
+        return User.model_construct(id=PydanticObjectId(user_id), **fields)
+
+    async def invalidate(self, user_id) -> None:
+        """Drop a user everywhere after a role, status or profile change"""
+        user_id = str(user_id)
+        self._entries.pop(user_id, None)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(REDIS_KEY_PREFIX + user_id)
+            await redis.publish(INVALIDATION_CHANNEL, user_id)
+        except Exception as e:
+            logger.warning(f"User cache invalidation via Redis failed for {user_id}: {str(e)}")
+
+    def _get_local(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, fields = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return fields
+
+    def _set_local(self, user_id: str, fields: Dict[str, Any]):
+        self._entries[user_id] = (time.monotonic() + self.ttl, fields)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_remote(self, user_id: str) -> Optional[Dict[str, Any]]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(REDIS_KEY_PREFIX + user_id)
+        except Exception as e:
+            logger.warning(f"User cache read from Redis failed: {str(e)}")
+            return None
+        return json.loads(raw) if raw else None
+
+    async def _set_remote(self, user_id: str, fields: Dict[str, Any]):
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(REDIS_KEY_PREFIX + user_id, json.dumps(fields), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"User cache write to Redis failed: {str(e)}")
+
+    @staticmethod
+    async def _load(user_id: str) -> Optional[Dict[str, Any]]:
+        if not ObjectId.is_valid(user_id):
+            return None
+        doc = await User.get_motor_collection().find_one(
+            {"_id": ObjectId(user_id)},
+            {field: 1 for field in CACHED_FIELDS}
+        )
+        if doc is None:
+            return None
+        return {field: doc.get(field) for field in CACHED_FIELDS}
+
+    async def start(self):
+        """Listen for invalidations from other workers (Redis only)"""
+        if self._task or get_redis() is None:
+            return
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = get_redis().pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._entries.pop(message["data"], None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries may be stale until resubscribed; drop them all
+                logger.error(f"User cache invalidation listener error: {str(e)}")
+                self._entries.clear()
+                await asyncio.sleep(5)
+
+user_cache = UserCache()
@@ -1,14 +1,9 @@
-import httpx
-import os
-import requests
-from core.config import get_settings
+from services.sms_client import sms_client, SMSDeliveryError
 import logging
 
 logger = logging.getLogger(__name__)
 
-def send_otp(mobile: str) -> dict:
-    settings = get_settings()
-
+async def send_otp(mobile: str) -> dict:
     if not mobile:
         return {
             "ResponseCode": "401",
@@ -16,55 +11,9 @@ def send_otp(mobile: str) -> dict:
             "ResponseMsg": "Mobile number is required!"
         }
 
-    params = {
-        "from": settings.AFRO_MESSAGE_IDENTIFIER_ID,
-        "sender": settings.AFRO_MESSAGE_SENDER_NAME,
-        "to": mobile,
-        "ps": "",
-        "sb": settings.AFRO_MESSAGE_SB,
-        "sa": settings.AFRO_MESSAGE_SA,
-        "ttl": settings.AFRO_MESSAGE_TTL,
-        "len": settings.AFRO_MESSAGE_LEN,
-        "t": settings.AFRO_MESSAGE_T,
-        "callback": settings.AFRO_MESSAGE_CALLBACK,
-    }
-
-    headers = {
-        "Authorization": f"Bearer {settings.AFRO_MESSAGE_API_KEY}"
-    }
-
     try:
-        response = httpx.get(
-            f"{settings.AFRO_MESSAGE_BASE_URL}/challenge",
-            headers=headers,
-            params=params,
-            timeout=10
-        )
-        response.raise_for_status()
-
-        try:
-            data = response.json()
-        except ValueError:
-            return {
-                "ResponseCode": "500",
-                "Result": "false",
-                "ResponseMsg": "Invalid JSON response from OTP provider"
-            }
-
-        if data.get("acknowledge") == "success":
-            return {
-                "ResponseCode": "200",
-                "Result": "true",
-                "ResponseMsg": "Check your message!"
-            }
-        else:
-            return {
-                "ResponseCode": "200",
-                "Result": "false",
-                "ResponseMsg": "Please try again!"
-            }
-
-    except httpx.HTTPError as e:
+        data = await sms_client.challenge(mobile)
+    except SMSDeliveryError as e:
         logger.error(f"OTP sending failed: {e}")
         return {
             "ResponseCode": "500",
@@ -72,25 +21,35 @@ def send_otp(mobile: str) -> dict:
             "ResponseMsg": f"HTTP error occurred: {str(e)}"
         }
 
+    if not data:
+        return {
+            "ResponseCode": "500",
+            "Result": "false",
+            "ResponseMsg": "Invalid response from OTP provider"
+        }
+
+    if data.get("acknowledge") == "success":
+        return {
+            "ResponseCode": "200",
+            "Result": "true",
+            "ResponseMsg": "Check your message!"
+        }
+    else:
+        return {
+            "ResponseCode": "200",
+            "Result": "false",
+            "ResponseMsg": "Please try again!"
+        }
 
-def verify_otp(to: str, code: str) -> bool:
-    token = os.getenv("AFRO_MESSAGE_API_KEY")  # Make sure this env var is set with your API key
-    base_url = 'https://api.afromessage.com/api/verify'
-    headers = {'Authorization': f'Bearer {token}'}
-    url = f'{base_url}?to={to}&code={code}'
 
+async def verify_otp(to: str, code: str) -> bool:
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('acknowledge') == 'success':
-                return True
-            else:
-                logger.warning(f"OTP verification failed: {data}")
-                return False
-        else:
-            logger.error(f"HTTP error verifying OTP: {response.status_code} {response.text}")
-            return False
-    except Exception as e:
+        data = await sms_client.call("verify", {"to": to, "code": code})
+    except SMSDeliveryError as e:
         logger.error(f"Exception during OTP verification: {e}")
         return False
+
+    if data.get('acknowledge') == 'success':
+        return True
+    logger.warning(f"OTP verification failed: {data}")
+    return False
@@ -0,0 +1,100 @@
+"""
+Distance helpers for ranking many candidates at once.
+
+All functions take decimal degrees and return kilometers. With NumPy
+installed the array functions are vectorized; without it they fall back to
+plain Python loops and return lists.
+
+Two modes are available:
+- "haversine": great circle distance, exact on a spherical earth.
+- "equirectangular": flat projection around the mean latitude. Much cheaper,
+  and within ~0.1% of haversine at city-scale distances (tens of km).
+"""
+
+import math
+from typing import List, Sequence, Union
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+    HAS_NUMPY = False
+
+EARTH_RADIUS_KM = 6371.0
+
+HAVERSINE = "haversine"
+EQUIRECTANGULAR = "equirectangular"
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great circle distance between two points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def equirectangular_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Fast flat-earth approximation, accurate for short distances"""
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    x = (lon2 - lon1) * math.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return EARTH_RADIUS_KM * math.sqrt(x * x + y * y)
+
+def _scalar(mode: str):
+    if mode == HAVERSINE:
+        return haversine_km
+    if mode == EQUIRECTANGULAR:
+        return equirectangular_km
+    raise ValueError(f"Unknown distance mode: {mode}")
+
+def _np_distance(lat1, lon1, lat2, lon2, mode: str):
+    """Broadcasting distance on NumPy arrays already in radians"""
+    if mode == HAVERSINE:
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    if mode == EQUIRECTANGULAR:
+        x = (lon2 - lon1) * np.cos((lat1 + lat2) / 2)
+        y = lat2 - lat1
+        return EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+    raise ValueError(f"Unknown distance mode: {mode}")
+
+def distances_km(
+    latitude: float,
+    longitude: float,
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    mode: str = HAVERSINE
+) -> Union["np.ndarray", List[float]]:
+    """Distances from one point to each of many points, in one call"""
+    if not HAS_NUMPY:
+        distance = _scalar(mode)
+        return [distance(latitude, longitude, lat, lng) for lat, lng in zip(latitudes, longitudes)]
+
+    return _np_distance(
+        math.radians(latitude), math.radians(longitude),
+        np.radians(np.asarray(latitudes, dtype=float)),
+        np.radians(np.asarray(longitudes, dtype=float)),
+        mode
+    )
+
+def pairwise_distances_km(
+    latitudes1: Sequence[float],
+    longitudes1: Sequence[float],
+    latitudes2: Sequence[float],
+    longitudes2: Sequence[float],
+    mode: str = HAVERSINE
+) -> Union["np.ndarray", List[List[float]]]:
+    """Distance matrix of shape (len(points1), len(points2))"""
+    if not HAS_NUMPY:
+        distance = _scalar(mode)
+        return [
+            [distance(lat1, lng1, lat2, lng2) for lat2, lng2 in zip(latitudes2, longitudes2)]
+            for lat1, lng1 in zip(latitudes1, longitudes1)
+        ]
+
+    return _np_distance(
+        np.radians(np.asarray(latitudes1, dtype=float))[:, None],
+        np.radians(np.asarray(longitudes1, dtype=float))[:, None],
+        np.radians(np.asarray(latitudes2, dtype=float))[None, :],
+        np.radians(np.asarray(longitudes2, dtype=float))[None, :],
+        mode
+    )
@@ -0,0 +1,150 @@
+"""
+Pluggable OTP storage.
+
+Both backends expire codes after OTP_TTL_SECONDS, delete a code once it is
+verified, and delete it after OTP_MAX_ATTEMPTS wrong guesses.
+- MemoryOTPStore: per-process, bounded to OTP_MAX_ENTRIES (oldest evicted).
+- RedisOTPStore: shared by all workers, TTL enforced by Redis; verification
+  is one atomic Lua script so a code cannot be used twice.
+
+get_otp_store() picks Redis when REDIS_ENABLED is set.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from core.config import settings
+from core.redis import get_redis
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MemoryOTPStore:
+    def __init__(
+        self,
+        ttl: int = settings.OTP_TTL_SECONDS,
+        max_attempts: int = settings.OTP_MAX_ATTEMPTS,
+        max_entries: int = settings.OTP_MAX_ENTRIES
+    ):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.max_entries = max_entries
+        # phone -> (otp, created_at, failed_attempts); ordered oldest first
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float):
+        # Every entry has the same TTL, so the expired ones are at the front
+        while self._entries:
+            phone, (_, created_at, _) = next(iter(self._entries.items()))
+            if now - created_at <= self.ttl and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[phone]
+
+    async def save(self, phone_number: str, otp: str) -> None:
+        now = time.time()
+        self._entries.pop(phone_number, None)
+        self._entries[phone_number] = (otp, now, 0)
+        self._evict(now)
+
+    async def verify(self, phone_number: str, otp: str) -> bool:
+        now = time.time()
+        self._evict(now)
+        entry = self._entries.get(phone_number)
+        if entry is None:
+            return False
+
+        stored, created_at, attempts = entry
+        if stored == otp:
+            del self._entries[phone_number]
+            return True
+
+        attempts += 1
+        if attempts >= self.max_attempts:
+            del self._entries[phone_number]
+        else:
+            self._entries[phone_number] = (stored, created_at, attempts)
+        return False
+
+    async def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        self._evict(now)
+        return {
+            phone: {
+                "otp": otp,
+                "age_seconds": round(now - created_at, 2),
+                "failed_attempts": attempts
+            }
+            for phone, (otp, created_at, attempts) in self._entries.items()
+        }
+
+# KEYS[1] = otp hash, ARGV[1] = provided code, ARGV[2] = max attempts
+_VERIFY_SCRIPT = """
+local stored = redis.call('HGET', KEYS[1], 'otp')
+if not stored then return 0 end
+if stored == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts >= tonumber(ARGV[2]) then redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+class RedisOTPStore:
+    KEY_PREFIX = "otp:"
+
+    def __init__(
+        self,
+        client=None,
+        ttl: int = settings.OTP_TTL_SECONDS,
+        max_attempts: int = settings.OTP_MAX_ATTEMPTS
+    ):
+        # client is injectable so a local fake Redis can be used in tests
+        self._client = client
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    async def save(self, phone_number: str, otp: str) -> None:
+        key = self.KEY_PREFIX + phone_number
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping={"otp": otp, "attempts": 0, "created_at": time.time()})
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def verify(self, phone_number: str, otp: str) -> bool:
+        result = await self.client.eval(_VERIFY_SCRIPT, 1, self.KEY_PREFIX + phone_number, otp, self.max_attempts)
+        return bool(result)
+
+    async def snapshot(self, limit: int = 100) -> Dict[str, Any]:
+        now = time.time()
+        entries = {}
+        async for key in self.client.scan_iter(match=self.KEY_PREFIX + "*", count=100):
+            data = await self.client.hgetall(key)
+            if data:
+                entries[key[len(self.KEY_PREFIX):]] = {
+                    "otp": data.get("otp"),
+                    "age_seconds": round(now - float(data.get("created_at", now)), 2),
+                    "failed_attempts": int(data.get("attempts", 0))
+                }
+            if len(entries) >= limit:
+                break
+        return entries
+
+_memory_store: Optional[MemoryOTPStore] = None
+
+def get_otp_store():
+    """Redis-backed store when Redis is enabled, otherwise the process-wide memory store"""
+    global _memory_store
+    if get_redis() is not None:
+        return RedisOTPStore()
+    if _memory_store is None:
+        _memory_store = MemoryOTPStore()
+    return _memory_store
@@ -0,0 +1,61 @@
+"""
+Keyset (cursor) pagination over (created_at, _id), newest first.
+
+A cursor is an opaque url-safe token holding the created_at and _id of the
+last document of a page. The next page continues strictly after that key, so
+each page is an index range scan instead of skipping all previous documents.
+List queries using it must sort with KEYSET_SORT and be backed by an index
+ending in (created_at, _id).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+from bson import ObjectId
+from fastapi import HTTPException, Response
+import pymongo
+
+KEYSET_SORT = ("-created_at", "-_id")
+# Same order for raw Motor cursors
+KEYSET_SORT_SPEC = [("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, id: Any) -> str:
+    payload = json.dumps({"t": created_at.isoformat(), "id": str(id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decode a cursor; raises HTTP 400 if it was not produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def keyset_filter(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """Restrict a find filter to documents after the cursor"""
+    if not cursor:
+        return query
+    created_at, last_id = decode_cursor(cursor)
+    after = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": last_id}}
+    ]}
+    return {"$and": [query, after]} if query else after
+
+def next_cursor(page: Sequence[Any], limit: int) -> Optional[str]:
+    """Cursor for the page after `page`, or None when it was the last one"""
+    if not page or len(page) < limit:
+        return None
+    last = page[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last["created_at"], last["_id"])
+    return encode_cursor(last.created_at, last.id)
+
+def set_next_cursor_header(response: Response, cursor: Optional[str]) -> None:
+    """Expose the next cursor on list endpoints whose body is a bare JSON array"""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
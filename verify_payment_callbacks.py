@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Payment callback inbox verification against a local mock Chapa gateway.
+
+Needs MongoDB (MONGODB_URL); everything it creates is removed at the end.
+Revenue recording is replaced by a counter so real rollups are untouched.
+
+Checks that:
+- a webhook burst is stored and acknowledged quickly, duplicate deliveries
+  are recognised at ingestion
+- the consumer verifies with the gateway and completes the payment exactly
+  once, however many callbacks arrive
+- callbacks that keep failing (gateway verify returns 500) end up FAILED and
+  complete the payment once replayed after the gateway recovers
+
+Usage: python verify_payment_callbacks.py [--burst 50]
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bson import ObjectId
+import httpx
+from database import init_db, close_mongo_connection
+from models.mongo_models import (
+    Order, Payment, PaymentCallbackEvent, Notification,
+    PaymentStatus, PaymentMethod, CallbackEventStatus
+)
+import services.payment_service as payment_service_module
+from services.payment_service import payment_service
+from services.payment_callback_inbox import payment_callback_inbox
+from services.payment_gateways.chapa import ChapaPaymentGateway
+
+class MockChapa:
+    healthy = True
+    verify_calls = 0
+
+class MockChapaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        MockChapa.verify_calls += 1
+        if not MockChapa.healthy:
+            return self._reply(500, {"status": "failed", "message": "gateway unavailable"})
+        tx_ref = self.path.rsplit("/", 1)[-1]
+        self._reply(200, {"status": "success", "data": {
+            "status": "success", "amount": 150.0, "currency": "ETB",
+            "reference": f"ref_{tx_ref}", "tx_ref": tx_ref
+        }})
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class CountingRevenue:
+    def __init__(self):
+        self.recorded = []
+
+    async def record_completed_payment(self, payment):
+        self.recorded.append(payment.id)
+
+def check(condition: bool, message: str):
+    print(f"{'✅' if condition else '❌'} {message}")
+    if not condition:
+        raise SystemExit(1)
+
+async def create_payment(user_id: ObjectId) -> Payment:
+    order = Order(user_id=user_id, subtotal=150.0)
+    await order.insert()
+    payment = Payment(
+        order_id=order.id,
+        user_id=user_id,
+        amount=150.0,
+        payment_method=PaymentMethod.CHAPA,
+        external_transaction_id=f"order_{order.id}_{int(time.time())}"
+    )
+    await payment.insert()
+    return payment
+
+async def drain():
+    while await payment_callback_inbox.process_batch():
+        pass
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=50)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockChapaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    await init_db()
+    revenue = CountingRevenue()
+    payment_service_module.revenue_service = revenue
+    payment_callback_inbox.retry_backoff = 0
+    payment_callback_inbox.max_attempts = 2
+    user_id = ObjectId()
+    transaction_ids = []
+
+    async with httpx.AsyncClient() as http_client:
+        payment_service.chapa_gateway = ChapaPaymentGateway(
+            "sk_test",
+            base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+            http_client=http_client
+        )
+        try:
+            # Burst: half redeliveries of one payload, half distinct deliveries
+            payment = await create_payment(user_id)
+            transaction_ids.append(payment.external_transaction_id)
+            duplicates = 0
+            started = time.perf_counter()
+            for i in range(args.burst):
+                payload = {"trx_ref": payment.external_transaction_id, "status": "success"}
+                if i % 2:
+                    payload["delivery"] = i
+                _, duplicate = await payment_callback_inbox.ingest(PaymentMethod.CHAPA, payload)
+                duplicates += duplicate
+            ingest_ms = (time.perf_counter() - started) * 1000 / args.burst
+            check(ingest_ms < 50, f"callbacks acknowledged in {ingest_ms:.2f} ms each")
+            check(duplicates == args.burst // 2 + args.burst % 2 - 1, f"{duplicates} redeliveries deduplicated at ingestion")
+
+            await drain()
+            payment = await Payment.get(payment.id)
+            check(payment.status == PaymentStatus.COMPLETED, "payment completed")
+            check(revenue.recorded.count(payment.id) == 1, "revenue recorded exactly once")
+            confirmations = await Notification.find({"user_id": user_id, "type": "payment_confirmation"}).count()
+            check(confirmations == 1, "one payment confirmation notification")
+            events = await PaymentCallbackEvent.find({"payload.trx_ref": payment.external_transaction_id}).to_list()
+            check(all(e.status == CallbackEventStatus.PROCESSED for e in events), f"all {len(events)} stored events processed")
+
+            # Gateway down: retries run out, then replay after recovery
+            payment = await create_payment(user_id)
+            transaction_ids.append(payment.external_transaction_id)
+            MockChapa.healthy = False
+            event_id, _ = await payment_callback_inbox.ingest(
+                PaymentMethod.CHAPA, {"trx_ref": payment.external_transaction_id, "status": "success"}
+            )
+            await drain()
+            event = await PaymentCallbackEvent.get(event_id)
+            check(event.status == CallbackEventStatus.FAILED, f"event FAILED after {event.attempts} attempts: {event.last_error}")
+            check((await Payment.get(payment.id)).status == PaymentStatus.PENDING, "payment still pending")
+
+            MockChapa.healthy = True
+            check(await payment_callback_inbox.replay() >= 1, "failed events replayed")
+            await drain()
+            check((await PaymentCallbackEvent.get(event_id)).status == CallbackEventStatus.PROCESSED, "replayed event processed")
+            check((await Payment.get(payment.id)).status == PaymentStatus.COMPLETED, "payment completed after replay")
+            check(revenue.recorded.count(payment.id) == 1, "revenue recorded exactly once")
+            print(f"Mock gateway verify calls: {MockChapa.verify_calls}")
+        finally:
+            await PaymentCallbackEvent.get_motor_collection().delete_many({"payload.trx_ref": {"$in": transaction_ids}})
+            await Payment.get_motor_collection().delete_many({"user_id": user_id})
+            await Order.get_motor_collection().delete_many({"user_id": user_id})
+            await Notification.get_motor_collection().delete_many({"user_id": user_id})
+            await close_mongo_connection()
+            server.shutdown()
+
+    print("Payment callback inbox verified")
+
+if __name__ == "__main__":
+    asyncio.run(main())
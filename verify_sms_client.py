@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+SMS client verification against a local stub AfroMessage server.
+
+Starts a stub HTTP server on 127.0.0.1 that mimics the AfroMessage
+/challenge and /verify endpoints and checks services.sms_client.SMSClient:
+- without AfroMessage credentials nothing is sent and the outbox rejects
+  challenges
+- challenges and verifications succeed and parse the acknowledge field
+- 5xx answers are retried
+- repeated failures open the circuit breaker, which then fails fast and
+  recovers through a trial call
+- enqueue_challenge returns immediately while the outbox delivers in the
+  background, and the event loop keeps running during slow SMS calls
+
+No database or AfroMessage account is needed; stub credentials are set for
+the run.
+
+Usage: python verify_sms_client.py
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import httpx
+from core.config import settings
+from services.sms_client import SMSClient, CircuitBreaker
+
+VALID_CODE = "123456"
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []
+        self.failures_left = 0   # answer 503 this many times first
+        self.always_fail = False
+        self.delay = 0.0
+
+    def reset(self, **kwargs):
+        with self.lock:
+            self.requests = []
+            self.failures_left = kwargs.get("failures_left", 0)
+            self.always_fail = kwargs.get("always_fail", False)
+            self.delay = kwargs.get("delay", 0.0)
+
+stub = StubState()
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with stub.lock:
+            stub.requests.append((url.path, query))
+            fail = stub.always_fail or stub.failures_left > 0
+            if stub.failures_left > 0:
+                stub.failures_left -= 1
+            delay = stub.delay
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self._reply(503, {"acknowledge": "error"})
+        elif url.path.endswith("/challenge"):
+            self._reply(200, {"acknowledge": "success", "response": {"to": query.get("to")}})
+        elif url.path.endswith("/verify"):
+            ok = query.get("code") == VALID_CODE
+            self._reply(200, {"acknowledge": "success" if ok else "error"})
+        else:
+            self._reply(404, {"acknowledge": "error"})
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def check(condition: bool, message: str):
+    print(f"{'✅' if condition else '❌'} {message}")
+    if not condition:
+        raise SystemExit(1)
+
+def build_client(base_url: str, http_client: httpx.AsyncClient) -> SMSClient:
+    client = SMSClient(base_url=base_url, http_client=http_client)
+    client.max_retries = 2
+    client.retry_backoff = 0.01
+    client.worker_count = 4
+    client.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.5)
+    return client
+
+async def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api"
+    print(f"Stub AfroMessage server on {base_url}")
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(2.0)) as http_client:
+        sms = build_client(base_url, http_client)
+        await sms.start()
+
+        stub.reset()
+        settings.AFRO_MESSAGE_API_KEY = ""
+        settings.AFRO_MESSAGE_IDENTIFIER_ID = ""
+        check(not await sms.send_challenge("+251911000001"), "challenge fails without credentials")
+        check(not await sms.verify_code("+251911000001", VALID_CODE), "verification fails without credentials")
+        check(not stub.requests, "nothing reaches the server without credentials")
+        check(not sms.enqueue_challenge("+251911000001"), "outbox rejects challenges without credentials")
+        check(sms.breaker.state == "closed", "missing credentials do not trip the circuit")
+
+        settings.AFRO_MESSAGE_API_KEY = "stub-token"
+        settings.AFRO_MESSAGE_IDENTIFIER_ID = "stub-identifier"
+        check(await sms.send_challenge("+251911000001"), "challenge succeeds")
+        check(stub.requests[0][1].get("to") == "+251911000001", "challenge carries the phone number")
+        check(stub.requests[0][1].get("from") == "stub-identifier", "challenge uses the configured identifier")
+        check(await sms.verify_code("+251911000001", VALID_CODE), "correct code verifies")
+        check(not await sms.verify_code("+251911000001", "000000"), "wrong code is rejected")
+
+        stub.reset(failures_left=2)
+        check(await sms.send_challenge("+251911000002"), "challenge succeeds after two 503s")
+        check(len(stub.requests) == 3, f"503s were retried ({len(stub.requests)} requests)")
+
+        stub.reset(always_fail=True)
+        for _ in range(3):
+            check(not await sms.send_challenge("+251911000003"), "challenge fails while the stub is down")
+        check(sms.breaker.state == "open", "circuit opens after 3 failed calls")
+        sent = len(stub.requests)
+        check(not await sms.send_challenge("+251911000003"), "call fails while the circuit is open")
+        check(len(stub.requests) == sent, "open circuit does not reach the server")
+        check(not sms.enqueue_challenge("+251911000003"), "outbox rejects challenges while the circuit is open")
+
+        stub.reset()
+        await asyncio.sleep(0.6)
+        check(sms.breaker.state == "half-open", "circuit is half-open after the reset timeout")
+        check(await sms.send_challenge("+251911000004"), "trial call succeeds")
+        check(sms.breaker.state == "closed", "successful trial closes the circuit")
+
+        stub.reset(delay=0.3)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        queued = all(sms.enqueue_challenge(f"+2519110001{i:02d}") for i in range(20))
+        enqueue_ms = (time.perf_counter() - started) * 1000
+        check(queued, "20 challenges queued")
+        check(enqueue_ms < 50, f"enqueueing took {enqueue_ms:.2f} ms")
+        await asyncio.wait_for(sms._queue.join(), timeout=10)
+        ticking.cancel()
+        check(len(stub.requests) == 20, f"outbox delivered {len(stub.requests)}/20 challenges")
+        check(ticks > 50, f"event loop kept running during slow SMS calls ({ticks} ticks)")
+        await sms.stop()
+        check(not sms.enqueue_challenge("+251911000005"), "stopped outbox rejects challenges")
+
+    server.shutdown()
+    print("SMS client verified")
+
+if __name__ == "__main__":
+    asyncio.run(main())